@@ -0,0 +1,71 @@
+"""
+ANN benchmark — IVF index vs. exact search on a large synthetic material.
+
+Generates clustered unit vectors (a stand-in for one big book's chunk
+embeddings) and held-out queries near them, then reports:
+  - build time and index size
+  - exact search latency (one matrix-vector product over every row)
+  - recall@k and latency of the IVF index for several nprobe values
+
+Usage (from the repo root):
+    python -m benchmarks.ann_recall [n_vectors] [k]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from src.rag.ann_index import build_ivf, n_lists
+
+_DIM = 384
+_TOPICS = 200
+_QUERIES = 200
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def _data(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    topics = _unit(rng.standard_normal((_TOPICS, _DIM)))
+    labels = rng.integers(0, _TOPICS, n)
+    matrix = _unit(topics[labels] + 0.6 * _unit(rng.standard_normal((n, _DIM))))
+    picks = rng.integers(0, n, _QUERIES)
+    queries = _unit(matrix[picks] + 0.4 * _unit(rng.standard_normal((_QUERIES, _DIM))))
+    return matrix, queries
+
+
+def _exact(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def main(n: int, k: int):
+    matrix, queries = _data(n)
+    print(f"{n} vectors × {_DIM} dims, {_QUERIES} queries, k={k}, {n_lists(n)} lists")
+
+    t0 = time.perf_counter()
+    index = build_ivf(matrix)
+    build_s = time.perf_counter() - t0
+    size_kb = (index.centroids.nbytes + index.order.nbytes + index.offsets.nbytes) / 1024
+    print(f"  build {build_s:6.2f}s  index {size_kb:8.1f} KB (matrix {matrix.nbytes / 1024:.0f} KB)")
+
+    t0 = time.perf_counter()
+    truth = [set(_exact(matrix, q, k).tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - t0) / _QUERIES * 1000
+    print(f"  exact          {exact_ms:7.3f} ms/query  recall 1.000")
+
+    for nprobe in (1, 4, 8, 16, 32, 64):
+        t0 = time.perf_counter()
+        found = [index.search(matrix, q, k, nprobe)[0] for q in queries]
+        ms = (time.perf_counter() - t0) / _QUERIES * 1000
+        recall = np.mean([len(truth[i] & set(f.tolist())) / k for i, f in enumerate(found)])
+        print(f"  ivf nprobe={nprobe:<3} {ms:7.3f} ms/query  recall {recall:.3f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20000, int(args[1]) if len(args) > 1 else 5)
@@ -0,0 +1,57 @@
+"""
+Length-bucketing benchmark — one embed_documents call vs. token-budget buckets.
+
+Builds a mixed-length corpus (short queries, medium and long chunks, shuffled)
+and reports texts/s for:
+  - "single":   embed_documents(all_texts), the previous worker behavior
+  - "bucketed": length_buckets(...) with the given token budget, one call each
+
+Usage (from the repo root):
+    python -m benchmarks.bucketing [n_texts] [token_budget]
+"""
+
+import random
+import sys
+import time
+
+from src.rag.batch_workers import length_buckets, token_lengths
+from src.rag.rag import get_embedder
+
+_WORDS = (
+    "entropy energy system state heat temperature process reversible cycle engine "
+    "probability distribution information channel signal noise theorem proof lemma"
+).split()
+
+
+def _corpus(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    sizes = [5, 5, 5, 40, 80, 300]   # words: mostly short queries, some long chunks
+    return [" ".join(rng.choices(_WORDS, k=rng.choice(sizes))) for _ in range(n)]
+
+
+def _single(texts: list[str]) -> float:
+    t0 = time.perf_counter()
+    get_embedder().embed_documents(texts)
+    return time.perf_counter() - t0
+
+
+def _bucketed(texts: list[str], budget: int) -> float:
+    t0 = time.perf_counter()
+    embedder = get_embedder()
+    for bucket in length_buckets(token_lengths(texts), budget):
+        embedder.embed_documents([texts[i] for i in bucket])
+    return time.perf_counter() - t0
+
+
+def main(n: int, budget: int):
+    texts = _corpus(n)
+    get_embedder().embed_documents(["warmup"])
+    print(f"{n} texts, token budget {budget}")
+    for name, run in (("single", lambda: _single(texts)), ("bucketed", lambda: _bucketed(texts, budget))):
+        best = min(run() for _ in range(3))
+        print(f"  {name:<9} {best:7.2f}s  {n / best:8.1f} texts/s")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 512, int(args[1]) if len(args) > 1 else 8192)
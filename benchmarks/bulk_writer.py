@@ -0,0 +1,102 @@
+"""
+Bulk writer benchmark — sequential 50-row inserts vs. BulkWriter.
+
+Starts a local PostgREST-compatible stand-in (POST /rest/v1/<table> returns
+the inserted rows with ids) that simulates a fixed round-trip latency plus a
+bandwidth cost per byte, then writes the chunks and embeddings of one large
+document both ways through the real postgrest client:
+  - "sequential": one 50-row insert after another (previous behavior)
+  - "bulk":       BulkWriter (byte-sized batches, parallel in-flight requests,
+                  upserts on the same conflict keys as production)
+
+Usage (from the repo root):
+    python -m benchmarks.bulk_writer [n_chunks] [rtt_ms] [mb_per_s]
+"""
+
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from postgrest import SyncPostgrestClient
+
+from src.store import BulkWriter
+
+_DIM = 384
+_CHUNK_CHARS = 800
+
+
+def _stand_in(rtt_s: float, bytes_per_s: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(rtt_s + len(body) / bytes_per_s)
+            rows = json.loads(body)
+            rows = rows if isinstance(rows, list) else [rows]
+            for row in rows:
+                row.setdefault("id", str(uuid.uuid4()))
+            out = json.dumps(rows).encode("utf-8")
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _document(n: int) -> tuple[list[dict], list[dict]]:
+    chunks = [
+        {"id": str(uuid.uuid4()), "material_id": "bench", "chunk_index": i, "content": "x" * _CHUNK_CHARS}
+        for i in range(n)
+    ]
+    literal = "[" + ",".join(["0.0510312"] * _DIM) + "]"
+    embeddings = [
+        {"chunk_id": str(uuid.uuid4()), "material_id": "bench", "embedding": literal}
+        for _ in range(n)
+    ]
+    return chunks, embeddings
+
+
+def main(n: int, rtt_ms: float, mb_per_s: float):
+    server = _stand_in(rtt_ms / 1000, mb_per_s * 1024 * 1024)
+    client = SyncPostgrestClient(f"http://127.0.0.1:{server.server_address[1]}/rest/v1")
+    table = lambda name: client.from_(name)
+    chunks, embeddings = _document(n)
+    print(f"{n} chunks, stand-in RTT {rtt_ms:.0f}ms, {mb_per_s:.0f} MB/s")
+
+    t0 = time.perf_counter()
+    for name, rows in (("material_chunks", chunks), ("material_embeddings", embeddings)):
+        for i in range(0, len(rows), 50):
+            table(name).insert(rows[i:i + 50]).execute()
+    sequential = time.perf_counter() - t0
+    print(f"  sequential {sequential:7.2f}s")
+
+    writers = {
+        name: BulkWriter(name, max_in_flight=4, initial_bytes=256 * 1024, table_factory=table,
+                         conflict_key=key)
+        for name, key in (("material_chunks", "id"), ("material_embeddings", "chunk_id"))
+    }
+    t0 = time.perf_counter()
+    writers["material_chunks"].insert(chunks)
+    writers["material_embeddings"].insert(embeddings)
+    bulk = time.perf_counter() - t0
+    print(f"  bulk       {bulk:7.2f}s  ({sequential / bulk:.1f}x)  "
+          + "  ".join(f"{name}: {w.stats()}" for name, w in writers.items()))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if args else 2000,
+        float(args[1]) if len(args) > 1 else 40,
+        float(args[2]) if len(args) > 2 else 20,
+    )
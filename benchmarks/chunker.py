@@ -0,0 +1,69 @@
+"""
+Chunker benchmark — character splitter vs. tokenizer-aware splitter.
+
+Reports, per sample document and splitter:
+  - chunk count
+  - truncation rate (chunks longer than the embedder's max sequence length)
+  - tokens lost to truncation
+  - embedding time for all chunks
+
+Usage (from the repo root):
+    python -m benchmarks.chunker path/to/a.pdf path/to/b.txt ...
+"""
+
+import sys
+import time
+
+from src.materials.text_utils import char_splitter, text_from_pdf, token_splitter
+from src.rag.rag import get_embedder, get_embedding_tokenizer, get_max_seq_length
+
+
+def _load(path: str) -> str:
+    if path.lower().endswith(".pdf"):
+        return text_from_pdf(path)
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _measure(name: str, chunks: list[str]) -> dict:
+    tokenizer = get_embedding_tokenizer()
+    limit = get_max_seq_length()
+    lengths = [len(tokenizer.encode(c)) for c in chunks]
+    truncated = [n for n in lengths if n > limit]
+
+    t0 = time.perf_counter()
+    get_embedder().embed_documents(chunks)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "truncated_pct": 100 * len(truncated) / len(chunks) if chunks else 0.0,
+        "tokens_lost": sum(n - limit for n in truncated),
+        "embed_s": elapsed,
+    }
+
+
+def main(paths: list[str]):
+    if not paths:
+        print(__doc__)
+        sys.exit(1)
+
+    get_embedder().embed_documents(["warmup"])
+    print(f"max_seq_length = {get_max_seq_length()} tokens\n")
+    print(f"{'document':<32} {'splitter':<14} {'chunks':>7} {'trunc %':>8} {'tok lost':>9} {'embed s':>8}")
+    for path in paths:
+        text = _load(path)
+        for name, splitter in (
+            ("chars 800/150", char_splitter(800, 150)),
+            ("tokens", token_splitter()),
+        ):
+            r = _measure(name, splitter.split_text(text))
+            print(
+                f"{path[-32:]:<32} {r['splitter']:<14} {r['chunks']:>7} "
+                f"{r['truncated_pct']:>8.1f} {r['tokens_lost']:>9} {r['embed_s']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,93 @@
+"""
+Embedding payload benchmark — JSON float lists vs. compact vector literals.
+
+Builds random unit vectors like the embedder's (384-dim float32) and compares
+the two ways of writing material_embeddings rows:
+  - "json_list": embedding as a list of Python floats (previous behavior)
+  - "literal":   embedding as a pgvector text literal (vector_literal)
+
+Reports bytes per row, encode throughput (rows to request bodies), and
+insert throughput of 50-row requests POSTed to a local HTTP sink, which
+isolates serialization and transfer cost from database time.
+
+Usage (from the repo root):
+    python -m benchmarks.embedding_payload [n_rows]
+"""
+
+import json
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.rag.rag import EMBEDDING_DIM, vector_literal
+
+_INSERT_ROWS = 50
+
+
+class _Sink(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _vectors(n: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    v = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _bodies(vectors: np.ndarray, mode: str) -> list[bytes]:
+    """Request bodies of _INSERT_ROWS rows each — row encoding plus JSON serialization."""
+    encode = (lambda v: v.tolist()) if mode == "json_list" else vector_literal
+    rows = [
+        {"chunk_id": str(uuid.uuid4()), "material_id": "m", "embedding": encode(v)}
+        for v in vectors
+    ]
+    return [json.dumps(rows[i:i + _INSERT_ROWS]).encode("utf-8") for i in range(0, len(rows), _INSERT_ROWS)]
+
+
+def _post_all(url: str, bodies: list[bytes]) -> int:
+    sent = 0
+    for body in bodies:
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request).read()
+        sent += len(body)
+    return sent
+
+
+def main(n: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Sink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/material_embeddings"
+
+    vectors = _vectors(n)
+    print(f"{n} rows × {EMBEDDING_DIM} dims, {_INSERT_ROWS}-row inserts")
+    for mode in ("json_list", "literal"):
+        t0 = time.perf_counter()
+        bodies = _bodies(vectors, mode)
+        encode_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        sent = _post_all(url, bodies)
+        post_s = time.perf_counter() - t0
+        print(f"  {mode:<10} {sent / n:8.0f} B/row  encode {n / encode_s:9.0f} rows/s  "
+              f"insert {n / (encode_s + post_s):8.0f} rows/s")
+
+    # Precision check: the literal must round-trip to the same float32 vector (≈)
+    parsed = np.array(json.loads(vector_literal(vectors[0])), dtype=np.float32)
+    print(f"  literal max abs error: {np.abs(parsed - vectors[0]).max():.2e}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 5000)
@@ -0,0 +1,100 @@
+"""
+Hybrid retrieval benchmark — BM25 index build, size and query latency.
+
+Generates a synthetic material (Zipf-distributed words, with code-like
+identifiers such as "solve_ode_17" sprinkled into a few chunks) and reports:
+  - lexical index build time, in-memory size and saved .npz size
+  - BM25 scoring latency for keyword queries (an identifier), short
+    queries of frequent words (not selective, so never skipped) and longer
+    natural-language queries, and the share that skip the dense pass
+  - end-to-end MaterialIndex latency: dense search vs. hybrid_search
+    (query embedding excluded; a fixed vector stands in for it)
+
+Usage (from the repo root):
+    python -m benchmarks.hybrid_retrieval [n_chunks] [k]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.config import settings
+from src.rag.lexical_index import build_lexical_index, query_terms, save_lexical, lexical_index_path
+from src.rag.vector_index import MaterialIndex
+
+_DIM = 384
+_VOCAB = 20000
+_WORDS_PER_CHUNK = 120
+_QUERIES = 200
+_IDENTIFIERS = 500
+
+
+def _corpus(n: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(_VOCAB)]
+    ranks = np.minimum(rng.zipf(1.2, (n, _WORDS_PER_CHUNK)), _VOCAB) - 1
+    chunks = [" ".join(words[r] for r in row) for row in ranks]
+    identifiers = [f"solve_ode_{i}" for i in range(_IDENTIFIERS)]
+    for i, ident in enumerate(identifiers):
+        for row in rng.integers(0, n, 3):
+            chunks[row] += f" see {ident}()."
+    return chunks, identifiers
+
+
+def _queries(identifiers: list[str], seed: int = 1) -> tuple[list[str], list[str], list[str]]:
+    rng = np.random.default_rng(seed)
+    keyword = [f"what is {identifiers[i]}" for i in rng.integers(0, len(identifiers), _QUERIES)]
+    common = [f"w{w}" for w in rng.integers(0, 10, _QUERIES)]
+    natural = [" ".join(f"w{w}" for w in rng.integers(0, 2000, 8)) for _ in range(_QUERIES)]
+    return keyword, common, natural
+
+
+def _ms_per_query(fn, queries: list[str]) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t0) / len(queries) * 1000
+
+
+def main(n: int, k: int):
+    chunks, identifiers = _corpus(n)
+    keyword, common, natural = _queries(identifiers)
+    print(f"{n} chunks × ~{_WORDS_PER_CHUNK} words, {_QUERIES} queries per set, k={k}")
+
+    t0 = time.perf_counter()
+    lexical = build_lexical_index(chunks)
+    build_s = time.perf_counter() - t0
+    chunk_ids = [f"c{i}" for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.lexical_index_dir = tmp
+        save_lexical("bench", lexical, chunk_ids)
+        disk_kb = os.path.getsize(lexical_index_path("bench")) / 1024
+    text_kb = sum(len(c) for c in chunks) / 1024
+    print(f"  build {build_s:6.2f}s  {len(lexical.terms)} terms  {len(lexical.postings)} postings  "
+          f"index {lexical.nbytes / 1024:.0f} KB in memory, {disk_kb:.0f} KB on disk (text {text_kb:.0f} KB)")
+
+    rng = np.random.default_rng(2)
+    matrix = rng.standard_normal((n, _DIM)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    index = MaterialIndex(chunk_ids=chunk_ids, contents=chunks, chunk_indexes=list(range(n)),
+                          matrix=matrix, lexical=lexical)
+    vector = matrix[0]
+
+    for name, queries in (("keyword", keyword), ("common", common), ("natural", natural)):
+        bm25_ms = _ms_per_query(lambda q: lexical.score(query_terms(q)), queries)
+        dense_ms = _ms_per_query(lambda q: index.search(vector, k, 0.0), queries)
+        embedded = []
+        hybrid_ms = _ms_per_query(
+            lambda q: index.hybrid_search(q, lambda: embedded.append(q) or vector, k, 0.0, 0.6), queries
+        )
+        skipped = 1 - len(embedded) / len(queries)
+        print(f"  {name:<8} bm25 {bm25_ms:7.3f} ms  dense {dense_ms:7.3f} ms  "
+              f"hybrid {hybrid_ms:7.3f} ms/query  dense pass skipped {skipped:.0%}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20000, int(args[1]) if len(args) > 1 else 5)
@@ -0,0 +1,82 @@
+"""
+ONNX parity benchmark — int8 ONNX Runtime backend vs. the torch backend.
+
+Embeds the same corpus and queries with both backends and reports:
+  - cosine agreement: cosine(torch_vec, onnx_vec) per text (mean / p5 / min)
+  - retrieval overlap: |top-k(torch) ∩ top-k(onnx)| / k per query, averaged
+  - latency: best-of-3 wall time for the corpus and per-query embed_query
+
+The quantized model must exist first:
+    python -m src.rag.embedders export
+
+Usage (from the repo root):
+    python -m benchmarks.onnx_parity [n_chunks] [k]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from src.config import settings
+from src.rag.embedders import OnnxEmbeddings, TorchEmbeddings
+
+_WORDS = (
+    "entropy energy system state heat temperature process reversible cycle engine "
+    "probability distribution information channel signal noise theorem proof lemma "
+    "matrix vector eigenvalue gradient descent optimization function derivative integral"
+).split()
+
+
+def _corpus(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_WORDS, k=rng.choice([20, 60, 100]))) for _ in range(n)]
+
+
+def _queries(n: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_WORDS, k=rng.randint(3, 8))) for _ in range(n)]
+
+
+def _timed(fn) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(3):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(n: int, k: int):
+    chunks, queries = _corpus(n), _queries(50)
+    # Torch isn't pinned here either, so give ONNX Runtime the whole budget
+    onnx = OnnxEmbeddings(settings.onnx_model_dir, settings.onnx_intra_op_threads or settings.cpu_budget)
+    backends = {"torch": TorchEmbeddings(), "onnx": onnx}
+
+    docs, qs = {}, {}
+    print(f"{n} chunks, {len(queries)} queries, k={k}")
+    for name, backend in backends.items():
+        backend.embed_documents(["warmup"])
+        doc_s, vectors = _timed(lambda: backend.embed_documents(chunks))
+        query_s, _ = _timed(lambda: [backend.embed_query(q) for q in queries])
+        docs[name] = np.asarray(vectors, dtype=np.float32)
+        qs[name] = np.asarray([backend.embed_query(q) for q in queries], dtype=np.float32)
+        print(f"  {name:<6} corpus {doc_s:6.2f}s ({n / doc_s:7.1f} texts/s)  "
+              f"query {query_s / len(queries) * 1000:6.1f}ms")
+
+    # Both backends L2-normalize, so the row-wise dot product is the cosine
+    cos = np.sum(docs["torch"] * docs["onnx"], axis=1)
+    print(f"  cosine agreement: mean {cos.mean():.4f}  p5 {np.percentile(cos, 5):.4f}  min {cos.min():.4f}")
+
+    top = {
+        name: np.argsort(-(qs[name] @ docs[name].T), axis=1)[:, :k]
+        for name in backends
+    }
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(top["torch"], top["onnx"])]
+    print(f"  top-{k} retrieval overlap: {np.mean(overlap):.3f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 1000, int(args[1]) if len(args) > 1 else 5)
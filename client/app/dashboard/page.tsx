@@ -69,6 +69,7 @@ const sourceTypeConfig: Record<string, { icon: React.ElementType; label: string;
 const statusConfig: Record<string, { icon: React.ElementType; label: string; color: string; animate: boolean }> = {
   pending: { icon: Loader2, label: 'Uploading', color: 'bg-gray-500/10 text-gray-600', animate: true },
   processing: { icon: Loader2, label: 'Processing', color: 'bg-yellow-500/10 text-yellow-600', animate: true },
+  partially_ready: { icon: Loader2, label: 'Indexing', color: 'bg-yellow-500/10 text-yellow-600', animate: true },
   ready: { icon: CheckCircle2, label: 'Ready', color: 'bg-green-500/10 text-green-600', animate: false },
   error: { icon: AlertCircle, label: 'Error', color: 'bg-red-500/10 text-red-600', animate: false },
   failed: { icon: AlertCircle, label: 'Failed', color: 'bg-red-500/10 text-red-600', animate: false },
@@ -163,18 +164,58 @@ export default function DashboardPage() {
   }
 
   // ── Polling ─────────────────────────────────────────────────
+  // Mirrors `materials` for the polling interval's closure
+  const materialsRef = useRef<Material[]>([])
+  useEffect(() => {
+    materialsRef.current = materials
+  }, [materials])
+
+  const isInProgress = (status: Material['status']) =>
+    status === 'processing' || status === 'partially_ready' || status === 'pending'
+
+  const refreshList = async () => {
+    const data = await materialsAPI.list().catch(() => null)
+    if (!data) return null
+    const sorted = data.sort((a, b) =>
+      new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
+    )
+    mergeWithServer(sorted)
+    return sorted
+  }
+
+  // While uploads are still resolving, poll the whole list; once every in-flight
+  // material is known, poll only their cheap progress endpoints and re-read the
+  // list when one of them finishes (or disappears)
+  const pollOnce = async (): Promise<boolean | null> => {
+    const inFlight = materialsRef.current.filter(m => !m.id.startsWith('temp-') && isInProgress(m.status))
+    const hasTemps = Object.keys(tempToRealRef.current).length > 0 ||
+      materialsRef.current.some(m => m.id.startsWith('temp-'))
+    if (hasTemps || inFlight.length === 0) {
+      const sorted = await refreshList()
+      return sorted ? sorted.some(m => isInProgress(m.status)) : null
+    }
+
+    const updates = await Promise.all(inFlight.map(m => materialsAPI.progress(m.id).catch(() => null)))
+    if (updates.some(p => !p || !isInProgress(p.status))) {
+      const sorted = await refreshList()
+      return sorted ? sorted.some(m => isInProgress(m.status)) : null
+    }
+    const byId = new Map(updates.map(p => [p!.material_id, p!] as const))
+    setMaterials(prev => prev.map(m => {
+      const p = byId.get(m.id)
+      if (!p) return m
+      // Same rule as mergeWithServer: don't regress a local status to pending
+      const status = p.status === 'pending' && m.status !== 'pending' ? m.status : p.status
+      return { ...m, status, indexed_percent: p.indexed_percent ?? m.indexed_percent }
+    }))
+    return true
+  }
+
   const startPolling = () => {
     if (pollingRef.current) return
     pollingRef.current = setInterval(async () => {
-      const data = await materialsAPI.list().catch(() => null)
-      if (!data) return
-      const sorted = data.sort((a, b) =>
-        new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-      )
-      mergeWithServer(sorted)
-      const stillProcessing = sorted.some(
-        (m) => m.status === 'processing' || m.status === 'pending'
-      )
+      const stillProcessing = await pollOnce()
+      if (stillProcessing === null) return
       if (!stillProcessing) {
         // Check if there are still temp entries waiting
         const hasTemps = Object.keys(tempToRealRef.current).length > 0
@@ -12,11 +12,29 @@ export interface Material {
   title: string
   source_type: 'pdf' | 'url' | 'topic'
   topic?: string
-  status: 'pending' | 'processing' | 'ready' | 'error' | 'failed'
+  status: 'pending' | 'processing' | 'partially_ready' | 'ready' | 'error' | 'failed'
+  indexed_percent?: number
   created_at: string
   updated_at: string
 }
 
+export interface MaterialProgress {
+  material_id: string
+  status: Material['status']
+  job_status: 'pending' | 'processing' | 'done' | 'error' | null
+  indexed_percent: number | null
+  chunks_produced: number | null
+  chunks_indexed: number | null
+  error_message: string | null
+}
+
+export interface LibrarySearchResult {
+  material_id: string
+  title: string | null
+  score: number
+  chunks: { chunk_id: string; content: string; chunk_index: number; similarity: number }[]
+}
+
 export interface ChatMessage {
   id: string
   role: 'user' | 'assistant'
@@ -146,6 +164,12 @@ export const materialsAPI = {
       body: JSON.stringify({ topic }),
     }),
 
+  semanticSearch: (q: string, k = 10, per_material = 3) =>
+    fetchAPI<{ results: LibrarySearchResult[] }>('/api/materials/semantic-search', {
+      method: 'POST',
+      body: JSON.stringify({ q, k, per_material }),
+    }),
+
   search: (q: string) =>
     fetchAPI<{ results: { material_id: string; relevance: number }[] }>('/api/materials/search', {
       method: 'POST',
@@ -161,6 +185,9 @@ export const materialsAPI = {
   get: (material_id: string) =>
     fetchAPI<Material>(`/api/materials/${material_id}`),
 
+  progress: (material_id: string) =>
+    fetchAPI<MaterialProgress>(`/api/materials/${material_id}/progress`),
+
   getSummary: (material_id: string) =>
     fetchAPI<{ summary: string; time_taken: number }>(`/api/materials/${material_id}/summary`),
 
@@ -1,14 +1,21 @@
 import os
+import tempfile
 from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
 
 
-ENV_PATH = Path(__file__).resolve().parents[1] / "config.env"
+ROOT_DIR = Path(__file__).resolve().parents[1]
+ENV_PATH = ROOT_DIR / "config.env"
 load_dotenv(ENV_PATH)
 
 
+def _root_path(path: str) -> str:
+    """Relative paths resolve against the repo root, not the process's working directory."""
+    return str(ROOT_DIR / path) if path and not os.path.isabs(path) else path
+
+
 class Settings:
     openrouter_api_key: str = os.getenv("OPENROUTER_API_KEY", "")
     openrouter_base_url: str = os.getenv(
@@ -35,6 +42,76 @@ class Settings:
         for origin in os.getenv("CORS_ALLOWED_ORIGINS", "").split(",")
         if origin.strip()
     ]
+    # Cores for CPU-bound work (embedding inference + parsing), split by src/thread_budget.py
+    cpu_budget: int = int(os.getenv("CPU_BUDGET", str(os.cpu_count() or 1)))
+    # 0 = a quarter of the budget
+    parse_threads: int = int(os.getenv("PARSE_THREADS", "0"))
+    # Network-bound threads (Supabase calls, spooling); not counted against the budget
+    io_threads: int = int(os.getenv("IO_THREADS", str(min(32, (os.cpu_count() or 1) + 4))))
+    # PDFs with at least this many pages are extracted on a process pool
+    # (pdf_workers processes, capped at cpu_budget)
+    pdf_parallel_min_pages: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+    pdf_workers: int = int(os.getenv("PDF_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    # Pages per pool task; workers keep the parsed document between tasks
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "32"))
+    # "tokens" packs chunks to the embedder's max sequence length; "chars" keeps the character splitter
+    chunker: str = os.getenv("CHUNKER", "tokens")
+    chunk_overlap_tokens: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+    # >1 runs embedding inference on that many processes (one model copy each)
+    embedding_workers: int = int(os.getenv("EMBEDDING_WORKERS", "1"))
+    # Texts waiting for embedding across all users; producers wait for room beyond this
+    embedding_queue_max_texts: int = int(os.getenv("EMBEDDING_QUEUE_MAX_TEXTS", "4096"))
+    # Texts per embedding worker batch; jobs are collected for at most this window
+    embed_batch_max_texts: int = int(os.getenv("EMBED_BATCH_MAX_TEXTS", "256"))
+    embed_batch_max_window_ms: float = float(os.getenv("EMBED_BATCH_MAX_WINDOW_MS", "50"))
+    # Padded tokens (longest text × texts) per embedding forward pass
+    embed_token_budget: int = int(os.getenv("EMBED_TOKEN_BUDGET", "8192"))
+    # Uploaded PDFs are spooled here until their background ingestion finishes
+    upload_spool_dir: str = os.getenv(
+        "UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "ai-tutor-uploads")
+    )
+    # Materials ingested concurrently by the ingestion scheduler
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "2"))
+    # Ingestion jobs waiting for a worker; uploads get 503 beyond this
+    ingest_queue_max_jobs: int = int(os.getenv("INGEST_QUEUE_MAX_JOBS", "100"))
+    # A job that has waited this long is served next, whatever its size class
+    ingest_max_wait_s: float = float(os.getenv("INGEST_MAX_WAIT_S", "300"))
+    # Fast-path URL fetching (src/materials/web.py)
+    scrape_timeout_s: float = float(os.getenv("SCRAPE_TIMEOUT_S", "15"))
+    scrape_max_bytes: int = int(os.getenv("SCRAPE_MAX_BYTES", str(5 * 1024 * 1024)))
+    scrape_max_connections: int = int(os.getenv("SCRAPE_MAX_CONNECTIONS", "20"))
+    # Less extracted text than this falls back to the unstructured loader
+    scrape_min_chars: int = int(os.getenv("SCRAPE_MIN_CHARS", "500"))
+    # On-disk chunk embedding cache; an empty path disables it
+    embedding_cache_path: str = _root_path(os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3"))
+    embedding_cache_max_mb: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "256"))
+    # Parallel insert requests per bulk write, and the starting payload size per request
+    db_write_concurrency: int = int(os.getenv("DB_WRITE_CONCURRENCY", "4"))
+    db_write_batch_kb: int = int(os.getenv("DB_WRITE_BATCH_KB", "256"))
+    # Chat query vectors kept in memory (src/rag/query_cache.py); 0 disables the cache
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+    # Per-material search matrices kept in memory (src/rag/vector_index.py); 0 = always use the RPC
+    vector_index_max_mb: int = int(os.getenv("VECTOR_INDEX_MAX_MB", "256"))
+    # Cached indexes older than this are reloaded, bounding staleness from writes by other processes
+    vector_index_ttl_s: int = int(os.getenv("VECTOR_INDEX_TTL_S", "300"))
+    # Materials with at least this many chunks get an IVF index (src/rag/ann_index.py); 0 disables it
+    ann_min_chunks: int = int(os.getenv("ANN_MIN_CHUNKS", "4000"))
+    # Clusters scanned per query; more = better recall, slower
+    ann_nprobe: int = int(os.getenv("ANN_NPROBE", "16"))
+    # Saved IVF indexes; relative paths are under the repo root
+    ann_index_dir: str = _root_path(os.getenv("ANN_INDEX_DIR", "cache/ann"))
+    # Chat retrieval: "dense" (vectors only) or "hybrid" (BM25 + vectors, src/rag/lexical_index.py);
+    # hybrid is opt-in, see docs/rag.md
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "dense")
+    # Share of the hybrid score given to cosine similarity; the rest goes to normalized BM25
+    hybrid_dense_weight: float = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.6"))
+    # Saved BM25 indexes; relative paths are under the repo root
+    lexical_index_dir: str = _root_path(os.getenv("LEXICAL_INDEX_DIR", "cache/lexical"))
+    # "torch" (sentence-transformers) or "onnx" (int8-quantized export on ONNX Runtime)
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    onnx_model_dir: str = os.getenv("ONNX_MODEL_DIR", "models/minilm-onnx-int8")
+    # 0 = the thread budget's inference share (src/thread_budget.py)
+    onnx_intra_op_threads: int = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
 
 
 @lru_cache()
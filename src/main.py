@@ -44,18 +44,35 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    import asyncio
+    from src.thread_budget import configure_threads
+    configure_threads(asyncio.get_event_loop())
+
     try:
         from src.rag.rag import get_embedder
         get_embedder()
         logger.info("Embedder loaded successfully.")
     except Exception as e:
-        logger.warning(f"Embedder failed to load: {e}")
+        # Not fatal for the rest of the API; ingestion and search fail until it loads
+        logger.error(f"Embedder failed to load: {e}")
 
     from src.rag.batch_workers import start_workers
     start_workers()
 
+    from src.materials.scheduler import scheduler
+    scheduler.start()
+
+    try:
+        from src.materials.routes import resume_interrupted_ingestions
+        await resume_interrupted_ingestions()
+    except Exception as e:
+        logger.warning(f"Could not resume interrupted ingestions: {e}")
+
     yield
 
+    from src.materials.web import close_http_client
+    await close_http_client()
+
 
 app = FastAPI(
     title="AI Tutor API",
@@ -97,6 +114,33 @@ async def health_check():
     return {"status": "ok", "service": "AI Tutor API"}
 
 
+@app.get("/api/metrics")
+async def metrics(user_id: str = Depends(get_current_user_id)):
+    from src.rag.embedding_cache import get_embedding_cache
+    from src.rag.query_cache import get_query_cache
+    from src.rag.batch_workers import job_registry, embedding_queue, batcher
+    from src.materials.scheduler import scheduler
+    from src.store import bulk_writer_stats
+    from src.rag.vector_index import get_vector_index_cache, get_user_index_cache
+    from src.rag.lexical_index import lexical_stats
+    cache = get_embedding_cache()
+    query_cache = get_query_cache()
+    vector_index = get_vector_index_cache()
+    library_index = get_user_index_cache()
+    return {
+        "embedding_cache": cache.stats() if cache is not None else None,
+        "query_cache": query_cache.stats() if query_cache is not None else None,
+        "vector_index": vector_index.stats() if vector_index is not None else None,
+        "library_index": library_index.stats() if library_index is not None else None,
+        "lexical_index": lexical_stats.stats(),
+        "ingestion": scheduler.stats(),
+        "jobs": job_registry.stats(),
+        "embedding_queue": embedding_queue.stats(),
+        "embedding_batches": batcher.stats(),
+        "bulk_writes": bulk_writer_stats(),
+    }
+
+
 @app.get("/api/usage")
 async def get_user_usage(user_id: str = Depends(get_current_user_id)):
     return get_usage(user_id)
@@ -0,0 +1,267 @@
+"""
+Ingestion Pipeline — Staged chunk → embed → persist for materials.
+
+Architecture:
+  - Stage 1 (parse thread): extract + chunk the source, group chunks into batches.
+  - Stage 2 (async): embed each batch through the shared batch worker queue.
+  - Stage 3 (async): save the batch's chunks and embeddings, update progress.
+  - Stages are connected by bounded asyncio.Queues, so a slow stage applies
+    backpressure instead of buffering the whole document in memory.
+
+Every persisted batch is immediately searchable. While batches are still
+coming in the material is `partially_ready` with an `indexed_percent` counter.
+
+After each persisted batch the material's ingest checkpoint records how many
+chunks are stored, so a restarted process can resume with `skip_chunks`
+instead of re-embedding everything.
+
+Live counters are also published to the job registry under
+ingest_job_id(material_id) for GET /api/materials/{id}/progress.
+"""
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from src.rag.batch_workers import job_registry
+from src.config import settings
+from src.rag.vector_index import prepare_material_index
+from src.rag.lexical_index import index_material_text
+from src.thread_budget import get_executor
+from src.rag.rag import embed_texts_async, insert_embeddings
+from src.store import save_chunks, save_checkpoint, update_material_status, update_material_progress
+
+logger = logging.getLogger(__name__)
+
+
+_BATCH_CHUNKS = 32
+_QUEUE_MAXSIZE = 4
+_PUT_POLL_S = 0.5
+
+_DONE = object()
+
+
+@dataclass
+class IngestProgress:
+    """Progress of one material's ingestion, updated by the pipeline stages."""
+    material_id: str
+    source_fraction: float = 0.0       # share of the source consumed by the chunker
+    chunks_produced: int = 0
+    chunks_indexed: int = 0
+    extraction_done: bool = False
+
+    @property
+    def percent(self) -> int:
+        if self.chunks_produced == 0:
+            return 0
+        indexed = self.chunks_indexed / self.chunks_produced
+        if not self.extraction_done:
+            # Chunk total is unknown until extraction ends: scale by source consumed
+            indexed *= self.source_fraction
+        return min(100, int(indexed * 100))
+
+
+def ingest_job_id(material_id: str) -> str:
+    return f"ingest:{material_id}"
+
+
+def _publish(progress: IngestProgress, status: str):
+    job_registry.set_status(ingest_job_id(progress.material_id), status)
+    job_registry.update_progress(
+        ingest_job_id(progress.material_id),
+        chunks_produced=progress.chunks_produced,
+        chunks_indexed=progress.chunks_indexed,
+        percent=progress.percent,
+    )
+
+
+ChunkSource = Callable[[IngestProgress], Iterator[str]]
+"""Yields chunk texts in order; may update progress.source_fraction as it goes."""
+
+
+def _produce(loop, queue: asyncio.Queue, source: ChunkSource,
+             progress: IngestProgress, stop: threading.Event, skip_chunks: int):
+    """Stage 1, runs on an executor thread: chunk the source into batches."""
+
+    def put(item) -> bool:
+        # Poll so the thread can notice a failed downstream stage instead of blocking forever
+        while not stop.is_set():
+            fut = asyncio.run_coroutine_threadsafe(
+                asyncio.wait_for(queue.put(item), timeout=_PUT_POLL_S), loop
+            )
+            try:
+                fut.result()
+                return True
+            except asyncio.TimeoutError:
+                continue
+        return False
+
+    batch: list[str] = []
+    try:
+        for i, chunk in enumerate(source(progress)):
+            if i < skip_chunks:
+                # Already persisted before a restart; chunking is deterministic
+                progress.chunks_produced += 1
+                progress.chunks_indexed += 1
+                continue
+            batch.append(chunk)
+            progress.chunks_produced += 1
+            if len(batch) >= _BATCH_CHUNKS:
+                if not put(batch):
+                    return
+                batch = []
+        if batch and not put(batch):
+            return
+        progress.source_fraction = 1.0
+        progress.extraction_done = True
+        put(_DONE)
+    except Exception as e:
+        put(e)
+
+
+async def _embed_stage(in_queue: asyncio.Queue, out_queue: asyncio.Queue, user_id: str):
+    """Stage 2: embed each chunk batch (queued under the material owner's turn)."""
+    while True:
+        item = await in_queue.get()
+        if item is _DONE or isinstance(item, Exception):
+            await out_queue.put(item)
+            if isinstance(item, Exception):
+                raise item
+            return
+        embeddings = await embed_texts_async(item, user_id)
+        await out_queue.put((item, embeddings))
+
+
+def _checkpoint(progress: IngestProgress):
+    try:
+        save_checkpoint(progress.material_id, {
+            "chunks_persisted": progress.chunks_indexed,
+            # The producer finishes before the last batches are persisted: only
+            # claim "done" once chunks_persisted covers every chunk
+            "extraction_done": progress.extraction_done and progress.chunks_indexed == progress.chunks_produced,
+        })
+    except Exception as e:
+        logger.warning(f"Checkpoint failed for material {progress.material_id} (non-fatal): {e}")
+
+
+async def _persist_stage(queue: asyncio.Queue, progress: IngestProgress):
+    """Stage 3: persist chunks + embeddings, then publish progress."""
+    loop = asyncio.get_event_loop()
+    material_id = progress.material_id
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            await loop.run_in_executor(None, _checkpoint, progress)
+            return
+        if isinstance(item, Exception):
+            raise item
+        chunks, embeddings = item
+        chunk_ids = await loop.run_in_executor(
+            None, save_chunks, material_id, chunks, progress.chunks_indexed
+        )
+        await loop.run_in_executor(None, insert_embeddings, material_id, chunk_ids, embeddings)
+        progress.chunks_indexed += len(chunks)
+        _publish(progress, "processing")
+        await loop.run_in_executor(None, _checkpoint, progress)
+
+        try:
+            await loop.run_in_executor(
+                None, update_material_progress, material_id, "partially_ready", progress.percent
+            )
+        except Exception as e:
+            logger.warning(f"Progress update failed for material {material_id} (non-fatal): {e}")
+
+
+_READY_RETRIES = 5
+
+
+async def _mark_ready(material_id: str):
+    """
+    Final status write, retried with backoff. Non-fatal: every chunk is
+    already persisted, and the startup resume scan marks a material that is
+    left partially_ready without a checkpoint as ready.
+    """
+    loop = asyncio.get_event_loop()
+    for attempt in range(_READY_RETRIES):
+        try:
+            await loop.run_in_executor(None, update_material_progress, material_id, "ready", 100)
+            return
+        except Exception as e:
+            if attempt == _READY_RETRIES - 1:
+                logger.error(f"Could not mark material {material_id} ready (fixed on next startup): {e}")
+                return
+            await asyncio.sleep(2 ** attempt)
+
+
+async def run_ingestion(material_id: str, source: ChunkSource, skip_chunks: int = 0,
+                        user_id: str = "") -> IngestProgress:
+    """
+    Run the chunk → embed → persist pipeline for one material and mark it
+    `ready` when every batch is indexed. The first `skip_chunks` chunks the
+    source yields are assumed persisted already. Raises if any stage fails.
+    """
+    loop = asyncio.get_event_loop()
+    progress = IngestProgress(material_id=material_id)
+    chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+    stop = threading.Event()
+
+    job_registry.create(ingest_job_id(material_id), chunks_produced=0, chunks_indexed=0, percent=0)
+    await loop.run_in_executor(None, update_material_status, material_id, "processing")
+
+    producer = loop.run_in_executor(get_executor("parse"), _produce, loop, chunk_queue, source, progress, stop, skip_chunks)
+    stages = [
+        asyncio.ensure_future(_embed_stage(chunk_queue, embed_queue, user_id)),
+        asyncio.ensure_future(_persist_stage(embed_queue, progress)),
+    ]
+    try:
+        await asyncio.gather(*stages)
+    except Exception as e:
+        for task in stages:
+            task.cancel()
+        job_registry.set_error(ingest_job_id(material_id), str(e))
+        raise
+    finally:
+        stop.set()
+        await producer
+
+    await _mark_ready(material_id)
+    _publish(progress, "done")
+
+    await build_search_indexes(material_id, progress.chunks_indexed)
+    logger.info(f"Ingestion complete for material {material_id} ({progress.chunks_indexed} chunks)")
+    return progress
+
+
+async def build_search_indexes(material_id: str, n_chunks: int):
+    """
+    Build and save a ready material's BM25 index, then its IVF index if it
+    has at least settings.ann_min_chunks chunks. Non-fatal: a missing index
+    is rebuilt on load. BM25 goes first so prepare_material_index loads the
+    saved file instead of building it in memory a second time.
+    """
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(get_executor("parse"), index_material_text, material_id)
+    except Exception as e:
+        logger.warning(f"Lexical index build failed for material {material_id} (non-fatal): {e}")
+    if settings.ann_min_chunks > 0 and n_chunks >= settings.ann_min_chunks:
+        try:
+            await loop.run_in_executor(get_executor("parse"), prepare_material_index, material_id)
+        except Exception as e:
+            logger.warning(f"IVF index build failed for material {material_id} (non-fatal): {e}")
+
+
+def track_fraction(pieces: Iterator[str], total: Callable[[], int], progress: IngestProgress) -> Iterator[str]:
+    """Pass pieces through, recording the consumed share of `total()` on progress.
+
+    `total` is read per piece, so it can be filled in by the source once it knows it.
+    """
+    for i, piece in enumerate(pieces, start=1):
+        yield piece
+        count = total()
+        if count:
+            progress.source_fraction = i / count
+
@@ -1,16 +1,35 @@
 import time
 import asyncio
 import logging
+import os
+import hashlib
+import tempfile
 import validators
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Header, Request
-from pydantic import BaseModel
+import uuid
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Header, Request
+from pydantic import BaseModel, Field
 from postgrest.exceptions import APIError
 
-from src.materials.text_utils import text_from_pdf, chunk_text, scrap_website
-from src.rag.rag import store_embeddings, store_embeddings_async
-from src.store import create_material, get_material, update_material_status, save_chunks, list_materials, delete_material, rename_material, is_title_taken
+from src.materials.text_utils import (
+    iter_pdf_pages, iter_chunks, chunk_text, normalize_url,
+    ingest_splitter,
+)
+from src.materials.pipeline import IngestProgress, run_ingestion, build_search_indexes, track_fraction, ingest_job_id
+from src.materials.web import fetch_page_text
+from src.materials.scheduler import scheduler
+from src.rag.rag import embed_texts_async, insert_embeddings, embed_search_query, MATCH_THRESHOLD
+from src.rag.vector_index import search_library
+from src.rag.batch_workers import job_registry
+from src.store import (
+    create_material, get_material, update_material_status, list_materials, delete_material, rename_material, is_title_taken,
+    update_material_progress, find_content_owner, add_content_ref, create_materials_bulk, list_batch_materials, resolve_content_owners,
+    get_chunks, get_embedded_chunk_ids, delete_chunks_from, save_checkpoint, get_checkpoint, delete_checkpoint,
+    list_materials_by_status, list_checkpoint_sources,
+)
 from src.dependencies import get_current_user_id, get_current_user
 from src.database import get_supabase, get_auth_supabase
+from src.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +39,7 @@ ALLOWED_TYPES = {"application/pdf"}
 MAX_SIZE_MB = 10
 MAX_SIZE_BYTES = MAX_SIZE_MB * 1024 * 1024
 
-def _validate_pdf_upload(file: UploadFile) -> None:
+def _validate_pdf_upload(file: UploadFile) -> int:
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(400, "Only PDF files are accepted")
     if file.content_type not in ALLOWED_TYPES:
@@ -37,6 +56,41 @@ def _validate_pdf_upload(file: UploadFile) -> None:
         raise HTTPException(400, "File too large")
     if size is None:
         raise HTTPException(400, "File too large")
+    return size
+
+_SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+async def _spool_upload(file: UploadFile) -> tuple[str, str]:
+    """
+    Copy an upload to a temp file in bounded chunks, hashing as it goes.
+    Returns (path, content_hash). The caller owns the file from here on.
+    """
+    os.makedirs(settings.upload_spool_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    spool = tempfile.NamedTemporaryFile(dir=settings.upload_spool_dir, suffix=".pdf", delete=False)
+    try:
+        with spool:
+            while True:
+                block = await file.read(_SPOOL_CHUNK_BYTES)
+                if not block:
+                    break
+                digest.update(block)
+                spool.write(block)
+    except Exception:
+        os.remove(spool.name)
+        raise
+    return spool.name, "pdf:" + digest.hexdigest()
+
+
+def _remove_spooled(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to remove spooled upload {path}: {e}")
+
 
 class URLInput(BaseModel):
     url: str
@@ -59,7 +113,87 @@ def get_material_by_id(
         raise HTTPException(404, "Material not found")
     return mat
 
-async def _process_pdf_background(material_id: str, file_content: bytes):
+# ── Admission control ──────────────────────────────────
+
+_RETRY_AFTER_S = 30
+
+
+def _check_ingest_capacity(incoming: int = 1):
+    """503 with Retry-After while the ingestion queue is full, before any work is accepted."""
+    if scheduler.saturated(incoming):
+        raise HTTPException(
+            503,
+            "The server is busy processing other materials. Please try again shortly.",
+            headers={"Retry-After": str(_RETRY_AFTER_S)},
+        )
+
+
+def _url_content_hash(url: str) -> str:
+    return "url:" + hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def _reuse_known_content(material_id: str, content_hash: str) -> bool:
+    """Point the material at already-indexed identical content. Returns True if reused."""
+    loop = asyncio.get_event_loop()
+    owner_id = await loop.run_in_executor(None, find_content_owner, content_hash)
+    if not owner_id:
+        return False
+    await loop.run_in_executor(None, add_content_ref, material_id, content_hash, owner_id)
+    await loop.run_in_executor(None, update_material_progress, material_id, "ready", 100)
+    logger.info(f"Material {material_id} reuses indexed content of material {owner_id}")
+    return True
+
+
+def _pdf_chunk_source(pdf_path: str):
+    def pdf_chunks(progress: IngestProgress):
+        page_count = 0
+
+        def set_page_count(n: int):
+            nonlocal page_count
+            page_count = n
+
+        # The count comes from the reader that extracts the pages, so the PDF is parsed once
+        pages = iter_pdf_pages(pdf_path, on_page_count=set_page_count)
+        pages = track_fraction(pages, lambda: page_count, progress)
+        return iter_chunks(pages, splitter=ingest_splitter())
+    return pdf_chunks
+
+
+def _url_chunk_source(raw: str):
+    def url_chunks(progress: IngestProgress):
+        return iter(chunk_text(raw, splitter=ingest_splitter(chunk_size=600, chunk_overlap=100)))
+    return url_chunks
+
+
+def _start_checkpoint(material_id: str, source_type: str, source: str, content_hash: str,
+                      text_hash: Optional[str] = None):
+    try:
+        save_checkpoint(material_id, {
+            "source_type": source_type,
+            "source": source,
+            "content_hash": content_hash,
+            "text_hash": text_hash,
+            "chunks_persisted": 0,
+            "extraction_done": False,
+        })
+    except Exception as e:
+        logger.warning(f"Could not checkpoint material {material_id}; it won't resume after a restart: {e}")
+
+
+def _clear_checkpoint(material_id: str):
+    try:
+        delete_checkpoint(material_id)
+    except Exception as e:
+        logger.warning(f"Failed to clear checkpoint for material {material_id}: {e}")
+
+
+async def _process_pdf_background(material_id: str, pdf_path: str, content_hash: str) -> bool:
+    """Scheduler job: ingest a spooled PDF. Returns False if the material ended up failed."""
+    keep_spool = False
     try:
         loop = asyncio.get_event_loop()
         # Skip processing if this user already has a material with this title
@@ -67,64 +201,241 @@ async def _process_pdf_background(material_id: str, file_content: bytes):
         if mat and await loop.run_in_executor(None, is_title_taken, mat.get("title", ""), material_id, mat.get("user_id")):
             logger.info(f"Skipping processing for {material_id}: duplicate title")
             await loop.run_in_executor(None, update_material_status, material_id, "failed", "Duplicate title. Please rename to retry.")
-            return
+            return False
 
-        from io import BytesIO
-        raw = await loop.run_in_executor(None, text_from_pdf, BytesIO(file_content))
-        chunks = await loop.run_in_executor(None, chunk_text, raw)
-        chunk_ids = await loop.run_in_executor(None, save_chunks, material_id, chunks)
+        if await _reuse_known_content(material_id, content_hash):
+            return True
 
-        await loop.run_in_executor(None, update_material_status, material_id, "processing")
-        await store_embeddings_async(material_id, chunk_ids, chunks)
-        await loop.run_in_executor(None, update_material_status, material_id, "ready")
+        # The checkpoint was written by _queue_pdf
+        await run_ingestion(material_id, _pdf_chunk_source(pdf_path), user_id=(mat or {}).get("user_id", ""))
+        await loop.run_in_executor(None, add_content_ref, material_id, content_hash, material_id)
         logger.info(f"Background processing complete for material {material_id}")
+        return True
+    except asyncio.CancelledError:
+        # Shutting down: keep the checkpoint and spooled file so the next startup can resume
+        keep_spool = True
+        raise
     except Exception as e:
         logger.error(f"Background processing failed for material {material_id}: {e}", exc_info=True)
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(None, update_material_status, material_id, "failed", str(e))
+        return False
+    finally:
+        if not keep_spool:
+            # Also covers the early returns: the checkpoint was written when the upload was queued
+            await asyncio.get_event_loop().run_in_executor(None, _clear_checkpoint, material_id)
+            _remove_spooled(pdf_path)
+
+
+async def _queue_pdf(user_id: str, material_id: str, pdf_path: str, content_hash: str, size: int):
+    """
+    Checkpoint a spooled upload before queueing it: scheduler queues live in
+    memory, and the checkpoint is how a restart finds the file again.
+    """
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, _start_checkpoint, material_id, "pdf", pdf_path, content_hash)
+    scheduler.submit(user_id, _process_pdf_background, material_id, pdf_path, content_hash, size_bytes=size)
 
-async def _process_url_background(material_id: str, url: str):
+async def _process_url_background(material_id: str, url: str, content_hash: str) -> bool:
+    """Scheduler job: fetch and ingest a URL. Returns False if the material ended up failed."""
     try:
         loop = asyncio.get_event_loop()
         # Skip if this user already has a material with this title
         mat = await loop.run_in_executor(None, get_material, material_id)
         if mat and await loop.run_in_executor(None, is_title_taken, mat.get("title", ""), material_id, mat.get("user_id")):
             logger.info(f"Skipping URL processing for {material_id}: duplicate title, waiting for rename")
-            return
+            return True
+
+        if await _reuse_known_content(material_id, content_hash):
+            return True
 
-        raw = await loop.run_in_executor(None, scrap_website, url)
-        chunks = await loop.run_in_executor(None, lambda: chunk_text(raw, chunk_size=600, chunk_overlap=100))
-        chunk_ids = await loop.run_in_executor(None, save_chunks, material_id, chunks)
+        raw = await fetch_page_text(url)
 
-        await loop.run_in_executor(None, update_material_status, material_id, "processing")
-        await store_embeddings_async(material_id, chunk_ids, chunks)
-        await loop.run_in_executor(None, update_material_status, material_id, "ready")
+        await loop.run_in_executor(None, _start_checkpoint, material_id, "url", url, content_hash, _text_hash(raw))
+        await run_ingestion(material_id, _url_chunk_source(raw), user_id=(mat or {}).get("user_id", ""))
+        await loop.run_in_executor(None, add_content_ref, material_id, content_hash, material_id)
+        await loop.run_in_executor(None, _clear_checkpoint, material_id)
         logger.info(f"Background processing complete for URL material {material_id}")
+        return True
     except Exception as e:
         logger.error(f"Background processing failed for URL material {material_id}: {e}", exc_info=True)
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(None, update_material_status, material_id, "failed", str(e))
+        await loop.run_in_executor(None, _clear_checkpoint, material_id)
+        return False
+
+# ── Resume after restart ───────────────────────────────
+
+_RESUMABLE_STATUSES = ["processing", "partially_ready"]
+# Unreferenced spool files younger than this may belong to an upload still being received
+_SPOOL_ORPHAN_AGE_S = 3600
+
+
+async def _resume_ingestion(material_id: str, user_id: str = "") -> bool:
+    """
+    Finish a material whose ingestion was cut short by a restart.
+
+    With a checkpoint, the first `chunks_persisted` chunks are known to be
+    stored with their embeddings; rows past that (from bulk sub-batches that
+    landed before the crash) are deleted, and if extraction hadn't finished
+    and the source is still available, ingestion continues from there. A URL
+    whose page text changed since the checkpoint starts over from chunk 0.
+    Chunks saved without embeddings are embedded either way. Returns False
+    if the material ended up failed.
+    """
+    loop = asyncio.get_event_loop()
+    checkpoint = None
+    cancelled = False
+    try:
+        checkpoint = await loop.run_in_executor(None, get_checkpoint, material_id)
+
+        chunk_source = None
+        persisted = (checkpoint.get("chunks_persisted") or 0) if checkpoint else None
+        if checkpoint and not checkpoint.get("extraction_done"):
+            source_type, source = checkpoint.get("source_type"), checkpoint.get("source")
+            if source_type == "pdf" and source and os.path.exists(source):
+                chunk_source = _pdf_chunk_source(source)
+            elif source_type == "url" and source:
+                raw = await fetch_page_text(source)
+                if persisted and checkpoint.get("text_hash") != _text_hash(raw):
+                    logger.info(f"Resuming material {material_id}: the page changed, starting over")
+                    persisted = 0
+                chunk_source = _url_chunk_source(raw)
+            else:
+                raise RuntimeError("Processing was interrupted and the upload is gone. Please upload it again.")
+        if persisted is not None:
+            dropped = await loop.run_in_executor(None, delete_chunks_from, material_id, persisted)
+            if dropped:
+                logger.info(f"Resuming material {material_id}: dropped {dropped} chunks past the checkpoint")
+
+        chunks = await loop.run_in_executor(None, get_chunks, material_id)
+        embedded = await loop.run_in_executor(None, get_embedded_chunk_ids, material_id)
+        missing = [c for c in chunks if c["id"] not in embedded]
+        if missing:
+            logger.info(f"Resuming material {material_id}: embedding {len(missing)} chunks")
+            embeddings = await embed_texts_async([c["content"] for c in missing], user_id)
+            await loop.run_in_executor(None, insert_embeddings, material_id, [c["id"] for c in missing], embeddings)
+
+        if chunk_source is not None:
+            logger.info(f"Resuming material {material_id}: extracting after chunk {persisted}")
+            await run_ingestion(material_id, chunk_source, skip_chunks=persisted, user_id=user_id)
+        elif chunks:
+            await loop.run_in_executor(None, update_material_progress, material_id, "ready", 100)
+            await build_search_indexes(material_id, len(chunks))
+        else:
+            raise RuntimeError("Processing was interrupted before any content was saved. Please retry.")
+
+        if checkpoint and checkpoint.get("content_hash"):
+            await loop.run_in_executor(None, add_content_ref, material_id, checkpoint["content_hash"], material_id)
+        logger.info(f"Resumed ingestion complete for material {material_id}")
+        return True
+    except asyncio.CancelledError:
+        # Shutting down again: keep the checkpoint and spooled file for the next startup
+        cancelled = True
+        raise
+    except Exception as e:
+        logger.error(f"Resuming material {material_id} failed: {e}", exc_info=True)
+        await loop.run_in_executor(None, update_material_status, material_id, "failed", str(e))
+        return False
+    finally:
+        if checkpoint and not cancelled:
+            await loop.run_in_executor(None, _clear_checkpoint, material_id)
+            if checkpoint.get("source_type") == "pdf" and checkpoint.get("source"):
+                _remove_spooled(checkpoint["source"])
+
+
+async def _requeue_pending(mat: dict):
+    """Queue a material that was still waiting on the scheduler when the process stopped."""
+    loop = asyncio.get_event_loop()
+    material_id, user_id = mat["id"], mat["user_id"]
+    if mat.get("source_type") == "url" and mat.get("url"):
+        scheduler.submit(user_id, _process_url_background, material_id, mat["url"], _url_content_hash(mat["url"]))
+        return
+    if mat.get("source_type") != "pdf":
+        return
+    checkpoint = await loop.run_in_executor(None, get_checkpoint, material_id)
+    source = (checkpoint or {}).get("source")
+    if source and os.path.exists(source):
+        scheduler.submit(user_id, _process_pdf_background, material_id, source,
+                         checkpoint.get("content_hash", ""), size_bytes=os.path.getsize(source))
+        return
+    await loop.run_in_executor(None, update_material_status, material_id, "failed",
+                               "Processing was interrupted before it started. Please upload the file again.")
+    await loop.run_in_executor(None, _clear_checkpoint, material_id)
+
+
+def _remove_orphaned_spools():
+    """Delete spooled uploads no checkpoint refers to (left behind by a crash)."""
+    try:
+        referenced = {os.path.abspath(p) for p in list_checkpoint_sources()}
+        names = os.listdir(settings.upload_spool_dir)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logger.warning(f"Skipping spool cleanup: {e}")
+        return
+    cutoff = time.time() - _SPOOL_ORPHAN_AGE_S
+    for name in names:
+        path = os.path.abspath(os.path.join(settings.upload_spool_dir, name))
+        try:
+            if path not in referenced and os.path.getmtime(path) < cutoff:
+                _remove_spooled(path)
+                logger.info(f"Removed orphaned spooled upload {path}")
+        except OSError:
+            pass
+
+
+async def resume_interrupted_ingestions():
+    """
+    Re-queue the work a restart cut short. Called once from the app lifespan.
+      - processing / partially_ready materials resume from their checkpoint;
+      - pending materials had not started: URLs are queued again, PDFs too
+        if their spooled upload is still there, otherwise they are marked failed;
+      - spooled uploads no checkpoint refers to are removed.
+    """
+    loop = asyncio.get_event_loop()
+    stuck = await loop.run_in_executor(None, list_materials_by_status, _RESUMABLE_STATUSES)
+    for mat in stuck:
+        scheduler.submit(mat["user_id"], _resume_ingestion, mat["id"], mat["user_id"])
+    if stuck:
+        logger.info(f"Queued {len(stuck)} interrupted ingestions for resume")
+
+    pending = await loop.run_in_executor(None, list_materials_by_status, ["pending"])
+    for mat in pending:
+        try:
+            await _requeue_pending(mat)
+        except Exception as e:
+            logger.error(f"Re-queueing pending material {mat['id']} failed: {e}", exc_info=True)
+    if pending:
+        logger.info(f"Re-queued {len(pending)} pending materials")
+    await loop.run_in_executor(None, _remove_orphaned_spools)
+
 
 @router.post("/upload-pdf")
 async def upload_pdf(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_id: str = Depends(get_current_user_id),
     current_user=Depends(get_current_user),
 ):
-    _validate_pdf_upload(file)
+    size = _validate_pdf_upload(file)
+    _check_ingest_capacity()
 
     try:
         loop = asyncio.get_event_loop()
-        content = await file.read()
-        material = await loop.run_in_executor(None, lambda: create_material(
-            user_id=user_id,
-            source_type="pdf",
-            title=file.filename,
-        ))
+        # Spool to disk so the bytes aren't held in memory until ingestion finishes
+        pdf_path, content_hash = await _spool_upload(file)
+        try:
+            material = await loop.run_in_executor(None, lambda: create_material(
+                user_id=user_id,
+                source_type="pdf",
+                title=file.filename,
+            ))
+        except Exception:
+            _remove_spooled(pdf_path)
+            raise
         material_id = material["id"]
 
-        background_tasks.add_task(_process_pdf_background, material_id, content)
+        await _queue_pdf(user_id, material_id, pdf_path, content_hash, size)
 
         return {
             "status": "processing_started",
@@ -138,12 +449,12 @@ async def upload_pdf(
 @router.post("/scrape-url")
 async def scrape_url(
     input: URLInput,
-    background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user_id),
     current_user=Depends(get_current_user),
 ):
     if not validators.url(input.url):
         raise HTTPException(400, "Invalid URL provided")
+    _check_ingest_capacity()
 
     try:
         loop = asyncio.get_event_loop()
@@ -158,7 +469,7 @@ async def scrape_url(
         # Skip processing if title conflicts — user must rename first
         is_taken = await loop.run_in_executor(None, is_title_taken, input.url, material_id, user_id)
         if not is_taken:
-            background_tasks.add_task(_process_url_background, material_id, input.url)
+            scheduler.submit(user_id, _process_url_background, material_id, input.url, _url_content_hash(input.url))
 
         return {
             "status": "processing_started",
@@ -169,6 +480,122 @@ async def scrape_url(
         logger.error(f"scrape_url failed: {e}", exc_info=True)
         raise HTTPException(500, f"Failed to start scraping: {e}")
 
+# ── Batch ingestion ────────────────────────────────────
+
+MAX_BATCH_ITEMS = 50
+
+
+@router.post("/batch")
+async def create_batch(
+    files: list[UploadFile] = File(default=[]),
+    urls: list[str] = Form(default=[]),
+    user_id: str = Depends(get_current_user_id),
+    current_user=Depends(get_current_user),
+):
+    urls = [u.strip() for u in urls if u.strip()]
+    if not files and not urls:
+        raise HTTPException(400, "Provide at least one file or URL")
+    if len(files) + len(urls) > MAX_BATCH_ITEMS:
+        raise HTTPException(400, f"A batch can hold at most {MAX_BATCH_ITEMS} items")
+    sizes = [_validate_pdf_upload(file) for file in files]
+    for url in urls:
+        if not validators.url(url):
+            raise HTTPException(400, f"Invalid URL provided: {url}")
+    _check_ingest_capacity(len(files) + len(urls))
+
+    spooled: list[tuple[str, str]] = []
+    try:
+        for file in files:
+            spooled.append(await _spool_upload(file))
+
+        loop = asyncio.get_event_loop()
+        requested = (
+            [{"source_type": "pdf", "title": f.filename} for f in files]
+            + [{"source_type": "url", "title": u, "url": u} for u in urls]
+        )
+        # Membership is stored on the material rows, so batch status survives restarts
+        batch_id = str(uuid.uuid4())
+        materials = await loop.run_in_executor(None, create_materials_bulk, user_id, requested, batch_id)
+    except Exception as e:
+        for path, _ in spooled:
+            _remove_spooled(path)
+        logger.error(f"create_batch failed: {e}", exc_info=True)
+        raise HTTPException(500, f"Failed to start batch processing: {e}")
+
+    # Items queue on the ingestion scheduler like single uploads; running ones share
+    # the embedding queue, so their chunk batches are packed into the same forward passes
+    pdf_materials, url_materials = materials[:len(files)], materials[len(files):]
+    for mat, (path, content_hash), size in zip(pdf_materials, spooled, sizes):
+        await _queue_pdf(user_id, mat["id"], path, content_hash, size)
+    for mat in url_materials:
+        scheduler.submit(user_id, _process_url_background, mat["id"], mat["url"], _url_content_hash(mat["url"]))
+
+    return {
+        "status": "processing_started",
+        "batch_id": batch_id,
+        "materials": [{"material_id": m["id"], "title": m["title"]} for m in materials],
+    }
+
+
+@router.get("/batch/{batch_id}")
+def get_batch_status(
+    batch_id: str,
+    user_id: str = Depends(get_current_user_id),
+    current_user=Depends(get_current_user),
+):
+    materials = list_batch_materials(user_id, batch_id)
+    if not materials:
+        raise HTTPException(404, "Batch not found")
+
+    items = [
+        {
+            "material_id": mat["id"],
+            "title": mat.get("title"),
+            "status": mat.get("status"),
+            "indexed_percent": mat.get("indexed_percent"),
+            "error_message": mat.get("error_message"),
+        }
+        for mat in materials
+    ]
+    done = all(i["status"] in ("ready", "failed") for i in items)
+    return {"batch_id": batch_id, "done": done, "items": items}
+
+
+@router.get("/{material_id}/progress")
+def get_material_progress(
+    material_id: str,
+    user_id: str = Depends(get_current_user_id),
+    current_user=Depends(get_current_user),
+):
+    """Lightweight progress poll: live pipeline counters, or the stored status once they're gone."""
+    mat = get_material(material_id)
+    if not mat:
+        raise HTTPException(404, "Material not found")
+    if mat.get("user_id") != user_id:
+        raise HTTPException(403, "Not authorized to view this material")
+    job = job_registry.get(ingest_job_id(material_id))
+
+    if job is not None:
+        return {
+            "material_id": material_id,
+            "status": mat.get("status"),
+            "job_status": job["status"],
+            "indexed_percent": job["progress"].get("percent", 0),
+            "chunks_produced": job["progress"].get("chunks_produced", 0),
+            "chunks_indexed": job["progress"].get("chunks_indexed", 0),
+            "error_message": job["error"] or mat.get("error_message"),
+        }
+    return {
+        "material_id": material_id,
+        "status": mat.get("status"),
+        "job_status": None,
+        "indexed_percent": mat.get("indexed_percent"),
+        "chunks_produced": None,
+        "chunks_indexed": None,
+        "error_message": mat.get("error_message"),
+    }
+
+
 class RenameMaterialRequest(BaseModel):
     title: str
 
@@ -220,7 +647,7 @@ async def rename_material_endpoint(
     if mat.get("source_type") == "url" and mat.get("status") == "pending":
         url = mat.get("url")
         if url and not is_title_taken(new_title, exclude_id=material_id, user_id=user_id):
-            asyncio.ensure_future(_process_url_background(material_id, url))
+            scheduler.submit(user_id, _process_url_background, material_id, url, _url_content_hash(url))
 
     return {"status": "ok"}
 
@@ -271,6 +698,43 @@ def search_materials(
     logger.info(f"[search] RPC returned {len(result.data)} results: {result.data}")
     return {"results": result.data}
     
+class LibrarySearchRequest(BaseModel):
+    q: str
+    k: int = Field(default=10, ge=1, le=50)
+    per_material: int = Field(default=3, ge=1, le=10)
+
+
+_SEARCHABLE_STATUSES = {"ready", "partially_ready"}
+
+
+@router.post("/semantic-search")
+def semantic_search_library(
+    body: LibrarySearchRequest,
+    user_id: str = Depends(get_current_user_id),
+    current_user=Depends(get_current_user),
+):
+    """Search the content of all the user's PDF/URL materials at once; chunks grouped by material."""
+    query = body.q.strip()
+    if not query:
+        raise HTTPException(400, "Query must not be empty")
+
+    materials = [
+        m for m in list_materials(user_id)
+        if m.get("source_type") in ("pdf", "url") and m.get("status") in _SEARCHABLE_STATUSES
+    ]
+    if not materials:
+        return {"results": []}
+
+    owners = resolve_content_owners([m["id"] for m in materials])
+    groups = search_library(
+        user_id, owners, embed_search_query(query), body.k, body.per_material, MATCH_THRESHOLD
+    )
+    titles = {m["id"]: m.get("title") for m in materials}
+    for group in groups:
+        group["title"] = titles.get(group["material_id"])
+    return {"results": groups}
+
+
 @router.delete("/{material_id}")
 def delete_material_endpoint(
     material_id: str,
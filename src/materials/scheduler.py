@@ -0,0 +1,175 @@
+"""
+Ingestion Scheduler — Bounded, fair execution of material ingestion jobs.
+
+Architecture:
+  - A fixed pool of async worker coroutines (settings.ingest_workers) runs
+    ingestion jobs; nothing else in the app starts ingestion directly.
+  - Jobs are queued per priority class (small files first) and, inside a
+    class, per user. Workers serve users round-robin, so one user's burst of
+    uploads can't hold back everyone else's.
+  - Aging: once the oldest job of a class has waited settings.ingest_max_wait_s,
+    that class is served ahead of the smaller ones, so a steady stream of
+    small uploads can't starve large files.
+  - Jobs return False when they failed and handled it themselves (material
+    marked failed); an exception counts as a failure too.
+  - The queue is capped at settings.ingest_queue_max_jobs waiting jobs; upload
+    endpoints check saturated() before accepting work and answer 503.
+  - Queue depth and wait-time stats are exposed via stats() for /api/metrics.
+"""
+
+import asyncio
+import time
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ═══════════════════════ Priorities ════════════════════════
+
+PRIORITY_SMALL = 0
+PRIORITY_MEDIUM = 1
+PRIORITY_LARGE = 2
+_PRIORITY_NAMES = ("small", "medium", "large")
+
+_SMALL_MAX_BYTES = 1 * 1024 * 1024
+_MEDIUM_MAX_BYTES = 5 * 1024 * 1024
+
+
+def priority_for_size(size_bytes: Optional[int]) -> int:
+    """Priority class from the source size; unknown sizes (URLs) count as medium."""
+    if size_bytes is None:
+        return PRIORITY_MEDIUM
+    if size_bytes <= _SMALL_MAX_BYTES:
+        return PRIORITY_SMALL
+    if size_bytes <= _MEDIUM_MAX_BYTES:
+        return PRIORITY_MEDIUM
+    return PRIORITY_LARGE
+
+
+# ═══════════════════════ Scheduler ════════════════════════
+
+_WAIT_SAMPLES = 500
+
+
+@dataclass
+class IngestTask:
+    user_id: str
+    priority: int
+    run: Callable[..., Awaitable[Optional[bool]]]
+    args: tuple
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class IngestionScheduler:
+    def __init__(self, workers: int, max_queued: int):
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        # One user → deque-of-tasks map per priority class; dict order is the round-robin order
+        self._queues: list[OrderedDict[str, deque[IngestTask]]] = [
+            OrderedDict() for _ in _PRIORITY_NAMES
+        ]
+        self._available = asyncio.Semaphore(0)
+        self._started = False
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._aged = 0
+        self._waits: deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+    def submit(self, user_id: str, run: Callable[..., Awaitable[Optional[bool]]], *args,
+               size_bytes: Optional[int] = None):
+        """Queue `await run(*args)` for `user_id`. Returns immediately. `run` returns False on failure."""
+        task = IngestTask(user_id=user_id, priority=priority_for_size(size_bytes), run=run, args=args)
+        self._queues[task.priority].setdefault(user_id, deque()).append(task)
+        self._available.release()
+
+    def _pick_queue(self) -> OrderedDict:
+        """Highest-priority non-empty class, unless a lower one has a job past the maximum wait."""
+        queues = [queue for queue in self._queues if queue]
+        if not queues:
+            raise RuntimeError("Ingestion scheduler woke up with an empty queue")
+        # Each user's deque is FIFO, so a class's oldest job is one of its heads
+        oldest = {id(queue): min(tasks[0].enqueued_at for tasks in queue.values()) for queue in queues}
+        overdue = min(queues, key=lambda queue: oldest[id(queue)])
+        if overdue is not queues[0] and time.monotonic() - oldest[id(overdue)] >= settings.ingest_max_wait_s:
+            self._aged += 1
+            return overdue
+        return queues[0]
+
+    def _next_task(self) -> IngestTask:
+        queue = self._pick_queue()
+        user_id, tasks = next(iter(queue.items()))
+        task = tasks.popleft()
+        if tasks:
+            queue.move_to_end(user_id)
+        else:
+            del queue[user_id]
+        return task
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            task = self._next_task()
+            self._waits.append(time.monotonic() - task.enqueued_at)
+            self._running += 1
+            try:
+                if await task.run(*task.args) is False:
+                    self._failed += 1
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Ingestion job for user {task.user_id} failed: {e}", exc_info=True)
+            finally:
+                self._running -= 1
+                self._completed += 1
+
+    def start(self):
+        """Launch the worker pool. Call once during app startup."""
+        if self._started:
+            return
+        self._started = True
+        for i in range(self.workers):
+            asyncio.create_task(self._worker(), name=f"ingest_worker_{i}")
+        logger.info(f"Ingestion scheduler started ({self.workers} workers)")
+
+    def depth(self) -> int:
+        return sum(len(tasks) for queue in self._queues for tasks in queue.values())
+
+    def saturated(self, incoming: int = 1) -> bool:
+        """True if queueing `incoming` more jobs would exceed the cap."""
+        return self.depth() + incoming > self.max_queued
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+
+        per_user: dict[str, int] = {}
+        for queue in self._queues:
+            for user_id, tasks in queue.items():
+                per_user[user_id] = per_user.get(user_id, 0) + len(tasks)
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self.depth(),
+            "max_queued": self.max_queued,
+            "queued_by_priority": {
+                name: sum(len(t) for t in queue.values())
+                for name, queue in zip(_PRIORITY_NAMES, self._queues)
+            },
+            # Aggregates only: every signed-in user can read /api/metrics
+            "users_queued": len(per_user),
+            "max_queued_per_user": max(per_user.values(), default=0),
+            "completed": self._completed,
+            "failed": self._failed,
+            "aged": self._aged,
+            "wait_s": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+
+scheduler = IngestionScheduler(settings.ingest_workers, settings.ingest_queue_max_jobs)
@@ -1,24 +1,246 @@
+import io
+import os
+import tempfile
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Optional
+
 import PyPDF2
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import UnstructuredURLLoader
+
+from src.config import settings
+from src.thread_budget import get_layout
+
+logger = logging.getLogger(__name__)
+
+
+# ── PDF Extraction ─────────────────────────────────────
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: the parent holds torch/OpenMP threads that must not be forked
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=get_layout().pdf_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_pool
+
+
+def _open_pdf(source) -> PyPDF2.PdfReader:
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return PyPDF2.PdfReader(source)
+
+
+# Per pool worker: readers of the documents it recently worked on, keyed by
+# (path, mtime, size), so each range of a document doesn't re-parse the file
+_WORKER_READERS_MAX = 4
+_worker_readers: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+
+def _worker_reader(path: str) -> PyPDF2.PdfReader:
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    entry = _worker_readers.get(key)
+    if entry is None:
+        f = open(path, "rb")
+        entry = _worker_readers[key] = (f, PyPDF2.PdfReader(f))
+        while len(_worker_readers) > _WORKER_READERS_MAX:
+            _, (old, _) = _worker_readers.popitem(last=False)
+            old.close()
+    _worker_readers.move_to_end(key)
+    return entry[1]
+
+
+def _extract_page_range(path: str, start: int, end: int) -> list[str]:
+    """Runs in a pool worker: extract pages [start, end) of the PDF at `path`."""
+    reader = _worker_reader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages(pdf_file, parallel: Optional[bool] = None,
+                   on_page_count: Optional[Callable[[int], None]] = None) -> Iterator[str]:
+    """
+    Yield the text of each page, in page order.
+
+    `pdf_file` may be bytes, a file object or a path. Paths are read through a
+    file handle rather than loaded into memory, and pool workers open the
+    path once each and keep the parsed reader for the following ranges, so
+    large spooled uploads never sit in RAM as a whole.
+
+    Documents with at least `settings.pdf_parallel_min_pages` pages are split
+    into page ranges extracted on a process pool; each range is yielded as soon
+    as it and every range before it are done, so callers can start chunking
+    before the last page is parsed. `parallel` forces the mode either way.
+    `on_page_count` is called with the page count once the document is open,
+    before the first page is yielded.
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            yield from _iter_pdf_pages(f, os.fspath(pdf_file), parallel, on_page_count)
+    else:
+        yield from _iter_pdf_pages(pdf_file, None, parallel, on_page_count)
+
+
+def _iter_pdf_pages(stream, path: Optional[str], parallel: Optional[bool],
+                    on_page_count: Optional[Callable[[int], None]]) -> Iterator[str]:
+    reader = _open_pdf(stream)
+    page_count = len(reader.pages)
+    if on_page_count is not None:
+        on_page_count(page_count)
+    if parallel is None:
+        parallel = get_layout().pdf_processes > 1 and page_count >= settings.pdf_parallel_min_pages
+
+    if not parallel:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    # Workers open the document by path; in-memory sources are spooled to a
+    # temporary file once instead of pickling the bytes into every task
+    spooled = None
+    if path is None:
+        if hasattr(stream, "seek"):
+            stream.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(stream if isinstance(stream, (bytes, bytearray)) else stream.read())
+        path = spooled = f.name
+
+    step = max(1, settings.pdf_pages_per_task)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    # Keep a bounded window of ranges in flight so finished pages don't pile up unread
+    window = max(1, get_layout().pdf_processes * 2)
+    pool = _get_pdf_pool()
+    pending = []
+    next_range = 0
+    logger.info(f"Extracting {page_count} PDF pages on {get_layout().pdf_processes} processes")
+    try:
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < window:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(_extract_page_range, path, start, end))
+                next_range += 1
+            yield from pending.pop(0).result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if spooled is not None:
+            try:
+                os.remove(spooled)
+            except OSError:
+                pass
 
 
 def text_from_pdf(pdf_file) -> str:
-    reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
+    return "".join(iter_pdf_pages(pdf_file))
+
 
+# ── Chunking ───────────────────────────────────────────
 
-def chunk_text(text: str, chunk_size: int = 800, chunk_overlap: int = 150):
-    splitter = RecursiveCharacterTextSplitter(
+# How much text to buffer before splitting a stream
+_STREAM_BUFFER_CHARS = 8 * 800
+
+
+def char_splitter(chunk_size: int = 800, chunk_overlap: int = 150) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
+
+
+@lru_cache
+def token_splitter(chunk_overlap: Optional[int] = None) -> RecursiveCharacterTextSplitter:
+    """
+    Splitter that measures chunks with the embedding model's own tokenizer and
+    packs them up to the model's max sequence length, so nothing stored is
+    silently truncated at embedding time. Overlap is counted in tokens.
+    """
+    from src.rag.rag import get_embedding_tokenizer, get_max_seq_length
+
+    tokenizer = get_embedding_tokenizer()
+    # Leave room for the special tokens ([CLS]/[SEP]) the model adds
+    limit = get_max_seq_length() - tokenizer.num_special_tokens_to_add()
+    overlap = settings.chunk_overlap_tokens if chunk_overlap is None else chunk_overlap
+    return RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+        tokenizer, chunk_size=limit, chunk_overlap=min(overlap, limit // 2)
+    )
+
+
+def ingest_splitter(chunk_size: int = 800, chunk_overlap: int = 150) -> RecursiveCharacterTextSplitter:
+    """
+    Splitter used for ingestion. Token-aware unless `settings.chunker` is
+    "chars" (or the tokenizer can't be loaded), in which case the character
+    sizes given here apply.
+    """
+    if settings.chunker == "tokens":
+        try:
+            return token_splitter()
+        except Exception as e:
+            logger.warning(f"Token splitter unavailable, using character splitter: {e}")
+    return char_splitter(chunk_size, chunk_overlap)
+
+
+def chunk_text(text: str, chunk_size: int = 800, chunk_overlap: int = 150, splitter=None):
+    splitter = splitter or char_splitter(chunk_size, chunk_overlap)
     return splitter.split_text(text)
 
 
+def iter_chunks(pieces: Iterable[str], chunk_size: int = 800, chunk_overlap: int = 150,
+                splitter=None) -> Iterator[str]:
+    """
+    Streaming variant of chunk_text: consume text pieces (e.g. PDF pages) and
+    yield chunks as soon as they are complete. The last, possibly partial,
+    chunk of each split is carried over and re-split with the following text.
+    """
+    splitter = splitter or char_splitter(chunk_size, chunk_overlap)
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) < _STREAM_BUFFER_CHARS:
+            continue
+        chunks = splitter.split_text(buffer)
+        if len(chunks) < 2:
+            continue
+        yield from chunks[:-1]
+        buffer = chunks[-1]
+    if buffer.strip():
+        yield from splitter.split_text(buffer)
+
+
+# ── Web ────────────────────────────────────────────────
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for content dedup: lowercase scheme and host, no
+    default port, fragment, tracking parameters or trailing slash, sorted query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
 def scrap_website(url: str) -> str:
+    # Heavy import; only needed when the fast path in src.materials.web falls back
+    from langchain_community.document_loaders import UnstructuredURLLoader
+
     loader = UnstructuredURLLoader(urls=[url], ssl_verify=True)
     data = loader.load()
     return data[0].page_content
@@ -0,0 +1,170 @@
+"""
+Web page fetching — fast async path for URL materials.
+
+Architecture:
+  - One pooled httpx.AsyncClient per process (keep-alive, connect/read
+    timeouts, capped connection count).
+  - Responses are streamed and fed chunk by chunk into a stdlib HTMLParser
+    that keeps visible main-content text and drops scripts, navigation,
+    headers, footers, etc. Bodies over the size cap are cut off.
+  - If the fast path fails or extracts too little text (JS-rendered pages,
+    PDFs behind a URL, ...), the UnstructuredURLLoader path is used instead.
+"""
+
+import asyncio
+import codecs
+import logging
+from html.parser import HTMLParser
+from typing import Optional
+
+import httpx
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+_USER_AGENT = "Mozilla/5.0 (compatible; StudyBuddyBot/1.0)"
+
+# Content of these elements is never part of the main text
+_SKIP_TAGS = {
+    "head", "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+}
+# Elements that usually wrap the page's main content
+_MAIN_TAGS = {"main", "article"}
+# Elements that end a line of text
+_BLOCK_TAGS = {
+    "p", "div", "section", "li", "ul", "ol", "br", "tr", "table", "blockquote",
+    "pre", "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "figcaption",
+}
+
+
+class MainTextExtractor(HTMLParser):
+    """
+    Incremental HTML → text extractor. Feed it markup as it arrives and call
+    text() at the end. Prefers text inside <main>/<article> when that holds a
+    reasonable amount of content, otherwise returns all visible text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._all: list[str] = []
+        self._main: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            # </head> is optional in HTML; never let an unclosed head swallow the body
+            self._skip_depth = 0
+        elif tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _MAIN_TAGS:
+            self._main_depth += 1
+        if tag in _BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        if tag in _BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        # A text node may arrive in several pieces, so whitespace is only collapsed in text()
+        if self._skip_depth:
+            return
+        data = data.replace("\n", " ")
+        self._all.append(data)
+        if self._main_depth:
+            self._main.append(data)
+
+    def _newline(self):
+        for parts in (self._all, self._main):
+            if parts and parts[-1] != "\n":
+                parts.append("\n")
+
+    @staticmethod
+    def _join(parts: list[str]) -> str:
+        lines = ("".join(parts)).split("\n")
+        return "\n".join(" ".join(line.split()) for line in lines if line.strip())
+
+    def text(self) -> str:
+        main = self._join(self._main)
+        if len(main) >= settings.scrape_min_chars:
+            return main
+        return self._join(self._all)
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.scrape_timeout_s, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.scrape_max_connections,
+                max_keepalive_connections=settings.scrape_max_connections,
+            ),
+            follow_redirects=True,
+            headers={"User-Agent": _USER_AGENT},
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch_main_text(url: str, client: Optional[httpx.AsyncClient] = None) -> str:
+    """
+    Fetch an HTML page and extract its main text while the body streams in.
+    Reads at most `settings.scrape_max_bytes`. Raises ValueError for non-HTML
+    responses and httpx errors for network / HTTP failures.
+    """
+    client = client or get_http_client()
+    extractor = MainTextExtractor()
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in _HTML_TYPES:
+            raise ValueError(f"Not an HTML page ({content_type})")
+
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        received = 0
+        async for block in response.aiter_bytes():
+            received += len(block)
+            if received > settings.scrape_max_bytes:
+                logger.info(f"Truncating {url} at {settings.scrape_max_bytes} bytes")
+                block = block[: len(block) - (received - settings.scrape_max_bytes)]
+                extractor.feed(decoder.decode(block))
+                break
+            extractor.feed(decoder.decode(block))
+        extractor.feed(decoder.decode(b"", final=True))
+    extractor.close()
+    return extractor.text()
+
+
+async def fetch_page_text(url: str, client: Optional[httpx.AsyncClient] = None) -> str:
+    """Fast path first; the unstructured loader when it fails or finds too little text."""
+    try:
+        text = await fetch_main_text(url, client)
+        if len(text) >= settings.scrape_min_chars:
+            return text
+        logger.info(f"Fast extractor found only {len(text)} chars on {url}; falling back")
+    except Exception as e:
+        logger.info(f"Fast fetch failed for {url} ({e}); falling back")
+
+    from src.materials.text_utils import scrap_website
+    from src.thread_budget import get_executor
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(get_executor("parse"), scrap_website, url)
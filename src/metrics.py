@@ -0,0 +1,31 @@
+"""
+Metrics — Small in-process counters shared by the stats behind GET /api/metrics.
+"""
+
+
+class Histogram:
+    """Fixed-bucket counts; each bucket counts samples <= its upper bound."""
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def stats(self) -> dict:
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 4) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
@@ -0,0 +1,143 @@
+"""
+ANN Index — IVF (inverted file) index for very large materials.
+
+Architecture:
+  - Materials with at least settings.ann_min_chunks embeddings get an IVF
+    index: spherical k-means splits the vectors into ~4·√N clusters, and
+    each vector is listed under its nearest centroid.
+  - A search scores the centroids, then only the vectors in the
+    settings.ann_nprobe best clusters (exact dot products on those rows).
+  - The index is built when ingestion finishes and saved as
+    <settings.ann_index_dir>/<owner_id>.npz together with the chunk ids it
+    covers. A missing or stale file (ids differ) is rebuilt on next load,
+    but only once the material is ready: a material still being ingested
+    changes with every batch, so it is searched exactly until then.
+  - Pure NumPy; the vectors themselves stay in the MaterialIndex matrix.
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+_KMEANS_ITERATIONS = 10
+_TRAIN_POINTS_PER_LIST = 64
+
+
+@dataclass
+class IVFIndex:
+    centroids: np.ndarray     # [L, D] float32, L2-normalized
+    order: np.ndarray         # row ids grouped by list
+    offsets: np.ndarray       # list i holds order[offsets[i]:offsets[i + 1]]
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int, nprobe: int) -> tuple[np.ndarray, np.ndarray]:
+        """Row ids and scores of the (approximate) top-k, best first."""
+        rows = self.candidates(query, nprobe)
+        if not len(rows):
+            return rows, np.empty(0, dtype=np.float32)
+        scores = matrix[rows] @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+
+def n_lists(n: int) -> int:
+    return max(1, int(4 * np.sqrt(n)))
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray, block: int = 4096) -> np.ndarray:
+    """Nearest centroid per row, in blocks to bound the [rows, lists] score matrix."""
+    return np.concatenate([
+        np.argmax(matrix[i:i + block] @ centroids.T, axis=1)
+        for i in range(0, len(matrix), block)
+    ])
+
+
+def build_ivf(matrix: np.ndarray, seed: int = 0) -> IVFIndex:
+    """Spherical k-means on a sample, then list every row under its nearest centroid."""
+    rng = np.random.default_rng(seed)
+    lists = n_lists(len(matrix))
+    sample_size = min(len(matrix), lists * _TRAIN_POINTS_PER_LIST)
+    sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+
+    for _ in range(_KMEANS_ITERATIONS):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty clusters with random sample points
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = sums / np.clip(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12, None)
+
+    labels = _assign(matrix, centroids)
+    order = np.argsort(labels, kind="stable")
+    offsets = np.searchsorted(labels[order], np.arange(lists + 1))
+    return IVFIndex(centroids=centroids.astype(np.float32), order=order, offsets=offsets)
+
+
+# ═══════════════════════ Persistence ════════════════════════
+
+def ann_index_path(owner_id: str) -> str:
+    return os.path.join(settings.ann_index_dir, f"{owner_id}.npz")
+
+
+def save_ivf(owner_id: str, index: IVFIndex, chunk_ids: list[str]):
+    os.makedirs(settings.ann_index_dir, exist_ok=True)
+    path = ann_index_path(owner_id)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, centroids=index.centroids, order=index.order, offsets=index.offsets,
+             chunk_ids=np.array(chunk_ids))
+    os.replace(tmp, path)
+
+
+def load_ivf(owner_id: str, chunk_ids: list[str]) -> Optional[IVFIndex]:
+    """The saved index, or None if there is none or it covers different chunks."""
+    path = ann_index_path(owner_id)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if data["chunk_ids"].tolist() != chunk_ids:
+            return None
+        return IVFIndex(centroids=data["centroids"], order=data["order"], offsets=data["offsets"])
+
+
+def remove_ann_index(owner_id: str):
+    try:
+        os.remove(ann_index_path(owner_id))
+    except FileNotFoundError:
+        pass
+
+
+def ann_index_for(owner_id: str, matrix: np.ndarray, chunk_ids: list[str],
+                  may_build: Callable[[], bool] = lambda: True) -> Optional[IVFIndex]:
+    """
+    IVF index for a loaded material: None below the size threshold, else the
+    saved one if current, else a fresh build if `may_build()`, else None.
+    """
+    if settings.ann_min_chunks <= 0 or len(chunk_ids) < settings.ann_min_chunks:
+        return None
+    index = load_ivf(owner_id, chunk_ids)
+    if index is None:
+        if not may_build():
+            return None
+        logger.info(f"Building IVF index for {owner_id} ({len(chunk_ids)} vectors)")
+        index = build_ivf(matrix)
+        try:
+            save_ivf(owner_id, index, chunk_ids)
+        except OSError as e:
+            logger.warning(f"Could not save IVF index for {owner_id} (non-fatal): {e}")
+    return index
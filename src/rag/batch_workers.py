@@ -2,10 +2,21 @@
 Embedding Batch Workers — Async batching infrastructure for embedding inference.
 
 Architecture:
-  - Single asyncio.Queue for all embedding jobs.
+  - One bounded FairEmbeddingQueue for all document embedding jobs: per-user
+    FIFOs served round-robin, capped at settings.embedding_queue_max_texts
+    pending texts; producers wait for room. (Uploads are turned away earlier,
+    at the ingestion scheduler's queue cap.)
+  - A separate query lane (query_queue) for chat-time embed_query calls:
+    queries are micro-batched and run ahead of document work on the same
+    inference thread — document workers pause between length buckets while
+    queries wait, so a query waits for at most the bucket in flight and two
+    forward passes never compete for the inference cores.
   - Dedicated async worker coroutines drain the queue in micro-batches.
-  - Workers offload heavy inference to a thread via run_in_executor.
-  - A shared in-memory job_store dict tracks job status + results.
+  - Workers offload heavy inference to a thread via run_in_executor, or to the
+    optional embedding process pool (embedding_pool.py) when
+    settings.embedding_workers > 1.
+  - A shared JobRegistry tracks job status, results and progress counters,
+    hands each result out once and evicts stale jobs after a TTL.
   - Warmup loop periodically does a dummy forward pass to keep OpenMP threads alive.
 """
 
@@ -13,31 +24,106 @@ import asyncio
 import time
 import uuid
 import logging
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import settings
+from src.metrics import Histogram
 
 logger = logging.getLogger(__name__)
 
 
-# ═══════════════════════ Job Store ════════════════════════
+# ═══════════════════════ Job Registry ════════════════════════
 
-job_store: dict[str, dict[str, Any]] = {}
-"""
-{
-    "<job_id>": {
-        "status": "pending" | "processing" | "done" | "error",
-        "result": <list[list[float]] for EmbeddingJob> | None,
-        "error": <str> | None,
+_JOB_TTL_S = 600            # finished jobs are forgotten this long after their last update
+_SWEEP_INTERVAL_S = 60
+
+
+class JobRegistry:
+    """
+    Tracks job status, results and progress counters, with TTL eviction.
+
+    {
+        "<job_id>": {
+            "status": "pending" | "processing" | "done" | "error",
+            "result": <float32 array [N, D] for EmbeddingJob> | None,
+            "error": <str> | None,
+            "progress": {<counter>: <int>, ...},
+            "updated_at": <monotonic seconds>,
+        }
     }
-}
-"""
 
+    Results are handed out once: pop_result() removes the payload, so a
+    finished upload doesn't keep its embeddings in memory. Jobs nobody reads
+    (and finished progress entries) are swept once their TTL passes.
+    """
 
-def create_job() -> str:
-    """Create a new pending job and return its ID."""
-    job_id = str(uuid.uuid4())
-    job_store[job_id] = {"status": "pending", "result": None, "error": None}
-    return job_id
+    def __init__(self, ttl_s: float = _JOB_TTL_S):
+        self.ttl_s = ttl_s
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def create(self, job_id: Optional[str] = None, **progress: int) -> str:
+        """Register a pending job (optionally with initial progress counters) and return its ID."""
+        self._maybe_sweep()
+        job_id = job_id or str(uuid.uuid4())
+        self._jobs[job_id] = {
+            "status": "pending", "result": None, "error": None,
+            "progress": dict(progress), "updated_at": time.monotonic(),
+        }
+        return job_id
+
+    def _entry(self, job_id: str) -> dict[str, Any]:
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            # Swept or never registered; recreate rather than losing the update
+            self.create(job_id)
+            entry = self._jobs[job_id]
+        entry["updated_at"] = time.monotonic()
+        return entry
+
+    def set_status(self, job_id: str, status: str):
+        self._entry(job_id)["status"] = status
+
+    def set_done(self, job_id: str, result: Any = None):
+        self._entry(job_id).update({"status": "done", "result": result})
+
+    def set_error(self, job_id: str, error: str):
+        self._entry(job_id).update({"status": "error", "error": error})
+
+    def update_progress(self, job_id: str, **counters: int):
+        self._entry(job_id)["progress"].update(counters)
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        """Status, error and progress of a job — never the result payload."""
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        return {k: v for k, v in entry.items() if k not in ("result", "updated_at")}
+
+    def pop_result(self, job_id: str) -> dict[str, Any]:
+        """Remove a finished job and return its entry (status, result, error)."""
+        return self._jobs.pop(job_id, None) or {"status": "error", "result": None, "error": "Job expired"}
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < _SWEEP_INTERVAL_S:
+            return
+        self._last_sweep = now
+        expired = [jid for jid, e in self._jobs.items() if now - e["updated_at"] > self.ttl_s]
+        for jid in expired:
+            del self._jobs[jid]
+        self.evicted += len(expired)
+
+    def stats(self) -> dict:
+        return {"jobs": len(self._jobs), "evicted": self.evicted, "ttl_s": self.ttl_s}
+
+
+job_registry = JobRegistry()
 
 
 # ═══════════════════════ Request-in-Flight Gate ════════════════════════
@@ -65,32 +151,313 @@ class EmbeddingJob:
     """Batch embedding of multiple texts (for store_embeddings)."""
     job_id: str
     texts: list[str]
+    user_id: str = ""
     done: asyncio.Event = field(default_factory=asyncio.Event)
+    enqueued_at: float = field(default_factory=time.monotonic)
 
 
-# ═══════════════════════ Queue ════════════════════════
+@dataclass
+class QueryJob:
+    """One chat query to embed on the priority lane."""
+    text: str
+    future: asyncio.Future
+
+
+# ═══════════════════════ Queues ════════════════════════
+
+_EWMA_ALPHA = 0.2
 
-embedding_queue: asyncio.Queue[EmbeddingJob] = asyncio.Queue()
+
+def _ewma(current: float, sample: float) -> float:
+    return (1 - _EWMA_ALPHA) * current + _EWMA_ALPHA * sample
+
+
+class FairEmbeddingQueue:
+    """
+    Bounded multi-user queue of EmbeddingJobs. Each user has a FIFO; get()
+    takes one job per user in turn, so a user with five large PDFs in flight
+    can't push everyone else's small uploads back. The bound counts pending
+    texts, not jobs: put() waits for room, put_nowait() raises QueueFull.
+    A job larger than the whole bound is still admitted into an empty queue.
+    """
+
+    def __init__(self, max_texts: int):
+        self.max_texts = max(1, max_texts)
+        self._users: OrderedDict[str, deque[EmbeddingJob]] = OrderedDict()
+        self._pending_texts = 0
+        self._nonempty = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._last_put: Optional[float] = None
+        self.arrival_gap_s: Optional[float] = None   # EWMA of time between jobs
+
+    def _fits(self, n: int) -> bool:
+        return self._pending_texts == 0 or self._pending_texts + n <= self.max_texts
+
+    def put_nowait(self, job: EmbeddingJob):
+        if not self._fits(len(job.texts)):
+            raise asyncio.QueueFull()
+        self._users.setdefault(job.user_id, deque()).append(job)
+        self._pending_texts += len(job.texts)
+        now = time.monotonic()
+        if self._last_put is not None:
+            gap = now - self._last_put
+            self.arrival_gap_s = gap if self.arrival_gap_s is None else _ewma(self.arrival_gap_s, gap)
+        self._last_put = now
+        self._nonempty.set()
+
+    async def put(self, job: EmbeddingJob):
+        while not self._fits(len(job.texts)):
+            self._space.clear()
+            await self._space.wait()
+        self.put_nowait(job)
+
+    def get_nowait(self) -> EmbeddingJob:
+        """Next job (round-robin across users); raises QueueEmpty instead of waiting."""
+        if not self._users:
+            raise asyncio.QueueEmpty()
+        user_id, jobs = next(iter(self._users.items()))
+        job = jobs.popleft()
+        if jobs:
+            self._users.move_to_end(user_id)
+        else:
+            del self._users[user_id]
+        self._pending_texts -= len(job.texts)
+        self._space.set()
+        return job
+
+    async def get(self) -> EmbeddingJob:
+        # Every waiter re-checks after a wakeup, so a job another worker took first
+        # just sends this one back to waiting; cancelling a waiting get() loses nothing
+        while not self._users:
+            self._nonempty.clear()
+            await self._nonempty.wait()
+        return self.get_nowait()
+
+    def pending_texts(self) -> int:
+        return self._pending_texts
+
+    def qsize(self) -> int:
+        return sum(len(jobs) for jobs in self._users.values())
+
+    def stats(self) -> dict:
+        return {
+            "pending_texts": self._pending_texts,
+            "max_texts": self.max_texts,
+            "pending_jobs": self.qsize(),
+            # Aggregates only: every signed-in user can read /api/metrics
+            "users_pending": len(self._users),
+            "max_pending_texts_per_user": max(
+                (sum(len(job.texts) for job in jobs) for jobs in self._users.values()), default=0
+            ),
+        }
+
+
+embedding_queue = FairEmbeddingQueue(settings.embedding_queue_max_texts)
+query_queue: asyncio.Queue[QueryJob] = asyncio.Queue()
+
+
+# ═══════════════════════ Length Buckets ════════════════════════
+
+_CHARS_PER_TOKEN = 4
+
+
+def token_lengths(texts: list[str]) -> list[int]:
+    """Token count of each text as the embedder sees it (capped at its max length)."""
+    from src.rag.rag import get_embedding_tokenizer, get_max_seq_length
+    try:
+        tokenizer = get_embedding_tokenizer()
+        max_len = get_max_seq_length()
+        encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_len)
+        return [len(ids) for ids in encoded["input_ids"]]
+    except Exception:
+        # No tokenizer available: rough estimate is enough for grouping
+        return [max(1, len(t) // _CHARS_PER_TOKEN) for t in texts]
+
+
+def length_buckets(lengths: list[int], token_budget: int) -> list[list[int]]:
+    """
+    Group text indices into buckets of similar length. Every bucket's padded
+    size (longest text × number of texts) stays within `token_budget`, so a
+    short query never pads up to a 2,000-character chunk.
+    """
+    buckets: list[list[int]] = []
+    current: list[int] = []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so lengths[i] is the longest text in the bucket so far
+        if current and lengths[i] * (len(current) + 1) > token_budget:
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+# ═══════════════════════ Query Lane ════════════════════════
+
+_QUERY_BATCH_MAX_SIZE = 32
+_QUERY_BATCH_WINDOW_S = 0.005
+_QUERY_TIMEOUT_S = 30
+
+# Set while no query is queued or being embedded; document workers wait on it between buckets
+_query_lane_idle = asyncio.Event()
+_query_lane_idle.set()
+_queries_pending = 0
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _query_lane_changed(delta: int):
+    global _queries_pending
+    _queries_pending += delta
+    if _queries_pending > 0:
+        _query_lane_idle.clear()
+    else:
+        _query_lane_idle.set()
+
+
+async def embed_query_async(text: str) -> np.ndarray:
+    """Embed one query on the priority lane. Must run on the worker event loop."""
+    job = QueryJob(text=text, future=asyncio.get_event_loop().create_future())
+    _query_lane_changed(+1)
+    await query_queue.put(job)
+    return await job.future
+
+
+def embed_query(text: str) -> np.ndarray:
+    """
+    Embed a chat query from sync code (executor threads). Goes through the
+    query lane when the workers are running; otherwise embeds directly.
+    """
+    try:
+        asyncio.get_running_loop()
+        on_loop = True
+    except RuntimeError:
+        on_loop = False
+    if _main_loop is None or not _main_loop.is_running() or on_loop:
+        from src.rag.rag import get_embedder
+        return get_embedder().embed_query(text)
+    future = asyncio.run_coroutine_threadsafe(embed_query_async(text), _main_loop)
+    return future.result(timeout=_QUERY_TIMEOUT_S)
+
+
+async def query_worker():
+    """Micro-batches queued queries into one forward pass each, ahead of document work."""
+    from src.rag.rag import get_embedder
+    from src.thread_budget import get_executor
+
+    loop = asyncio.get_event_loop()
+
+    while True:
+        batch: list[QueryJob] = [await query_queue.get()]
+        deadline = loop.time() + _QUERY_BATCH_WINDOW_S
+        while len(batch) < _QUERY_BATCH_MAX_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(query_queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            set_request_in_flight(True)
+            # The inference thread: document workers hold back new buckets while the lane is busy
+            embeddings = await loop.run_in_executor(
+                get_executor("inference"), get_embedder().embed_documents, [job.text for job in batch]
+            )
+            for job, emb in zip(batch, embeddings):
+                if not job.future.done():
+                    job.future.set_result(emb)
+        except Exception as e:
+            logger.error(f"Query embedding batch failed: {e}", exc_info=True)
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+        finally:
+            set_request_in_flight(False)
+            _query_lane_changed(-len(batch))
 
 
 # ═══════════════════════ Workers ════════════════════════
 
-_BATCH_MAX_SIZE = 8
-_BATCH_WINDOW_S = 0.05
+class AdaptiveBatcher:
+    """
+    Decides how long a worker keeps collecting jobs after the first one.
+
+    Waiting only pays off when another job is likely to arrive soon and the
+    batch isn't full yet, so the window is:
+      - 0 when the queue already holds a full batch of texts, or when jobs
+        arrive further apart than the maximum window (a lone job goes now);
+      - otherwise about one expected inter-arrival gap, capped at a quarter
+        of a recent forward pass (so waiting never costs more than batching
+        saves) and at settings.embed_batch_max_window_ms.
+    """
+
+    def __init__(self, max_texts: int, max_window_s: float):
+        self.max_texts = max(1, max_texts)
+        self.max_window_s = max_window_s
+        self.infer_s: Optional[float] = None   # EWMA of one batch's inference time
+        self.batch_texts = Histogram((1, 8, 32, 64, 128, 256, 512, 1024))
+        self.wait_s = Histogram((0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30))
+        self.window_s = Histogram((0, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1))
+        self.infer_hist = Histogram((0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+
+    def window(self, queue: "FairEmbeddingQueue", collected_texts: int) -> float:
+        if collected_texts + queue.pending_texts() >= self.max_texts:
+            window = 0.0
+        elif queue.arrival_gap_s is None or queue.arrival_gap_s > self.max_window_s:
+            window = 0.0
+        else:
+            window = queue.arrival_gap_s
+            if self.infer_s is not None:
+                window = min(window, self.infer_s / 4)
+            window = min(window, self.max_window_s)
+        self.window_s.observe(window)
+        return window
+
+    def observe_batch(self, batch: list["EmbeddingJob"], started_at: float, infer_s: Optional[float]):
+        """Record a finished batch; `infer_s` is None when the cache served every text."""
+        self.batch_texts.observe(sum(len(job.texts) for job in batch))
+        for job in batch:
+            self.wait_s.observe(started_at - job.enqueued_at)
+        if infer_s is not None:
+            self.infer_s = infer_s if self.infer_s is None else _ewma(self.infer_s, infer_s)
+            self.infer_hist.observe(infer_s)
+
+    def stats(self) -> dict:
+        return {
+            "max_texts": self.max_texts,
+            "max_window_ms": round(self.max_window_s * 1000, 1),
+            "inference_ewma_s": round(self.infer_s, 4) if self.infer_s is not None else None,
+            "batch_texts": self.batch_texts.stats(),
+            "job_wait_s": self.wait_s.stats(),
+            "window_s": self.window_s.stats(),
+            "inference_s": self.infer_hist.stats(),
+        }
+
+
+batcher = AdaptiveBatcher(settings.embed_batch_max_texts, settings.embed_batch_max_window_ms / 1000)
 
 
 async def embedding_worker():
     """
-    Drains up to {_BATCH_MAX_SIZE} embedding jobs every {_BATCH_WINDOW_S * 1000:.0f}ms.
+    Drains embedding jobs in batches of up to settings.embed_batch_max_texts
+    texts, collecting for an adaptive window (see AdaptiveBatcher).
 
-    One SentenceTransformer forward pass per batch:
+    Per batch:
       1. Collect texts from all jobs in the batch
-      2. get_embedder().embed_documents(all_texts) → raw [B, D] embeddings
-      3. Distribute results back to individual jobs
+      2. Look them up in the on-disk embedding cache
+      3. Bucket the misses by token length under settings.embed_token_budget
+      4. get_embedder().embed_documents(bucket) → raw [B, D] embeddings, per bucket,
+         each bucket waiting until the query lane is idle
+      5. Scatter results back to individual jobs in their original order
 
-    Results are written into job_store and each job's done Event is set.
+    Results are written into job_registry and each job's done Event is set.
     """
     from src.rag.rag import get_embedder
+    from src.rag.embedding_cache import get_embedding_cache
+    from src.rag.embedding_pool import submit_embed
 
     loop = asyncio.get_event_loop()
 
@@ -98,19 +465,26 @@ async def embedding_worker():
         # Wait for at least one job
         first_job: EmbeddingJob = await embedding_queue.get()
         batch: list[EmbeddingJob] = [first_job]
+        texts_collected = len(first_job.texts)
 
-        # Collect up to 7 more within the time window
-        deadline = loop.time() + _BATCH_WINDOW_S
-        while len(batch) < _BATCH_MAX_SIZE:
-            remaining = deadline - loop.time()
-            if remaining <= 0:
-                break
+        # Collect more jobs, up to the text limit, within the adaptive window
+        deadline = loop.time() + batcher.window(embedding_queue, texts_collected)
+        while texts_collected < batcher.max_texts:
             try:
-                job = await asyncio.wait_for(embedding_queue.get(), timeout=remaining)
-                batch.append(job)
-            except asyncio.TimeoutError:
-                break
-
+                # Already queued: take it without waiting
+                job = embedding_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(embedding_queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(job)
+            texts_collected += len(job.texts)
+
+        started_at = time.monotonic()
         try:
             set_request_in_flight(True)
 
@@ -121,39 +495,61 @@ async def embedding_worker():
                 all_texts.extend(job.texts)
                 text_counts.append(len(job.texts))
 
-            # Single forward pass for the entire batch
-            embedder = get_embedder()
-            all_embeddings = await loop.run_in_executor(
-                None, embedder.embed_documents, all_texts
-            )
+            # Serve what we can from the embedding cache, run only misses through the model
+            cache = get_embedding_cache()
+            if cache is not None:
+                all_embeddings = await loop.run_in_executor(
+                    None, cache.get_many, get_embedder().cache_key, all_texts
+                )
+            else:
+                all_embeddings = [None] * len(all_texts)
+
+            misses: dict[str, list[int]] = {}
+            for i, emb in enumerate(all_embeddings):
+                if emb is None:
+                    misses.setdefault(all_texts[i], []).append(i)
+
+            infer_s = None
+            if misses:
+                infer_started = time.monotonic()
+                # Regroup the distinct uncached texts into length buckets, one forward pass each
+                miss_texts = list(misses)
+                lengths = await loop.run_in_executor(None, token_lengths, miss_texts)
+                computed: list = [None] * len(miss_texts)
+                for bucket in length_buckets(lengths, settings.embed_token_budget):
+                    # Let pending chat queries go first; a long document yields between buckets
+                    await _query_lane_idle.wait()
+                    bucket_embeddings = await submit_embed(loop, [miss_texts[i] for i in bucket])
+                    # Scatter back into the original order
+                    for i, emb in zip(bucket, bucket_embeddings):
+                        computed[i] = emb
+                for text, emb in zip(miss_texts, computed):
+                    for i in misses[text]:
+                        all_embeddings[i] = emb
+                infer_s = time.monotonic() - infer_started
+                if cache is not None:
+                    try:
+                        await loop.run_in_executor(
+                            None, cache.put_many, get_embedder().cache_key, miss_texts, computed
+                        )
+                    except Exception as e:
+                        logger.warning(f"Embedding cache write failed (non-fatal): {e}")
 
             # Distribute results back to individual jobs
             idx = 0
             for i, job in enumerate(batch):
                 n = text_counts[i]
-                job_result = all_embeddings[idx: idx + n]
+                job_result = np.stack(all_embeddings[idx: idx + n]) if n else np.empty((0, 0), np.float32)
                 idx += n
 
-                # Use .get() or setdefault to avoid KeyError if initialization was missed
-                if job.job_id not in job_store:
-                    job_store[job.job_id] = {"status": "pending", "result": None, "error": None}
-                
-                job_store[job.job_id].update({
-                    "status": "done",
-                    "result": job_result
-                })
+                job_registry.set_done(job.job_id, job_result)
                 job.done.set()
+            batcher.observe_batch(batch, started_at, infer_s)
 
         except Exception as e:
             logger.error(f"Embedding batch failed: {e}", exc_info=True)
             for job in batch:
-                if job.job_id not in job_store:
-                    job_store[job.job_id] = {"status": "error", "result": None, "error": str(e)}
-                else:
-                    job_store[job.job_id].update({
-                        "status": "error",
-                        "error": str(e)
-                    })
+                job_registry.set_error(job.job_id, str(e))
                 # Critical: always set the event so the request doesn't hang
                 if not job.done.is_set():
                     job.done.set()
@@ -174,6 +570,8 @@ async def _warmup_loop():
     Skipped entirely if a real request is in flight.
     """
     from src.rag.rag import warmup_embedder
+    from src.rag.embedding_pool import get_embedding_pool, warmup_pool
+    from src.thread_budget import get_executor
 
     loop = asyncio.get_event_loop()
 
@@ -183,7 +581,11 @@ async def _warmup_loop():
             continue
         t0 = time.monotonic()
         try:
-            await loop.run_in_executor(None, warmup_embedder)
+            if get_embedding_pool() is not None:
+                await warmup_pool(loop)
+            else:
+                # Same thread the document passes use, so it's the one kept warm
+                await loop.run_in_executor(get_executor("inference"), warmup_embedder)
         except Exception as e:
             logger.warning(f"Warmup cycle error (non-fatal): {e}")
             continue
@@ -200,16 +602,27 @@ def start_workers():
     """
     Launch all async worker coroutines. Call once during app startup.
 
-    - 1 embedding worker (batched SentenceTransformer inference)
+    - 1 embedding worker (batched SentenceTransformer inference) by default;
+      one per pool process when settings.embedding_workers > 1
+    - 1 query worker (priority lane for chat queries)
     - 1 warmup loop (keeps OpenMP threads alive)
     """
-    global _workers_started
+    from src.rag.embedding_pool import get_embedding_pool, pool_size, warmup_pool
+
+    global _workers_started, _main_loop
     if _workers_started:
         return
     _workers_started = True
+    _main_loop = asyncio.get_event_loop()
 
-    # Use only 1 worker to save RAM on this environment
-    asyncio.create_task(embedding_worker(), name="embedding_worker_0")
+    # Default is 1 worker to save RAM; the process pool is opt-in
+    workers = pool_size() if get_embedding_pool() is not None else 1
+    for i in range(workers):
+        asyncio.create_task(embedding_worker(), name=f"embedding_worker_{i}")
+    asyncio.create_task(query_worker(), name="query_worker")
     asyncio.create_task(_warmup_loop(), name="warmup_loop")
+    if workers > 1:
+        # Load the model in every pool process now rather than on the first upload
+        asyncio.create_task(warmup_pool(asyncio.get_event_loop()), name="embedding_pool_warmup")
 
-    logger.info("Embedding batch workers started (1 worker + warmup loop)")
+    logger.info(f"Embedding batch workers started ({workers} worker(s) + query lane + warmup loop)")
@@ -0,0 +1,144 @@
+"""
+Embedding Backends — pluggable implementations behind get_embedder().
+
+Every backend exposes the same surface the rest of the app uses:
+  - embed_documents(texts) → float32 array [N, D], embed_query(text) → [D];
+    L2-normalized, and never converted to Python float lists
+  - tokenizer, max_seq_length   (for the token chunker and length buckets)
+  - cache_key                   (keys the on-disk embedding cache per backend)
+
+Backends, selected with settings.embedding_backend:
+  - "torch": sentence-transformers via HuggingFaceEmbeddings (default)
+  - "onnx":  int8-quantized ONNX export of the same model on ONNX Runtime.
+             Needs `onnxruntime` (optional, not in requirements.txt); build
+             the model once with `python -m src.rag.embedders export <dir>`
+             (needs `optimum`). If it can't load, the embedder raises
+             rather than silently switching models: the ONNX and torch
+             vectors differ slightly, and the embedding cache is per backend.
+"""
+
+import os
+import sys
+import logging
+
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# From the model's sentence_bert_config.json; the ONNX path has no ST config to read it from
+_MODEL_MAX_SEQ_LENGTH = 128
+_ONNX_FILENAME = "model_quantized.onnx"
+
+
+class TorchEmbeddings:
+    """sentence-transformers model on torch (CPU)."""
+
+    cache_key = EMBEDDING_MODEL_NAME
+
+    def __init__(self):
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        self._model = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True},
+        )
+        self.tokenizer = self._model._client.tokenizer
+        self.max_seq_length = self._model._client.max_seq_length
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        # Same preprocessing as HuggingFaceEmbeddings, minus its .tolist()
+        texts = [t.replace("\n", " ") for t in texts]
+        vectors = self._model._client.encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+
+class OnnxEmbeddings:
+    """Int8-quantized ONNX export of the same model on ONNX Runtime (CPU)."""
+
+    cache_key = f"onnx-int8:{EMBEDDING_MODEL_NAME}"
+
+    def __init__(self, model_dir: str, intra_op_threads: int):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = os.path.join(model_dir, _ONNX_FILENAME)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"{path} not found; run `python -m src.rag.embedders export {model_dir}`"
+            )
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        # The export saves the tokenizer next to the model: no hub access, and it always matches
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = _MODEL_MAX_SEQ_LENGTH
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # Same preprocessing as TorchEmbeddings, so both backends see the same tokens
+        texts = [t.replace("\n", " ") for t in texts]
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True,
+            max_length=self.max_seq_length, return_tensors="np",
+        )
+        feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self._input_names}
+        token_embeddings = self._session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalize (as the ST pipeline does)
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32, copy=False)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+
+def build_embedder():
+    """Instantiate the configured backend. Raises if it can't load; there is no fallback."""
+    if settings.embedding_backend == "onnx":
+        from src.thread_budget import get_layout
+        threads = settings.onnx_intra_op_threads or get_layout().inference_threads
+        try:
+            embedder = OnnxEmbeddings(settings.onnx_model_dir, threads)
+        except Exception as e:
+            raise RuntimeError(f"EMBEDDING_BACKEND=onnx, but the ONNX model could not be loaded: {e}") from e
+        logger.info(f"Using ONNX Runtime embedding backend ({settings.onnx_model_dir})")
+        return embedder
+    return TorchEmbeddings()
+
+
+def export_quantized_onnx(output_dir: str):
+    """Export the model to ONNX and quantize it to int8 (dynamic, per-tensor)."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForFeatureExtraction.from_pretrained(EMBEDDING_MODEL_NAME, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME).save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=output_dir, quantization_config=config)
+    logger.info(f"Quantized ONNX model written to {os.path.join(output_dir, _ONNX_FILENAME)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        logging.basicConfig(level=logging.INFO)
+        export_quantized_onnx(sys.argv[2] if len(sys.argv) > 2 else settings.onnx_model_dir)
+    else:
+        print("usage: python -m src.rag.embedders export [output_dir]")
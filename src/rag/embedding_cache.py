@@ -0,0 +1,173 @@
+"""
+Embedding Cache — Persistent chunk-embedding cache shared across restarts.
+
+Architecture:
+  - SQLite file keyed by sha256(model name + whitespace-normalized text).
+  - Vectors stored as raw float32 bytes (1.5 KB for a 384-dim vector).
+  - Size-capped: once the stored vectors exceed the cap, least recently
+    used rows are evicted down to 90% of it.
+  - Reads don't write: hits are noted in memory and their last_used stamps
+    written in one statement before an eviction, or every _TOUCH_FLUSH_S.
+    A crash only loses some recency, never vectors.
+  - Hit / miss counters are kept in-process and exposed via stats().
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+_EVICT_TO_FRACTION = 0.9
+_TOUCH_FLUSH_S = 60.0
+_TOUCH_FLUSH_ROWS = 10_000
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_bytes: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}     # key → last hit, not yet written
+        self._touches_flushed_at = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._entries, self._bytes = row
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{_normalize(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """Cached vectors in input order; None for every miss."""
+        keys = [self.key(model, t) for t in texts]
+        found: dict[str, bytes] = {}
+        with self._lock:
+            unique = list(set(keys))
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                marks = ",".join("?" * len(part))
+                found.update(self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part
+                ).fetchall())
+            now = time.time()
+            self._touched.update((k, now) for k in found)
+            hits = sum(1 for k in keys if k in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+            if (len(self._touched) >= _TOUCH_FLUSH_ROWS
+                    or time.monotonic() - self._touches_flushed_at >= _TOUCH_FLUSH_S):
+                self._flush_touches()
+                self._conn.commit()
+
+        return [
+            np.frombuffer(found[k], dtype=np.float32) if k in found else None
+            for k in keys
+        ]
+
+    def _flush_touches(self):
+        """Write the pending last_used stamps. Lock held; the caller commits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(t, k) for k, t in self._touched.items()],
+            )
+            self._touched.clear()
+        self._touches_flushed_at = time.monotonic()
+
+    def put_many(self, model: str, texts: list[str], vectors):
+        now = time.time()
+        rows = {
+            self.key(model, t): np.asarray(v, dtype=np.float32).tobytes()
+            for t, v in zip(texts, vectors)
+        }
+        with self._lock:
+            existing: set[str] = set()
+            keys = list(rows)
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                existing.update(k for (k,) in self._conn.execute(
+                    f"SELECT key FROM embeddings WHERE key IN ({marks})", part
+                ).fetchall())
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, blob, now) for k, blob in rows.items()],
+            )
+            for k, blob in rows.items():
+                if k not in existing:
+                    self._entries += 1
+                    self._bytes += len(blob)
+            if self._bytes > self.max_bytes:
+                # Eviction order must see every hit so far
+                self._flush_touches()
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used rows until the cache is back under its cap. Lock held."""
+        target = int(self.max_bytes * _EVICT_TO_FRACTION)
+        rows = self._conn.execute(
+            "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        ).fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+            self._entries -= 1
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+        logger.info(f"Embedding cache evicted {len(doomed)} entries")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "size_mb": round(self._bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    if not settings.embedding_cache_path or settings.embedding_cache_max_mb <= 0:
+        return None
+    try:
+        return EmbeddingCache(settings.embedding_cache_path, settings.embedding_cache_max_mb * 1024 * 1024)
+    except Exception as e:
+        logger.warning(f"Embedding cache disabled: {e}")
+        return None
@@ -0,0 +1,89 @@
+"""
+Embedding Process Pool — optional multi-process backend for batch inference.
+
+Architecture:
+  - Off by default (settings.embedding_workers <= 1): inference runs on a
+    thread in this process, which keeps RAM to one model copy.
+  - With N > 1 workers, a spawn-based ProcessPoolExecutor runs N processes.
+    Each loads the embedding model once in its initializer and gets its
+    share of the inference cores from the thread budget (thread_budget.py),
+    so processes don't fight over cores.
+  - The batch workers in batch_workers.py keep draining embedding_queue and
+    hand each forward pass to submit_embed(), which picks the backend.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ═══════════════════════ Worker Process Side ════════════════════════
+
+_worker_embedder = None
+
+
+def _init_worker(threads: int):
+    """Runs once per pool process: pin thread counts, then load the model."""
+    global _worker_embedder
+    # Must run before torch initialises its OpenMP pool
+    from src.thread_budget import set_torch_threads
+    set_torch_threads(threads)
+
+    from src.rag.rag import get_embedder
+    _worker_embedder = get_embedder()
+
+
+def _embed_in_worker(texts: list[str]):
+    # float32 array: pickles back to the parent as one buffer
+    return _worker_embedder.embed_documents(texts)
+
+
+# ═══════════════════════ Parent Side ════════════════════════
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def pool_size() -> int:
+    return max(1, settings.embedding_workers)
+
+
+def get_embedding_pool() -> Optional[ProcessPoolExecutor]:
+    """The process pool, or None in single-worker mode."""
+    global _pool
+    if settings.embedding_workers <= 1:
+        return None
+    if _pool is None:
+        from src.thread_budget import get_layout
+        workers = pool_size()
+        threads = get_layout().inference_threads
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+        logger.info(f"Embedding process pool: {workers} processes × {threads} threads")
+    return _pool
+
+
+def submit_embed(loop: asyncio.AbstractEventLoop, texts: list[str]) -> asyncio.Future:
+    """Run one embed_documents forward pass on the configured backend."""
+    pool = get_embedding_pool()
+    if pool is None:
+        from src.rag.rag import get_embedder
+        from src.thread_budget import get_executor
+        return loop.run_in_executor(get_executor("inference"), get_embedder().embed_documents, texts)
+    return loop.run_in_executor(pool, _embed_in_worker, texts)
+
+
+async def warmup_pool(loop: asyncio.AbstractEventLoop):
+    """One dummy pass per pool process (loads the models up front, keeps threads warm)."""
+    if get_embedding_pool() is None:
+        return
+    await asyncio.gather(*[submit_embed(loop, ["warmup"]) for _ in range(pool_size())])
@@ -0,0 +1,231 @@
+"""
+Lexical Index — BM25 inverted index over a material's chunks.
+
+Architecture:
+  - Built when ingestion finishes (build_search_indexes in pipeline.py,
+    before the IVF index) and saved as
+    <settings.lexical_index_dir>/<owner_id>.npz together with the chunk ids
+    it covers. A missing or stale file is rebuilt in memory on load.
+  - Compact CSR layout: a sorted vocabulary, one int32 chunk-row array and
+    one uint16 term-frequency array sliced per term by an offsets array,
+    plus per-chunk token counts. A query only touches its own terms' postings.
+  - Tokens are casefolded words. Identifiers and codes such as
+    "numpy.linalg", "x_1" or "CS-101" are indexed whole and by their parts,
+    so exact-term queries hit.
+  - Rows line up with the MaterialIndex matrix (vector_index.py), which
+    fuses BM25 with cosine scores in hybrid_search.
+  - Build time, index size and query latency are exposed via lexical_stats.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.config import settings
+from src.metrics import Histogram
+from src.store import get_chunks, get_embedded_chunk_ids
+
+logger = logging.getLogger(__name__)
+
+
+_K1 = 1.2
+_B = 0.75
+_MAX_TOKEN_CHARS = 40
+
+_TOKEN = re.compile(r"\w+(?:[.\-]\w+)*")
+_PART_SPLIT = re.compile(r"[._\-]")
+_STOP_WORDS = frozenset("""
+    a an and are as at be but by can do does for from had has have how i if in into is it its
+    me my no not of on or our so than that the their then there these they this to was we were
+    what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str, parts: bool = True) -> list[str]:
+    tokens = []
+    for match in _TOKEN.finditer(text.casefold()):
+        token = match.group()
+        if token in _STOP_WORDS or len(token) > _MAX_TOKEN_CHARS:
+            continue
+        tokens.append(token)
+        if parts and _PART_SPLIT.search(token):
+            tokens.extend(p for p in _PART_SPLIT.split(token) if p and p not in _STOP_WORDS)
+    return tokens
+
+
+def query_terms(query: str, parts: bool = True) -> list[str]:
+    """Distinct tokens of a query, in order; `parts=False` leaves identifiers whole."""
+    return list(dict.fromkeys(tokenize(query, parts)))
+
+
+class LexicalStats:
+    """Build and query counters for GET /api/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.build_ms = Histogram((10, 50, 100, 500, 1000, 5000))
+        self.query_ms = Histogram((0.1, 0.5, 1, 5, 10, 50))
+        self.last_build: dict = {}
+        self.queries = 0
+        self.dense_skipped = 0
+
+    def observe_build(self, index: "LexicalIndex", ms: float):
+        with self._lock:
+            self.build_ms.observe(ms)
+            self.last_build = {
+                "chunks": len(index.doc_lengths),
+                "terms": len(index.terms),
+                "postings": len(index.postings),
+                "size_kb": round(index.nbytes / 1024, 1),
+                "ms": round(ms, 2),
+            }
+
+    def observe_query(self, ms: float, dense_skipped: bool):
+        with self._lock:
+            self.query_ms.observe(ms)
+            self.queries += 1
+            self.dense_skipped += dense_skipped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "build_ms": self.build_ms.stats(),
+                "last_build": self.last_build,
+                "query_ms": self.query_ms.stats(),
+                "queries": self.queries,
+                "dense_skipped": self.dense_skipped,
+            }
+
+
+lexical_stats = LexicalStats()
+
+
+@dataclass
+class LexicalIndex:
+    terms: list[str]              # sorted vocabulary
+    postings: np.ndarray          # int32 chunk rows, grouped by term
+    freqs: np.ndarray             # uint16 frequency of the term in each posting's chunk
+    offsets: np.ndarray           # term i's postings are postings[offsets[i]:offsets[i + 1]]
+    doc_lengths: np.ndarray       # int32 tokens per chunk row
+
+    def __post_init__(self):
+        self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        n = len(self.doc_lengths)
+        df = np.diff(self.offsets)
+        self._idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_length = max(float(self.doc_lengths.mean()), 1.0) if n else 1.0
+        self._length_norm = (_K1 * (1 - _B + _B * self.doc_lengths / avg_length)).astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.postings.nbytes + self.freqs.nbytes + self.offsets.nbytes
+                + self.doc_lengths.nbytes + sum(len(t) for t in self.terms))
+
+    def score(self, terms: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """BM25 score of every chunk row, and how many of `terms` each row contains."""
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        matched = np.zeros(len(self.doc_lengths), dtype=np.int16)
+        for term in terms:
+            t = self._term_ids.get(term)
+            if t is None:
+                continue
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            rows = self.postings[lo:hi]
+            tf = self.freqs[lo:hi].astype(np.float32)
+            scores[rows] += self._idf[t] * tf * (_K1 + 1) / (tf + self._length_norm[rows])
+            matched[rows] += 1
+        return scores, matched
+
+
+def build_lexical_index(contents: list[str]) -> LexicalIndex:
+    t0 = time.perf_counter()
+    by_term: dict[str, list[tuple[int, int]]] = {}
+    doc_lengths = np.zeros(len(contents), dtype=np.int32)
+    for row, text in enumerate(contents):
+        counts = Counter(tokenize(text))
+        doc_lengths[row] = sum(counts.values())
+        for term, tf in counts.items():
+            by_term.setdefault(term, []).append((row, tf))
+
+    terms = sorted(by_term)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(by_term[t]) for t in terms], dtype=np.int64)
+    flat = [p for t in terms for p in by_term[t]]
+    index = LexicalIndex(
+        terms=terms,
+        postings=np.fromiter((row for row, _ in flat), dtype=np.int32, count=len(flat)),
+        freqs=np.fromiter((min(tf, 65535) for _, tf in flat), dtype=np.uint16, count=len(flat)),
+        offsets=offsets,
+        doc_lengths=doc_lengths,
+    )
+    lexical_stats.observe_build(index, (time.perf_counter() - t0) * 1000)
+    return index
+
+
+# ═══════════════════════ Persistence ════════════════════════
+
+def lexical_index_path(owner_id: str) -> str:
+    return os.path.join(settings.lexical_index_dir, f"{owner_id}.npz")
+
+
+def save_lexical(owner_id: str, index: LexicalIndex, chunk_ids: list[str]):
+    os.makedirs(settings.lexical_index_dir, exist_ok=True)
+    path = lexical_index_path(owner_id)
+    tmp = path + ".tmp.npz"
+    # One "\n"-joined UTF-8 blob is far smaller than a fixed-width string array
+    np.savez(tmp, terms=np.frombuffer("\n".join(index.terms).encode("utf-8"), dtype=np.uint8),
+             postings=index.postings, freqs=index.freqs, offsets=index.offsets,
+             doc_lengths=index.doc_lengths, chunk_ids=np.array(chunk_ids))
+    os.replace(tmp, path)
+
+
+def load_lexical(owner_id: str, chunk_ids: list[str]) -> Optional[LexicalIndex]:
+    """The saved index, or None if there is none or it covers different chunks."""
+    path = lexical_index_path(owner_id)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if data["chunk_ids"].tolist() != chunk_ids:
+            return None
+        blob = data["terms"].tobytes().decode("utf-8")
+        return LexicalIndex(
+            terms=blob.split("\n") if blob else [],
+            postings=data["postings"], freqs=data["freqs"],
+            offsets=data["offsets"], doc_lengths=data["doc_lengths"],
+        )
+
+
+def remove_lexical_index(owner_id: str):
+    try:
+        os.remove(lexical_index_path(owner_id))
+    except FileNotFoundError:
+        pass
+
+
+def lexical_index_for(owner_id: str, chunk_ids: list[str], contents: list[str]) -> LexicalIndex:
+    """Lexical index for a loaded material: the saved one if current, else built in memory."""
+    index = load_lexical(owner_id, chunk_ids)
+    if index is None:
+        index = build_lexical_index(contents)
+    return index
+
+
+def index_material_text(material_id: str) -> LexicalIndex:
+    """Build and save a material's lexical index from its stored chunks (end of ingestion)."""
+    chunks = get_chunks(material_id)
+    owner_id = chunks[0]["material_id"] if chunks else material_id
+    # The rows of the MaterialIndex matrix (load_material_index): embedded chunks, by chunk_index
+    embedded = get_embedded_chunk_ids(owner_id)
+    chunks = [c for c in chunks if c["id"] in embedded]
+    index = build_lexical_index([c["content"] for c in chunks])
+    save_lexical(owner_id, index, [c["id"] for c in chunks])
+    logger.info(f"Lexical index for {owner_id}: {len(chunks)} chunks, {len(index.terms)} terms, "
+                f"{index.nbytes / 1024:.1f} KB")
+    return index
@@ -0,0 +1,76 @@
+"""
+Query Embedding Cache — In-process LRU of chat query → query vector.
+
+Architecture:
+  - OrderedDict keyed by the query with whitespace collapsed, so
+    "Summarize  chapter 3 " and "Summarize chapter 3" share an entry. Case
+    is kept: the embedder may tell "US" from "us".
+  - Vectors stored as float32 numpy arrays (1.5 KB each at 384 dims).
+  - Bounded by settings.query_cache_size entries; least recently used first out.
+  - Shared by everything that goes through similarity_search (rag_answer and
+    SupabaseRetriever); hit / miss counters are exposed via stats().
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from src.config import settings
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        # similarity_search runs on executor threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, query: str, vector) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = array
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return array
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache
+def get_query_cache() -> Optional[QueryEmbeddingCache]:
+    if settings.query_cache_size <= 0:
+        return None
+    return QueryEmbeddingCache(settings.query_cache_size)
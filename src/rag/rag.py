@@ -1,13 +1,11 @@
 import os
 import asyncio
-import uuid
 import logging
 from functools import lru_cache
 from typing import Optional
 from pydantic import BaseModel, Field
 from langchain_core.tools import Tool
 
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.prompts import PromptTemplate
 from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory
 from langchain.agents import create_openai_tools_agent, AgentExecutor
@@ -18,9 +16,13 @@ from langchain_core.documents import Document
 from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
 from langchain_openai import ChatOpenAI
 
+import numpy as np
+
 from src.config import settings
 from src.database import get_supabase
-from src.store import get_chunks, get_material
+from src.rag.embedders import build_embedder
+from src.rag.vector_index import get_vector_index_cache, invalidate_material_index
+from src.store import get_chunks, get_material, resolve_content_owner, bulk_insert
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +30,40 @@ logger = logging.getLogger(__name__)
 # ── Embeddings ─────────────────────────────────────────
 
 EMBEDDING_DIM = 384
+# float32 carries ~7 significant digits; more would only pad the payload
+_VECTOR_DIGITS = 7
+
+
+def vector_literal(vector) -> str:
+    """
+    pgvector text literal ("[0.0123457,-0.0456]") for one embedding. Sent as a
+    string, the vector column / RPC argument parses it server-side — about half
+    the bytes of a JSON list of Python floats, with no float objects in between.
+    """
+    values = np.asarray(vector, dtype=np.float32).tolist()
+    return _literal_template(len(values)) % tuple(values)
+
+
+@lru_cache(maxsize=8)
+def _literal_template(dim: int) -> str:
+    # One %-format over the whole vector beats formatting each float separately
+    return "[" + ",".join([f"%.{_VECTOR_DIGITS}g"] * dim) + "]"
+
 
 @lru_cache
 def get_embedder():
-    return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
-    )
+    """The configured embedding backend (see src/rag/embedders.py)."""
+    return build_embedder()
+
+
+def get_embedding_tokenizer():
+    """The tokenizer the embedding model itself uses."""
+    return get_embedder().tokenizer
+
+
+def get_max_seq_length() -> int:
+    """Tokens the embedding model reads per text; anything beyond is truncated."""
+    return get_embedder().max_seq_length
 
 
 def store_embeddings(material_id: str, chunk_ids: list[str], chunks: list[str]):
@@ -44,7 +72,7 @@ def store_embeddings(material_id: str, chunk_ids: list[str], chunks: list[str]):
     embeddings = embedder.embed_documents(chunks)
 
     records = [
-        {"chunk_id": cid, "material_id": material_id, "embedding": emb}
+        {"chunk_id": cid, "material_id": material_id, "embedding": vector_literal(emb)}
         for cid, emb in zip(chunk_ids, embeddings)
     ]
 
@@ -54,8 +82,8 @@ def store_embeddings(material_id: str, chunk_ids: list[str], chunks: list[str]):
         return
 
     logger.info(f"Storing {len(records)} embeddings in Supabase...")
-    for i in range(0, len(records), 50):
-        db.table("material_embeddings").insert(records[i:i + 50]).execute()
+    bulk_insert("material_embeddings", records)
+    invalidate_material_index(material_id)
     logger.info(f"Embeddings stored successfully for material {material_id}.")
 
 
@@ -65,26 +93,28 @@ def warmup_embedder():
     embedder.embed_documents(["warmup"])
 
 
-async def store_embeddings_async(material_id: str, chunk_ids: list[str], chunks: list[str]):
+async def embed_texts_async(texts: list[str], user_id: str = "") -> np.ndarray:
     """
-    Async variant of store_embeddings that routes embedding inference through
-    the batch worker queue for batching across concurrent requests.
+    Embed texts through the batch worker queue so inference is batched
+    across concurrent requests. Waits for room if the queue is full;
+    `user_id` decides whose turn the job is queued under.
     """
-    from src.rag.batch_workers import EmbeddingJob, embedding_queue, job_store
+    from src.rag.batch_workers import EmbeddingJob, embedding_queue, job_registry
 
-    job = EmbeddingJob(job_id=str(uuid.uuid4()), texts=chunks)
-    job_store[job.job_id] = {"status": "pending", "result": None, "error": None}
+    job = EmbeddingJob(job_id=job_registry.create(), texts=texts, user_id=user_id)
     await embedding_queue.put(job)
     await job.done.wait()
 
-    entry = job_store[job.job_id]
+    entry = job_registry.pop_result(job.job_id)
     if entry["status"] == "error":
         raise RuntimeError(f"Embedding failed: {entry['error']}")
+    return entry["result"]
 
-    embeddings = entry["result"]
 
+def insert_embeddings(material_id: str, chunk_ids: list[str], embeddings):
+    """`embeddings`: float32 array [N, D] (or any sequence of vectors)."""
     records = [
-        {"chunk_id": cid, "material_id": material_id, "embedding": emb}
+        {"chunk_id": cid, "material_id": material_id, "embedding": vector_literal(emb)}
         for cid, emb in zip(chunk_ids, embeddings)
     ]
 
@@ -93,31 +123,68 @@ async def store_embeddings_async(material_id: str, chunk_ids: list[str], chunks:
         logger.warning("Supabase not connected — embeddings computed but NOT stored (no DB).")
         return
 
-    logger.info(f"Storing {len(records)} embeddings in Supabase for material {material_id}...")
-    
-    def _insert_records():
-        for i in range(0, len(records), 50):
-            db.table("material_embeddings").insert(records[i:i + 50]).execute()
-            
+    bulk_insert("material_embeddings", records)
+    # The material's cached search index no longer covers every chunk
+    invalidate_material_index(material_id)
+
+
+async def store_embeddings_async(material_id: str, chunk_ids: list[str], chunks: list[str]):
+    """
+    Async variant of store_embeddings that routes embedding inference through
+    the batch worker queue for batching across concurrent requests.
+    """
+    embeddings = await embed_texts_async(chunks)
+
+    logger.info(f"Storing {len(embeddings)} embeddings in Supabase for material {material_id}...")
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, _insert_records)
+    await loop.run_in_executor(None, insert_embeddings, material_id, chunk_ids, embeddings)
     logger.info(f"Embeddings stored successfully for material {material_id}.")
 
 
+MATCH_THRESHOLD = 0.35
+
+
+def embed_search_query(query: str) -> np.ndarray:
+    """Query vector from the query cache, or the query lane on a miss."""
+    from src.rag.batch_workers import embed_query
+    from src.rag.query_cache import get_query_cache
+
+    cache = get_query_cache()
+    vector = cache.get(query) if cache is not None else None
+    if vector is None:
+        vector = embed_query(query)
+        if cache is not None:
+            vector = cache.put(query, vector)
+    return np.asarray(vector, dtype=np.float32)
+
+
 def similarity_search(query: str, material_id: str, k: int = 5) -> list[dict]:
-    embedder = get_embedder()
-    query_embedding = embedder.embed_query(query)
+    """
+    Top-k chunks of a material for `query`. Scored in process against the
+    cached vector index; the match_material_chunks RPC is the fallback.
+    """
+    vector = embed_search_query(query)
+
+    owner_id = resolve_content_owner(material_id)
+    index_cache = get_vector_index_cache()
+    if index_cache is not None:
+        try:
+            index = index_cache.get(owner_id)
+            if index.chunk_ids:
+                return index.search(vector, k, MATCH_THRESHOLD)
+        except Exception as e:
+            logger.warning(f"Local vector index unavailable for {owner_id}, using RPC: {e}")
 
     db = get_supabase()
     if db is None:
         return []
-    
+
     result = db.rpc(
         "match_material_chunks",
         {
-            "query_embedding": query_embedding,
-            "match_material_id": material_id,
-            "match_threshold": 0.35,
+            "query_embedding": vector_literal(vector),
+            "match_material_id": owner_id,
+            "match_threshold": MATCH_THRESHOLD,
             "match_count": k,
         },
     ).execute()
@@ -125,6 +192,33 @@ def similarity_search(query: str, material_id: str, k: int = 5) -> list[dict]:
     return result.data
 
 
+def hybrid_search(query: str, material_id: str, k: int = 5) -> list[dict]:
+    """
+    Top-k chunks of a material by fused BM25 + vector score, scored in
+    process; the query is only embedded when the lexical match isn't
+    conclusive. Without the in-process index this is similarity_search.
+    """
+    owner_id = resolve_content_owner(material_id)
+    index_cache = get_vector_index_cache()
+    if index_cache is not None:
+        try:
+            index = index_cache.get(owner_id)
+            if index.chunk_ids:
+                return index.hybrid_search(
+                    query, lambda: embed_search_query(query), k, MATCH_THRESHOLD, settings.hybrid_dense_weight
+                )
+        except Exception as e:
+            logger.warning(f"Hybrid search unavailable for {owner_id}, using dense search: {e}")
+    return similarity_search(query, material_id, k)
+
+
+def retrieve_chunks(query: str, material_id: str, k: int = 5, mode: Optional[str] = None) -> list[dict]:
+    """similarity_search or hybrid_search, per `mode` ("dense" / "hybrid"; default settings.retrieval_mode)."""
+    if (mode or settings.retrieval_mode) == "hybrid":
+        return hybrid_search(query, material_id, k)
+    return similarity_search(query, material_id, k)
+
+
 # ── LLM ────────────────────────────────────────────────
 
 def get_llm():
@@ -223,12 +317,14 @@ def web_search_tools(has_material: bool = False):
 class SupabaseRetriever(BaseRetriever):
     material_id: str
     k: int = 4
+    mode: Optional[str] = None    # "dense" or "hybrid"; None = settings.retrieval_mode
 
     def _get_relevant_documents(self, query: str) -> list[Document]:
-        results = similarity_search(query, self.material_id, self.k)
+        results = retrieve_chunks(query, self.material_id, self.k, self.mode)
         return [
             Document(page_content=r["content"], metadata={
                 "similarity": r.get("similarity"),
+                "bm25": r.get("bm25"),
                 "chunk_id": r.get("chunk_id"),
             })
             for r in results
@@ -299,6 +395,7 @@ def rag_answer(
     chunks: Optional[list[str]] = None,
     summaries: str = "",
     memory = None,
+    retrieval_mode: Optional[str] = None,
 ):
     if memory is None:
         memory = ConversationBufferWindowMemory(
@@ -327,7 +424,7 @@ def rag_answer(
         context_parts.append(f"Subject / Topic: {mat.get('title')}")
 
     if material_id and mat and mat.get("source_type") != "topic":
-        results = similarity_search(query, material_id, k=5)
+        results = retrieve_chunks(query, material_id, k=5, mode=retrieval_mode)
         if results:
             has_chunks = True
             chunks = [r["content"] for r in results]
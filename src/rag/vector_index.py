@@ -0,0 +1,513 @@
+"""
+Vector Index Cache — In-process top-k search over a material's embeddings.
+
+Architecture:
+  - On first search, a material's embeddings and chunk texts are loaded
+    once into one contiguous, L2-normalized float32 matrix [N, D].
+  - Top-k is a single matrix-vector product plus argpartition, in process;
+    no match_material_chunks round trip per chat turn.
+  - Indexes are keyed by the content owner id (deduplicated materials share
+    one) and kept in an LRU bounded by settings.vector_index_max_mb.
+  - Any embedding write for a material (ingestion batches, resume) and
+    delete_material invalidate its entry; the next search reloads it.
+    Invalidation is per process, so entries also expire after
+    settings.vector_index_ttl_s to pick up writes made by other workers.
+  - Materials above settings.ann_min_chunks also carry an IVF index
+    (ann_index.py), so a search only scores a few clusters' rows. It is
+    only built once the material is ready; partially ingested materials
+    use exact search.
+  - Each index also carries the material's BM25 index (lexical_index.py);
+    hybrid_search fuses both scores and only embeds the query when the
+    lexical match alone isn't conclusive.
+  - similarity_search falls back to the RPC when the cache is disabled or
+    a load fails.
+  - For library-wide search, a per-user index stacks every material of a
+    user into one matrix (two bulk queries, no per-material calls) and is
+    scored in a single pass; results are grouped by material. A write to
+    one material only reloads that material's rows of the stacked index.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from src.config import settings
+from src.rag.ann_index import IVFIndex, ann_index_for
+from src.rag.lexical_index import LexicalIndex, lexical_index_for, lexical_stats, query_terms
+from src.store import (
+    get_chunks, get_chunk_embeddings, get_chunks_for_materials, get_chunk_embeddings_for_materials,
+    get_material,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Hybrid search scores this many candidates per result from each side
+_CANDIDATES_PER_RESULT = 4
+# Rows below the cosine threshold are still kept at this share of the top BM25 score
+_LEXICAL_KEEP = 0.5
+# Queries of at most this many words (identifiers count once) may skip the dense pass
+_SKIP_MAX_WORDS = 3
+# ...when the hits are selective: at most k rows contain every term, or the
+# weakest hit outscores the best row left out by this factor
+_SKIP_MARGIN = 1.5
+
+
+def parse_vector(value) -> np.ndarray:
+    """A vector column value as float32: PostgREST returns pgvector as "[a,b,...]" text."""
+    if isinstance(value, str):
+        return np.array(value.strip("[]").split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+@dataclass
+class MaterialIndex:
+    chunk_ids: list[str]
+    contents: list[str]
+    chunk_indexes: list[int]
+    matrix: np.ndarray            # [N, D] float32, rows L2-normalized
+    ann: Optional[IVFIndex] = None
+    lexical: Optional[LexicalIndex] = None
+
+    @property
+    def nbytes(self) -> int:
+        size = self.matrix.nbytes + sum(len(c) for c in self.contents)
+        if self.ann is not None:
+            size += self.ann.centroids.nbytes + self.ann.order.nbytes + self.ann.offsets.nbytes
+        if self.lexical is not None:
+            size += self.lexical.nbytes
+        return size
+
+    def _dense_top(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if self.ann is not None:
+            return self.ann.search(self.matrix, query, k, settings.ann_nprobe)
+        scores = self.matrix @ query
+        top = _top(scores, k)
+        return top, scores[top]
+
+    def search(self, query: np.ndarray, k: int, threshold: float) -> list[dict]:
+        """Top-k rows with cosine similarity above `threshold`, best first (RPC result shape)."""
+        if not len(self.chunk_ids):
+            return []
+        top, top_scores = self._dense_top(query, k)
+        return [
+            {
+                "chunk_id": self.chunk_ids[i],
+                "content": self.contents[i],
+                "chunk_index": self.chunk_indexes[i],
+                "similarity": float(score),
+            }
+            for i, score in zip(top, top_scores)
+            if score > threshold
+        ]
+
+    def hybrid_search(self, query: str, embed: Callable[[], np.ndarray], k: int,
+                      threshold: float, dense_weight: float) -> list[dict]:
+        """
+        Top-k rows by dense_weight · cosine + (1 - dense_weight) · BM25 / max BM25
+        over the union of the dense and lexical candidates. `embed` (the
+        query's forward pass) is not called for a short query whose best
+        lexical hits contain every query term and are selective (few rows
+        contain every term, or the hits clearly outscore the rest): those
+        hits (up to k) are the result, with "similarity": None. Rows carry a
+        "bm25" score alongside.
+        """
+        if not len(self.chunk_ids):
+            return []
+        if self.lexical is None:
+            return self.search(embed(), k, threshold)
+
+        t0 = time.perf_counter()
+        terms = query_terms(query)
+        bm25, matched = self.lexical.score(terms)
+        lexical_top = _top(bm25, k * _CANDIDATES_PER_RESULT)
+        lexical_top = lexical_top[bm25[lexical_top] > 0]
+        # Leading hits that contain every term
+        full = matched[lexical_top[:k]] == len(terms)
+        hits = lexical_top[:k][:int(full.argmin()) if not full.all() else k]
+        conclusive = len(hits) > 0 and 0 < len(query_terms(query, parts=False)) <= _SKIP_MAX_WORDS
+        if conclusive:
+            runner_up = float(bm25[lexical_top[len(hits)]]) if len(lexical_top) > len(hits) else 0.0
+            conclusive = (int((matched == len(terms)).sum()) <= k
+                          or float(bm25[hits[-1]]) >= _SKIP_MARGIN * runner_up)
+        lexical_stats.observe_query((time.perf_counter() - t0) * 1000, conclusive)
+        if conclusive:
+            return [self._row(i, None, float(bm25[i]), float(bm25[i])) for i in hits]
+
+        vector = embed()
+        dense_top, _ = self._dense_top(vector, k * _CANDIDATES_PER_RESULT)
+        candidates = np.union1d(dense_top, lexical_top)
+        cosine = self.matrix[candidates] @ vector
+        lexical = bm25[candidates] / max(float(bm25.max()), 1e-9)
+        keep = (cosine > threshold) | (lexical >= _LEXICAL_KEEP)
+        candidates, cosine, lexical = candidates[keep], cosine[keep], lexical[keep]
+        fused = dense_weight * cosine + (1 - dense_weight) * lexical
+        return [
+            self._row(candidates[j], float(cosine[j]), float(bm25[candidates[j]]), float(fused[j]))
+            for j in np.argsort(-fused)[:k]
+        ]
+
+    def _row(self, i: int, similarity: Optional[float], bm25: float, score: float) -> dict:
+        return {
+            "chunk_id": self.chunk_ids[i],
+            "content": self.contents[i],
+            "chunk_index": self.chunk_indexes[i],
+            "similarity": similarity,
+            "bm25": bm25,
+            "score": score,
+        }
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _is_ready(owner_id: str) -> bool:
+    material = get_material(owner_id)
+    return bool(material) and material.get("status") == "ready"
+
+
+def load_material_index(owner_id: str, build_ann: bool = False) -> MaterialIndex:
+    """
+    The material's search index. A missing or stale IVF index is rebuilt when
+    `build_ann` or the material is ready; before that the search is exact.
+    """
+    chunks = {c["id"]: c for c in get_chunks(owner_id)}
+    rows = [r for r in get_chunk_embeddings(owner_id) if r["chunk_id"] in chunks]
+    rows.sort(key=lambda r: chunks[r["chunk_id"]].get("chunk_index", 0))
+
+    matrix = np.empty((len(rows), 0), dtype=np.float32)
+    if rows:
+        matrix = np.stack([parse_vector(r["embedding"]) for r in rows])
+        matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    chunk_ids = [r["chunk_id"] for r in rows]
+    contents = [chunks[r["chunk_id"]]["content"] for r in rows]
+    matrix = np.ascontiguousarray(matrix)
+
+    ann = None
+    try:
+        ann = ann_index_for(owner_id, matrix, chunk_ids, lambda: build_ann or _is_ready(owner_id))
+    except Exception as e:
+        logger.warning(f"IVF index unavailable for {owner_id}, using exact search: {e}")
+    lexical = None
+    try:
+        lexical = lexical_index_for(owner_id, chunk_ids, contents)
+    except Exception as e:
+        logger.warning(f"Lexical index unavailable for {owner_id}, using dense search: {e}")
+    return MaterialIndex(
+        chunk_ids=chunk_ids,
+        contents=contents,
+        chunk_indexes=[chunks[r["chunk_id"]].get("chunk_index", 0) for r in rows],
+        matrix=matrix,
+        ann=ann,
+        lexical=lexical,
+    )
+
+
+class VectorIndexCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._indexes: OrderedDict[str, MaterialIndex] = OrderedDict()
+        self._loaded_at: dict[str, float] = {}
+        self._bytes = 0
+        # Bumped on invalidation, so a load that raced with a write isn't cached
+        self._generation: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, owner_id: str, build_ann: bool = False) -> MaterialIndex:
+        with self._lock:
+            index = self._indexes.get(owner_id)
+            if index is not None and time.monotonic() - self._loaded_at[owner_id] > settings.vector_index_ttl_s:
+                self._drop(owner_id)
+                self.expirations += 1
+                index = None
+            if index is not None:
+                self._indexes.move_to_end(owner_id)
+                self.hits += 1
+                return index
+            generation = self._generation.get(owner_id, 0)
+
+        index = load_material_index(owner_id, build_ann)
+        with self._lock:
+            self.loads += 1
+            if self._generation.get(owner_id, 0) == generation and owner_id not in self._indexes:
+                self._indexes[owner_id] = index
+                self._loaded_at[owner_id] = time.monotonic()
+                self._bytes += index.nbytes
+                self._evict()
+        return index
+
+    def _drop(self, owner_id: str):
+        """Remove one entry. Lock held."""
+        index = self._indexes.pop(owner_id, None)
+        self._loaded_at.pop(owner_id, None)
+        if index is not None:
+            self._bytes -= index.nbytes
+
+    def _evict(self):
+        """Drop least recently used indexes until under the cap. Lock held."""
+        while self._bytes > self.max_bytes and len(self._indexes) > 1:
+            self._drop(next(iter(self._indexes)))
+            self.evictions += 1
+
+    def invalidate(self, owner_id: str):
+        with self._lock:
+            self._generation[owner_id] = self._generation.get(owner_id, 0) + 1
+            self._drop(owner_id)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.loads
+        return {
+            "materials": len(self._indexes),
+            "size_mb": round(self._bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "loads": self.loads,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+@lru_cache
+def get_vector_index_cache() -> Optional[VectorIndexCache]:
+    if settings.vector_index_max_mb <= 0:
+        return None
+    return VectorIndexCache(settings.vector_index_max_mb * 1024 * 1024)
+
+
+def invalidate_material_index(material_id: str):
+    cache = get_vector_index_cache()
+    if cache is not None:
+        cache.invalidate(material_id)
+    user_cache = get_user_index_cache()
+    if user_cache is not None:
+        user_cache.invalidate_owner(material_id)
+
+
+# ═══════════════════════ Per-User Library Index ════════════════════════
+
+@dataclass
+class UserIndex:
+    owner_ids: frozenset[str]
+    row_owners: list[str]         # owner id of each matrix row
+    chunk_ids: list[str]
+    contents: list[str]
+    chunk_indexes: list[int]
+    matrix: np.ndarray            # [N, D] float32, rows L2-normalized
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + sum(len(c) for c in self.contents)
+
+    def ranked(self, query: np.ndarray, threshold: float, first: int) -> Iterator[tuple[int, float]]:
+        """(row, score) of rows above `threshold`, best first; only sorts past the `first` best if asked for more."""
+        if not len(self.chunk_ids):
+            return
+        scores = self.matrix @ query
+        top = _top(scores, first)
+        for i in top:
+            if scores[i] <= threshold:
+                return
+            yield int(i), float(scores[i])
+        rest = np.setdiff1d(np.arange(len(scores)), top, assume_unique=True)
+        for i in rest[np.argsort(-scores[rest])]:
+            if scores[i] <= threshold:
+                return
+            yield int(i), float(scores[i])
+
+    def patched(self, owner_ids: frozenset[str], drop: set[str], fresh: "UserIndex") -> "UserIndex":
+        """This index with `drop` owners' rows removed and `fresh`'s rows added."""
+        keep = [i for i, owner in enumerate(self.row_owners) if owner not in drop]
+        parts = [m for m in (self.matrix[keep], fresh.matrix) if len(m)]
+        return UserIndex(
+            owner_ids=owner_ids,
+            row_owners=[self.row_owners[i] for i in keep] + fresh.row_owners,
+            chunk_ids=[self.chunk_ids[i] for i in keep] + fresh.chunk_ids,
+            contents=[self.contents[i] for i in keep] + fresh.contents,
+            chunk_indexes=[self.chunk_indexes[i] for i in keep] + fresh.chunk_indexes,
+            matrix=np.ascontiguousarray(np.concatenate(parts) if parts else np.empty((0, 0), dtype=np.float32)),
+        )
+
+
+def load_user_index(owner_ids: frozenset[str]) -> UserIndex:
+    owners = sorted(owner_ids)
+    if not owners:
+        return UserIndex(owner_ids, [], [], [], [], np.empty((0, 0), dtype=np.float32))
+    chunks = {c["id"]: c for c in get_chunks_for_materials(owners)}
+    rows = [r for r in get_chunk_embeddings_for_materials(owners) if r["chunk_id"] in chunks]
+
+    matrix = np.empty((0, 0), dtype=np.float32)
+    if rows:
+        matrix = np.stack([parse_vector(r["embedding"]) for r in rows])
+        matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    return UserIndex(
+        owner_ids=owner_ids,
+        row_owners=[r["material_id"] for r in rows],
+        chunk_ids=[r["chunk_id"] for r in rows],
+        contents=[chunks[r["chunk_id"]]["content"] for r in rows],
+        chunk_indexes=[chunks[r["chunk_id"]].get("chunk_index", 0) for r in rows],
+        matrix=np.ascontiguousarray(matrix),
+    )
+
+
+class UserIndexCache:
+    """
+    LRU of per-user stacked indexes, bounded by bytes. When an owner's rows
+    change (every ingestion batch of a partially_ready material) or the
+    user's material set changes, only the affected owners' rows are reloaded
+    and spliced in; the rest of the user's index is kept. An index is
+    reloaded in full once settings.vector_index_ttl_s has passed since its
+    last full load.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._indexes: OrderedDict[str, UserIndex] = OrderedDict()
+        self._loaded_at: dict[str, float] = {}   # per user id, time of the last full load
+        self._stale: dict[str, set[str]] = {}    # per user id, owners whose rows changed
+        self._bytes = 0
+        self._generation: dict[str, int] = {}    # per owner id, bumped on invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.patches = 0
+        self.expirations = 0
+
+    def get(self, user_id: str, owner_ids: frozenset[str]) -> UserIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and time.monotonic() - self._loaded_at[user_id] > settings.vector_index_ttl_s:
+                self.expirations += 1
+                index = None
+            stale = set(self._stale.get(user_id, ()))
+            if index is not None and index.owner_ids == owner_ids and not stale:
+                self._indexes.move_to_end(user_id)
+                self.hits += 1
+                return index
+            generations = {o: self._generation.get(o, 0) for o in owner_ids}
+
+        full_load = index is None
+        if full_load:
+            index = load_user_index(owner_ids)
+        else:
+            fresh = load_user_index(frozenset((owner_ids - index.owner_ids) | (stale & owner_ids)))
+            index = index.patched(owner_ids, stale | (index.owner_ids - owner_ids), fresh)
+        with self._lock:
+            if full_load:
+                self.loads += 1
+            else:
+                self.patches += 1
+            if all(self._generation.get(o, 0) == g for o, g in generations.items()):
+                old = self._indexes.pop(user_id, None)
+                if old is not None:
+                    self._bytes -= old.nbytes
+                self._indexes[user_id] = index
+                self._bytes += index.nbytes
+                if full_load:
+                    self._loaded_at[user_id] = time.monotonic()
+                remaining = self._stale.pop(user_id, set()) - stale
+                if remaining:
+                    self._stale[user_id] = remaining
+                while self._bytes > self.max_bytes and len(self._indexes) > 1:
+                    evicted_user, evicted = self._indexes.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+                    self._stale.pop(evicted_user, None)
+                    self._loaded_at.pop(evicted_user, None)
+        return index
+
+    def invalidate_owner(self, owner_id: str):
+        with self._lock:
+            self._generation[owner_id] = self._generation.get(owner_id, 0) + 1
+            for user_id, index in self._indexes.items():
+                if owner_id in index.owner_ids:
+                    self._stale.setdefault(user_id, set()).add(owner_id)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.loads + self.patches
+        return {
+            "users": len(self._indexes),
+            "size_mb": round(self._bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "loads": self.loads,
+            "patches": self.patches,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+@lru_cache
+def get_user_index_cache() -> Optional[UserIndexCache]:
+    if settings.vector_index_max_mb <= 0:
+        return None
+    return UserIndexCache(settings.vector_index_max_mb * 1024 * 1024)
+
+
+def search_library(user_id: str, owners_by_material: dict[str, str], query: np.ndarray,
+                   k: int, per_material: int, threshold: float) -> list[dict]:
+    """
+    Score `query` against every listed material of a user in one pass and
+    group the best chunks by material: [{material_id, score, chunks: [...]}],
+    best material first. `owners_by_material` maps material id → content owner.
+    """
+    if not owners_by_material:
+        return []
+    owner_ids = frozenset(owners_by_material.values())
+    cache = get_user_index_cache()
+    index = cache.get(user_id, owner_ids) if cache is not None else load_user_index(owner_ids)
+    materials_by_owner: dict[str, list[str]] = {}
+    for material_id, owner_id in owners_by_material.items():
+        materials_by_owner.setdefault(owner_id, []).append(material_id)
+
+    # Rows come best first, so the first k materials seen are the top k; keep
+    # scanning only until each of them has per_material chunks
+    groups: dict[str, dict] = {}
+    open_groups = 0
+    for row, score in index.ranked(query, threshold, k * per_material):
+        for material_id in materials_by_owner.get(index.row_owners[row], []):
+            group = groups.get(material_id)
+            if group is None:
+                if len(groups) == k:
+                    continue
+                group = groups[material_id] = {"material_id": material_id, "score": score, "chunks": []}
+                open_groups += 1
+            if len(group["chunks"]) < per_material:
+                group["chunks"].append({
+                    "chunk_id": index.chunk_ids[row],
+                    "content": index.contents[row],
+                    "chunk_index": index.chunk_indexes[row],
+                    "similarity": score,
+                })
+                if len(group["chunks"]) == per_material:
+                    open_groups -= 1
+        if len(groups) == k and open_groups == 0:
+            break
+    return sorted(groups.values(), key=lambda g: -g["score"])
+
+
+def prepare_material_index(material_id: str):
+    """
+    Build (and persist) a freshly ingested material's IVF index now rather
+    than on its first chat turn, and warm the cache with it.
+    """
+    cache = get_vector_index_cache()
+    if cache is not None:
+        cache.invalidate(material_id)
+        cache.get(material_id, build_ann=True)
+    else:
+        load_material_index(material_id, build_ann=True)
@@ -1,9 +1,16 @@
 import os
-from typing import Optional
+import json
+import time
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 import logging
 from datetime import datetime, timezone, date
 from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory
 from src.database import get_supabase
+from src.config import settings
 
 _in_memory: dict = {
     "materials": {},
@@ -44,10 +51,13 @@ class _FakeTable:
     def __init__(self, name):
         self.name = name
         self._pending_insert: list | None = None
-        self._eq_field: str | None = None
-        self._eq_value = None
+        self._eq: dict = {}
+        self._gte: dict = {}
         self._update_data: dict | None = None
         self._single = False
+        self._range: tuple[int, int] | None = None
+        self._in_field: str | None = None
+        self._in_values: set = set()
 
     def insert(self, data):
         if isinstance(data, list):
@@ -61,17 +71,49 @@ class _FakeTable:
             self._pending_insert = [data]
         return self
 
+    def upsert(self, data, on_conflict: str = ""):
+        store = _in_memory.setdefault(self.name, {})
+        rows = data if isinstance(data, list) else [data]
+        by_key = {r.get(on_conflict): r for r in store.values()} if on_conflict else {}
+        for item in rows:
+            existing = by_key.get(item.get(on_conflict)) if on_conflict else None
+            if existing is not None:
+                existing.update(item)
+            else:
+                item["id"] = item.get("id", _get_next_id())
+                store[item["id"]] = item
+        self._pending_insert = rows
+        return self
+
     def select(self, *args):
         return self
 
     def eq(self, field, value):
-        self._eq_field = field
-        self._eq_value = value
+        self._eq[field] = value
+        return self
+
+    def gte(self, field, value):
+        self._gte[field] = value
+        return self
+
+    def _matches(self, record: dict) -> bool:
+        if self._in_field and record.get(self._in_field) not in self._in_values:
+            return False
+        return (all(record.get(f) == v for f, v in self._eq.items())
+                and all(record.get(f) is not None and record[f] >= v for f, v in self._gte.items()))
+
+    def in_(self, field, values):
+        self._in_field = field
+        self._in_values = set(values)
         return self
 
     def order(self, field):
         return self
 
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
     def maybe_single(self):
         self._single = True
         return self
@@ -88,20 +130,21 @@ class _FakeTable:
     def execute(self):
         if getattr(self, '_delete', False):
             store = _in_memory.get(self.name, {})
-            if self._eq_field:
-                keys = [k for k, v in store.items() if v.get(self._eq_field) == self._eq_value]
+            if self._eq or self._in_field or self._gte:
+                keys = [k for k, v in store.items() if self._matches(v)]
                 for k in keys:
                     store.pop(k, None)
             return self._make_response([])
         if self._pending_insert is not None:
             return self._make_response(self._pending_insert)
-        records = list(_in_memory.get(self.name, {}).values())
-        if self._eq_field:
-            records = [r for r in records if r.get(self._eq_field) == self._eq_value]
+        records = [r for r in _in_memory.get(self.name, {}).values() if self._matches(r)]
         if self._update_data is not None:
             for r in records:
                 r.update(self._update_data)
         
+        if self._range is not None:
+            records = records[self._range[0]:self._range[1] + 1]
+
         if self._single:
             data = records[0] if records else None
         else:
@@ -158,6 +201,14 @@ def list_materials(user_id: str) -> list[dict]:
     return data
 
 
+def list_batch_materials(user_id: str, batch_id: str) -> list[dict]:
+    """The user's materials created by one POST /api/materials/batch, oldest first."""
+    result = _robust_execute(
+        _table_supabase("materials").select("*").eq("user_id", user_id).eq("batch_id", batch_id).order("created_at")
+    )
+    return result.data or []
+
+
 def is_title_taken(title: str, exclude_id: Optional[str] = None, user_id: Optional[str] = None) -> bool:
     normalized = title.strip().lower()
     if not normalized:
@@ -184,12 +235,7 @@ def is_title_taken(title: str, exclude_id: Optional[str] = None, user_id: Option
     return False
 
 
-def create_material(user_id: str, source_type: str, title: str,
-                    file_path: Optional[str] = None,
-                    url: Optional[str] = None,
-                    topic: Optional[str] = None) -> dict:
-    now = datetime.now(timezone.utc).isoformat()
-    
+def _ensure_profile(user_id: str):
     # Ensure profile exists to avoid foreign key violations (Key (user_id) not present in table "profiles")
     try:
         # We use a direct check to avoid circular imports or complex logic
@@ -206,6 +252,14 @@ def create_material(user_id: str, source_type: str, title: str,
     except Exception as e:
         logger.error(f"Failed to ensure profile for user {user_id}: {e}")
 
+
+def create_material(user_id: str, source_type: str, title: str,
+                    file_path: Optional[str] = None,
+                    url: Optional[str] = None,
+                    topic: Optional[str] = None) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    _ensure_profile(user_id)
+
     # Workaround for DB check constraint that restricts source_type to 'pdf' or 'url'
     actual_source_type = source_type
     if source_type == "topic":
@@ -232,6 +286,45 @@ def create_material(user_id: str, source_type: str, title: str,
     return ret_data
 
 
+def create_materials_bulk(user_id: str, items: list[dict], batch_id: Optional[str] = None) -> list[dict]:
+    """
+    Create many materials with one profile check, one title lookup and one
+    insert. Each item has `source_type` and `title`, plus `url` for URLs.
+    `batch_id`, if given, is stored on every row (see list_batch_materials).
+    Returns the created rows in input order.
+    """
+    if not items:
+        return []
+    now = datetime.now(timezone.utc).isoformat()
+    _ensure_profile(user_id)
+
+    taken = {
+        (m.get("title") or "").strip().lower()
+        for m in list_materials(user_id)
+    }
+    records = []
+    for item in items:
+        # Same duplicate-title resolution as create_material, also across the batch itself
+        original_title = item["title"]
+        title = original_title
+        counter = 1
+        while title.strip().lower() in taken:
+            title = f"{original_title} ({counter})"
+            counter += 1
+        taken.add(title.strip().lower())
+
+        data = {"user_id": user_id, "source_type": item["source_type"], "title": title, "status": "pending",
+                "created_at": now, "updated_at": now}
+        if item.get("url"):
+            data["url"] = item["url"]
+        if batch_id:
+            data["batch_id"] = batch_id
+        records.append(data)
+
+    result = _robust_execute(_table_supabase("materials").insert(records))
+    return result.data
+
+
 def update_material_status(material_id: str, status: str,
                            error_message: Optional[str] = None):
     data = {"status": status}
@@ -240,6 +333,13 @@ def update_material_status(material_id: str, status: str,
     _robust_execute(_table_supabase("materials").update(data).eq("id", material_id))
 
 
+def update_material_progress(material_id: str, status: str, indexed_percent: int):
+    _robust_execute(_table_supabase("materials").update({
+        "status": status,
+        "indexed_percent": indexed_percent,
+    }).eq("id", material_id))
+
+
 def get_material(material_id: str) -> Optional[dict]:
     if material_id.startswith("temp-"):
         return None
@@ -276,32 +376,481 @@ def delete_material(material_id: str):
     _robust_execute(_table_supabase("chat_sessions").delete().eq("material_id", material_id))
     _robust_execute(_table_supabase("summaries").delete().eq("material_id", material_id))
     _robust_execute(_table_supabase("quizzes").delete().eq("material_id", material_id))
-    # Delete embeddings before chunks (FK dependency)
-    _robust_execute(_table_supabase("material_embeddings").delete().eq("material_id", material_id))
-    _robust_execute(_table_supabase("material_chunks").delete().eq("material_id", material_id))
+    try:
+        delete_checkpoint(material_id)
+    except Exception as e:
+        logger.warning(f"Failed to delete ingest checkpoint for material {material_id}: {e}")
+    # Cached indexes are keyed by content owner: note it before the ref goes
+    owner_id = resolve_content_owner(material_id)
+    # Shared content is only deleted together with its last reference
+    delete_content, new_owner = release_content_ref(material_id)
+    if delete_content:
+        # Delete embeddings before chunks (FK dependency)
+        _robust_execute(_table_supabase("material_embeddings").delete().eq("material_id", material_id))
+        _robust_execute(_table_supabase("material_chunks").delete().eq("material_id", material_id))
     _robust_execute(_table_supabase("materials").delete().eq("id", material_id))
 
+    from src.rag.vector_index import invalidate_material_index
+    from src.rag.ann_index import remove_ann_index
+    from src.rag.lexical_index import remove_lexical_index
+    # A handoff moves the rows from the old owner's id to the new one's
+    for stale_id in {material_id, owner_id, new_owner} - {None}:
+        invalidate_material_index(stale_id)
+    # If another material took over the content it rebuilds the indexes under its own id
+    remove_ann_index(material_id)
+    remove_lexical_index(material_id)
+
+
+# ── Content Registry ───────────────────────────────────
+#
+# `material_content` maps each material to the hash of its source (PDF bytes or
+# normalized URL) and to the owner material whose chunks + embeddings it uses.
+# The number of rows sharing a content_hash is that content's reference count.
+#
+# Owner lookups run on every search and get_chunks call, so they are cached.
+# add_content_ref / release_content_ref keep the cache current in this
+# process; the TTL bounds staleness from writes made by other processes.
+
+_OWNER_CACHE_MAX = 8192
+_OWNER_CACHE_TTL_S = 300
+_owner_cache: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+_owner_cache_lock = threading.Lock()
+
+
+def _cached_owner(material_id: str) -> Optional[str]:
+    with _owner_cache_lock:
+        entry = _owner_cache.get(material_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] > _OWNER_CACHE_TTL_S:
+            del _owner_cache[material_id]
+            return None
+        _owner_cache.move_to_end(material_id)
+        return entry[0]
+
+
+def _cache_owner(material_id: str, owner_id: str):
+    with _owner_cache_lock:
+        _owner_cache[material_id] = (owner_id, time.monotonic())
+        _owner_cache.move_to_end(material_id)
+        while len(_owner_cache) > _OWNER_CACHE_MAX:
+            _owner_cache.popitem(last=False)
+
+
+def _forget_owners(material_ids: list[str]):
+    with _owner_cache_lock:
+        for material_id in material_ids:
+            _owner_cache.pop(material_id, None)
+
+def find_content_owner(content_hash: str) -> Optional[str]:
+    """Return a ready material whose chunks and embeddings can be shared, if any."""
+    try:
+        result = _robust_execute(_table_supabase("material_content").select("owner_id").eq("content_hash", content_hash))
+        owner_ids = sorted({row["owner_id"] for row in result.data or []})
+        if not owner_ids:
+            return None
+        ready = _robust_execute(
+            _table_supabase("materials").select("id").in_("id", owner_ids).eq("status", "ready")
+        )
+        if ready.data:
+            return ready.data[0]["id"]
+    except Exception as e:
+        logger.warning(f"Content registry lookup failed for {content_hash[:16]}: {e}")
+    return None
+
+
+def add_content_ref(material_id: str, content_hash: str, owner_id: str):
+    try:
+        _robust_execute(_table_supabase("material_content").insert({
+            "material_id": material_id,
+            "content_hash": content_hash,
+            "owner_id": owner_id,
+        }))
+        _cache_owner(material_id, owner_id)
+    except Exception as e:
+        _forget_owners([material_id])
+        logger.warning(f"Failed to register content for material {material_id}: {e}")
+
+
+def resolve_content_owner(material_id: str) -> str:
+    """Material id under which this material's chunks and embeddings are stored."""
+    owner_id = _cached_owner(material_id)
+    if owner_id is not None:
+        return owner_id
+    try:
+        result = _robust_execute(_table_supabase("material_content").select("*").eq("material_id", material_id))
+    except Exception:
+        return material_id
+    owner_id = result.data[0]["owner_id"] if result.data else material_id
+    _cache_owner(material_id, owner_id)
+    return owner_id
+
+
+def resolve_content_owners(material_ids: list[str]) -> dict[str, str]:
+    """resolve_content_owner for many materials in one query."""
+    owners: dict[str, str] = {}
+    missing = []
+    for mid in material_ids:
+        owner_id = _cached_owner(mid)
+        if owner_id is None:
+            missing.append(mid)
+        else:
+            owners[mid] = owner_id
+    if not missing:
+        return owners
+    try:
+        result = _robust_execute(
+            _table_supabase("material_content").select("material_id,owner_id").in_("material_id", missing)
+        )
+    except Exception:
+        owners.update((mid, mid) for mid in missing)
+        return owners
+    found = {row["material_id"]: row["owner_id"] for row in result.data or []}
+    for mid in missing:
+        owners[mid] = found.get(mid, mid)
+        _cache_owner(mid, owners[mid])
+    return owners
+
+
+def release_content_ref(material_id: str) -> tuple[bool, Optional[str]]:
+    """
+    Drop a material's reference to its content. Returns `(delete, new_owner)`:
+    `delete` is True when the caller should delete the material's chunks and
+    embeddings, i.e. it owned them and was the last reference. If other
+    references remain, ownership of the chunks and embeddings moves to one of
+    them instead, and `new_owner` is that material's id.
+    """
+    try:
+        result = _robust_execute(_table_supabase("material_content").select("*").eq("material_id", material_id))
+    except Exception:
+        return True, None
+    if not result.data:
+        return True, None
+
+    row = result.data[0]
+    _robust_execute(_table_supabase("material_content").delete().eq("material_id", material_id))
+    _forget_owners([material_id])
+    if row["owner_id"] != material_id:
+        return False, None
+
+    remaining = _robust_execute(_table_supabase("material_content").select("*").eq("content_hash", row["content_hash"]))
+    if not remaining.data:
+        return True, None
+
+    new_owner = remaining.data[0]["material_id"]
+    _robust_execute(_table_supabase("material_chunks").update({"material_id": new_owner}).eq("material_id", material_id))
+    _robust_execute(_table_supabase("material_embeddings").update({"material_id": new_owner}).eq("material_id", material_id))
+    _robust_execute(_table_supabase("material_content").update({"owner_id": new_owner}).eq("content_hash", row["content_hash"]))
+    _forget_owners([r["material_id"] for r in remaining.data])
+    logger.info(f"Content {row['content_hash'][:16]} handed from material {material_id} to {new_owner}")
+    return False, new_owner
+
+
+# ── Ingestion Checkpoints ──────────────────────────────
+#
+# One `ingest_checkpoints` row per material while it is being ingested:
+# where its source lives and how many chunks are already persisted, so an
+# ingestion cut short by a restart can be resumed instead of redone.
+
+_PAGE_ROWS = 1000
+
+
+def save_checkpoint(material_id: str, data: dict):
+    data = {**data, "material_id": material_id,
+            "updated_at": datetime.now(timezone.utc).isoformat()}
+    existing = _robust_execute(_table_supabase("ingest_checkpoints").select("material_id").eq("material_id", material_id))
+    if existing.data:
+        _robust_execute(_table_supabase("ingest_checkpoints").update(data).eq("material_id", material_id))
+    else:
+        _robust_execute(_table_supabase("ingest_checkpoints").insert(data))
+
+
+def get_checkpoint(material_id: str) -> Optional[dict]:
+    result = _robust_execute(_table_supabase("ingest_checkpoints").select("*").eq("material_id", material_id))
+    return result.data[0] if result.data else None
+
+
+def delete_checkpoint(material_id: str):
+    _robust_execute(_table_supabase("ingest_checkpoints").delete().eq("material_id", material_id))
+
+
+def list_checkpoint_sources() -> set[str]:
+    """Source paths / URLs of every checkpoint (spool files still in use)."""
+    sources: set[str] = set()
+    start = 0
+    while True:
+        result = _robust_execute(
+            _table_supabase("ingest_checkpoints")
+            .select("material_id,source")
+            .order("material_id")
+            .range(start, start + _PAGE_ROWS - 1)
+        )
+        rows = result.data or []
+        sources.update(r["source"] for r in rows if r.get("source"))
+        if len(rows) < _PAGE_ROWS:
+            return sources
+        start += _PAGE_ROWS
+
+
+def list_materials_by_status(statuses: list[str]) -> list[dict]:
+    rows = []
+    for status in statuses:
+        result = _robust_execute(_table_supabase("materials").select("*").eq("status", status))
+        rows.extend(result.data or [])
+    return rows
+
+
+def get_embedded_chunk_ids(material_id: str) -> set[str]:
+    """Ids of the material's chunks that already have an embedding row."""
+    ids: set[str] = set()
+    start = 0
+    while True:
+        result = _robust_execute(
+            _table_supabase("material_embeddings")
+            .select("chunk_id")
+            .eq("material_id", material_id)
+            .order("chunk_id")
+            .range(start, start + _PAGE_ROWS - 1)
+        )
+        rows = result.data or []
+        ids.update(r["chunk_id"] for r in rows)
+        if len(rows) < _PAGE_ROWS:
+            return ids
+        start += _PAGE_ROWS
+
+
+def get_chunk_embeddings(material_id: str) -> list[dict]:
+    """All `{chunk_id, embedding}` rows stored under `material_id` (an owner id)."""
+    rows: list[dict] = []
+    while True:
+        result = _robust_execute(
+            _table_supabase("material_embeddings")
+            .select("chunk_id,embedding")
+            .eq("material_id", material_id)
+            .order("chunk_id")
+            .range(len(rows), len(rows) + _PAGE_ROWS - 1)
+        )
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < _PAGE_ROWS:
+            return rows
+
+
+def _select_in_pages(table: str, columns: str, field: str, values: list[str], order: str) -> list[dict]:
+    rows: list[dict] = []
+    while True:
+        # A stable order keeps pages from overlapping
+        result = _robust_execute(
+            _table_supabase(table)
+            .select(columns)
+            .in_(field, values)
+            .order(order)
+            .range(len(rows), len(rows) + _PAGE_ROWS - 1)
+        )
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < _PAGE_ROWS:
+            return rows
+
+
+def get_chunks_for_materials(owner_ids: list[str]) -> list[dict]:
+    """Chunk rows of several materials (owner ids) in one paged query."""
+    return _select_in_pages("material_chunks", "id,material_id,chunk_index,content", "material_id", owner_ids, "id")
+
+
+def get_chunk_embeddings_for_materials(owner_ids: list[str]) -> list[dict]:
+    """`{chunk_id, material_id, embedding}` rows of several materials (owner ids) in one paged query."""
+    return _select_in_pages("material_embeddings", "chunk_id,material_id,embedding", "material_id", owner_ids, "chunk_id")
+
+
+# ── Bulk Writes ────────────────────────────────────────
+
+_BULK_MIN_BYTES = 16 * 1024
+_BULK_MAX_BYTES = 1024 * 1024
+_BULK_TARGET_S = 0.5          # aim for requests that take about this long
+_BULK_RETRIES = 3
+
+
+class BulkWriter:
+    """
+    Inserts many rows into one table as parallel, byte-sized batches.
+
+    - Batches are cut by JSON payload size, not row count, so 50 chunk rows
+      and 50 embedding rows no longer cost the same round trip.
+    - The byte target adapts: it follows the observed insert throughput so a
+      batch takes about _BULK_TARGET_S, clamped to [16 KB, 1 MB].
+    - Up to `max_in_flight` batches are sent at once.
+    - A failed batch is retried on its own with backoff; other batches of the
+      same call are not resent.
+    - With a `conflict_key` batches are upserted on that column, so a retry
+      after a request that did land (say, a timeout) rewrites the same rows
+      instead of adding them twice. Records must carry the key.
+    """
+
+    def __init__(self, table: str, max_in_flight: int, initial_bytes: int,
+                 table_factory: Optional[Callable[[str], object]] = None,
+                 conflict_key: Optional[str] = None):
+        self.table = table
+        self.conflict_key = conflict_key
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_bytes = min(max(initial_bytes, _BULK_MIN_BYTES), _BULK_MAX_BYTES)
+        self._table_factory = table_factory or _table_supabase
+        self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix=f"bulk_{table}")
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.retries = 0
+
+    def _split(self, records: list[dict]) -> list[tuple[list[dict], int]]:
+        """Byte-sized batches, each with its payload size."""
+        batches: list[tuple[list[dict], int]] = []
+        current: list[dict] = []
+        size = 0
+        target = self.target_bytes
+        for record in records:
+            record_bytes = len(json.dumps(record, default=str))
+            if current and size + record_bytes > target:
+                batches.append((current, size))
+                current, size = [], 0
+            current.append(record)
+            size += record_bytes
+        if current:
+            batches.append((current, size))
+        return batches
+
+    def _request(self, batch: list[dict]):
+        table = self._table_factory(self.table)
+        if self.conflict_key:
+            return table.upsert(batch, on_conflict=self.conflict_key)
+        return table.insert(batch)
+
+    def _send(self, batch: list[dict], payload_bytes: int) -> list[dict]:
+        for attempt in range(_BULK_RETRIES):
+            t0 = time.monotonic()
+            try:
+                result = self._request(batch).execute()
+                break
+            except Exception as e:
+                if attempt == _BULK_RETRIES - 1:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                logger.warning(f"Insert of {len(batch)} rows into {self.table} failed, retrying: {e}")
+                time.sleep(0.5 * (attempt + 1))
+        elapsed = max(time.monotonic() - t0, 1e-3)
+        with self._lock:
+            self.batches += 1
+            # Resize toward the bytes one request moves in _BULK_TARGET_S, smoothed
+            wanted = payload_bytes / elapsed * _BULK_TARGET_S
+            blended = int(0.7 * self.target_bytes + 0.3 * wanted)
+            self.target_bytes = min(max(blended, _BULK_MIN_BYTES), _BULK_MAX_BYTES)
+        return result.data or []
+
+    def insert(self, records: list[dict]) -> list[dict]:
+        """Insert all records; returns the inserted rows in input order. Raises if any batch fails."""
+        if not records:
+            return []
+        batches = self._split(records)
+        if len(batches) == 1:
+            return self._send(*batches[0])
+        futures = [self._pool.submit(self._send, batch, size) for batch, size in batches]
+        rows: list[dict] = []
+        for future in futures:
+            rows.extend(future.result())
+        return rows
+
+    def stats(self) -> dict:
+        return {
+            "target_kb": round(self.target_bytes / 1024, 1),
+            "max_in_flight": self.max_in_flight,
+            "batches": self.batches,
+            "retries": self.retries,
+        }
+
+
+_bulk_writers: dict[str, BulkWriter] = {}
+# Column each table's retried batches upsert on (see BulkWriter)
+_BULK_CONFLICT_KEYS = {"material_chunks": "id", "material_embeddings": "chunk_id"}
+
+
+def get_bulk_writer(table: str) -> BulkWriter:
+    """Shared writer per table, so the learned batch size carries across materials."""
+    writer = _bulk_writers.get(table)
+    if writer is None:
+        writer = _bulk_writers.setdefault(
+            table, BulkWriter(table, settings.db_write_concurrency, settings.db_write_batch_kb * 1024,
+                              conflict_key=_BULK_CONFLICT_KEYS.get(table))
+        )
+    return writer
+
+
+def bulk_insert(table: str, records: list[dict]) -> list[dict]:
+    return get_bulk_writer(table).insert(records)
+
+
+def bulk_writer_stats() -> dict:
+    return {table: writer.stats() for table, writer in _bulk_writers.items()}
+
 
 # ── Material Chunks ────────────────────────────────────
 
-def save_chunks(material_id: str, chunks: list[str]) -> list[str]:
+def save_chunks(material_id: str, chunks: list[str], start_index: int = 0) -> list[str]:
+    # Ids are generated here so a retried batch upserts instead of duplicating
     records = [
-        {"material_id": material_id, "chunk_index": i, "content": c}
+        {"id": str(uuid.uuid4()), "material_id": material_id, "chunk_index": start_index + i, "content": c}
         for i, c in enumerate(chunks)
     ]
-    result = _robust_execute(_table_supabase("material_chunks").insert(records))
-    return [r["id"] for r in result.data]
+    bulk_insert("material_chunks", records)
+    return [r["id"] for r in records]
+
+
+_DELETE_IN_ROWS = 200   # ids per `in` filter, keeps the request URL short
+
+
+def delete_chunks_from(material_id: str, start_index: int) -> int:
+    """
+    Delete the material's chunks with chunk_index >= start_index, and their
+    embeddings. Used on resume: parallel bulk sub-batches can leave scattered
+    rows past the last checkpointed chunk. Returns the number of chunks deleted.
+    """
+    ids: list[str] = []
+    while True:
+        result = _robust_execute(
+            _table_supabase("material_chunks")
+            .select("id")
+            .eq("material_id", material_id)
+            .gte("chunk_index", start_index)
+            .order("id")
+            .range(len(ids), len(ids) + _PAGE_ROWS - 1)
+        )
+        page = result.data or []
+        ids.extend(r["id"] for r in page)
+        if len(page) < _PAGE_ROWS:
+            break
+    for start in range(0, len(ids), _DELETE_IN_ROWS):
+        batch = ids[start:start + _DELETE_IN_ROWS]
+        # Embeddings first (FK dependency)
+        _robust_execute(_table_supabase("material_embeddings").delete().in_("chunk_id", batch))
+        _robust_execute(_table_supabase("material_chunks").delete().in_("id", batch))
+    return len(ids)
 
 
 def get_chunks(material_id: str) -> list[dict]:
-    result = (
-        _table_supabase("material_chunks")
-        .select("*")
-        .eq("material_id", material_id)
-        .order("chunk_index")
-        .execute()
-    )
-    return result.data
+    owner_id = resolve_content_owner(material_id)
+    # Page through: PostgREST caps a single response at _PAGE_ROWS rows
+    rows: list[dict] = []
+    while True:
+        result = (
+            _table_supabase("material_chunks")
+            .select("*")
+            .eq("material_id", owner_id)
+            .order("chunk_index")
+            .range(len(rows), len(rows) + _PAGE_ROWS - 1)
+            .execute()
+        )
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < _PAGE_ROWS:
+            return rows
 
 
 # ── Summaries ──────────────────────────────────────────
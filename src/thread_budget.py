@@ -0,0 +1,128 @@
+"""
+Thread Budget — One CPU budget split between inference, parsing and I/O.
+
+Architecture:
+  - settings.cpu_budget cores are split into:
+      inference: torch (or ONNX Runtime) intra-op threads for the embedder;
+                 with the embedding process pool, divided between its processes
+                 and this process, which embeds chat queries alongside them
+      parse:     HTML / unstructured parsing threads
+  - PDF extraction processes are sized separately (settings.pdf_workers, capped
+    at the budget): extraction is a burst at the start of an ingestion, so it
+    borrows cores from inference rather than getting a permanent share.
+  - I/O threads (Supabase calls, file spooling) mostly wait on the network,
+    so they get their own pool sized by settings.io_threads, outside the budget.
+  - Named executors replace the shared default ThreadPoolExecutor:
+      "inference" — 1 thread for embedding passes, documents and chat queries
+                    alike (torch parallelises inside the pass, and the same
+                    thread stays warm); queries go between document buckets
+      "parse"     — CPU-bound extraction (chunking producer, scrap_website)
+      "io"        — everything else; also installed as the loop's default executor
+  - configure_threads() applies the layout once at startup and logs it.
+"""
+
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ThreadLayout:
+    cpu_budget: int
+    inference_threads: int       # intra-op threads per inference process
+    inference_processes: int     # 1 = in-process inference, >1 = embedding process pool
+    parse_threads: int
+    pdf_processes: int
+    io_threads: int
+
+    @property
+    def inference_shares(self) -> int:
+        """Inference passes that can run at once: one per pool process, plus this process's query lane."""
+        return self.inference_processes + 1 if self.inference_processes > 1 else 1
+
+    def describe(self) -> str:
+        inference = self.inference_threads * self.inference_shares
+        cpu_bound = inference + self.parse_threads
+        if self.inference_processes > 1:
+            queries = f"this process, {self.inference_threads} threads, alongside the pool"
+        else:
+            queries = "same thread, between document buckets"
+        lines = [
+            f"CPU budget {self.cpu_budget} cores (machine has {os.cpu_count()})",
+            f"  inference: {self.inference_processes} process(es) × {self.inference_threads} intra-op threads, 1 inter-op",
+            f"  queries:   {queries}",
+            f"  parse:     {self.parse_threads} threads",
+            f"  pdf:       up to {self.pdf_processes} extraction processes (PDF_WORKERS={settings.pdf_workers}, "
+            f"capped at the budget; parallel from {settings.pdf_parallel_min_pages} pages)",
+            f"  io:        {self.io_threads} threads (network-bound, outside the budget)",
+        ]
+        if cpu_bound > self.cpu_budget:
+            lines.append(f"  WARNING: {cpu_bound} CPU-bound threads for {self.cpu_budget} cores (oversubscribed)")
+        return "\n".join(lines)
+
+
+@lru_cache
+def get_layout() -> ThreadLayout:
+    budget = max(1, settings.cpu_budget)
+    parse = settings.parse_threads if settings.parse_threads > 0 else max(1, budget // 4)
+    processes = max(1, settings.embedding_workers)
+    shares = processes + 1 if processes > 1 else 1     # see ThreadLayout.inference_shares
+    inference = max(1, (budget - parse) // shares) if budget > parse else 1
+    return ThreadLayout(
+        cpu_budget=budget,
+        inference_threads=inference,
+        inference_processes=processes,
+        parse_threads=parse,
+        pdf_processes=max(1, min(settings.pdf_workers, budget)),
+        io_threads=max(1, settings.io_threads),
+    )
+
+
+_EXECUTOR_SIZES = {
+    "inference": lambda layout: 1,
+    "parse": lambda layout: layout.parse_threads,
+    "io": lambda layout: layout.io_threads,
+}
+
+
+@lru_cache
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """The named executor ("inference", "parse" or "io")."""
+    size = _EXECUTOR_SIZES[name](get_layout())
+    return ThreadPoolExecutor(max_workers=size, thread_name_prefix=name)
+
+
+def set_torch_threads(threads: int):
+    """Pin torch's intra-op pool to `threads` and inter-op to 1. Call before the first forward pass."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError) as e:
+        # RuntimeError: inter-op threads can only be set before any parallel work
+        logger.warning(f"Could not set torch thread counts: {e}")
+
+
+_configured = False
+
+
+def configure_threads(loop: asyncio.AbstractEventLoop):
+    """Apply the layout: torch threads, the loop's default executor, and log it. Call once at startup."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    layout = get_layout()
+    # In pool mode the parent only embeds chat queries; the processes take the rest
+    set_torch_threads(layout.inference_threads)
+    loop.set_default_executor(get_executor("io"))
+    logger.info("Thread layout:\n" + layout.describe())
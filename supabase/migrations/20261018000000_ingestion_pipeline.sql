@@ -0,0 +1,42 @@
+-- Schema for the staged ingestion pipeline, content sharing and resumable
+-- ingestion (src/store.py). Safe to re-run.
+
+-- ── materials: progress while partially indexed ─────────────────────────
+alter table public.materials
+    add column if not exists indexed_percent smallint not null default 0
+        check (indexed_percent between 0 and 100);
+
+alter table public.materials drop constraint if exists materials_status_check;
+alter table public.materials
+    add constraint materials_status_check
+        check (status in ('pending', 'processing', 'partially_ready', 'ready', 'failed'));
+
+-- ── material_content: content hash → material whose chunks are shared ───
+-- The number of rows with one content_hash is that content's reference count.
+create table if not exists public.material_content (
+    material_id  uuid primary key references public.materials (id) on delete cascade,
+    content_hash text not null,
+    owner_id     uuid not null references public.materials (id),
+    created_at   timestamptz not null default now()
+);
+create index if not exists material_content_hash_idx on public.material_content (content_hash);
+create index if not exists material_content_owner_idx on public.material_content (owner_id);
+
+-- ── ingest_checkpoints: one row per material while it is being ingested ──
+create table if not exists public.ingest_checkpoints (
+    material_id      uuid primary key references public.materials (id) on delete cascade,
+    source_type      text not null check (source_type in ('pdf', 'url')),
+    source           text not null,
+    content_hash     text,
+    chunks_persisted integer not null default 0,
+    extraction_done  boolean not null default false,
+    updated_at       timestamptz not null default now()
+);
+-- URLs: hash of the extracted page text, so a resume notices the page changed
+alter table public.ingest_checkpoints add column if not exists text_hash text;
+
+-- Paged reads order by these columns (get_chunks, get_chunk_embeddings, ...)
+create index if not exists material_chunks_material_idx
+    on public.material_chunks (material_id, chunk_index);
+create index if not exists material_embeddings_material_idx
+    on public.material_embeddings (material_id, chunk_id);
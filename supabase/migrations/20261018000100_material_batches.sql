@@ -0,0 +1,4 @@
+-- Batch membership for POST /api/materials/batch (store.list_batch_materials).
+alter table public.materials add column if not exists batch_id uuid;
+create index if not exists materials_batch_idx
+    on public.materials (user_id, batch_id) where batch_id is not null;
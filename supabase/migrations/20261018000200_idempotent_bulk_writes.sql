@@ -0,0 +1,10 @@
+-- BulkWriter (src/store.py) upserts embedding batches on chunk_id so a
+-- retried request cannot store a chunk's embedding twice. Safe to re-run.
+
+-- Drop duplicates left by earlier retried inserts, keeping one row per chunk
+delete from public.material_embeddings a
+    using public.material_embeddings b
+    where a.chunk_id = b.chunk_id and a.ctid > b.ctid;
+
+create unique index if not exists material_embeddings_chunk_key
+    on public.material_embeddings (chunk_id);
@@ -0,0 +1,61 @@
+"""
+Admission control: uploads are turned away with 503 once the ingestion queue is full.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.dependencies import get_current_user, get_current_user_id
+from src.materials import routes
+from src.materials.scheduler import IngestionScheduler
+
+MAX_QUEUED = 3
+
+
+async def _never_run(*args):
+    raise AssertionError("workers are not started in this test")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Workers never start, so submitted jobs stay queued
+    full = IngestionScheduler(workers=1, max_queued=MAX_QUEUED)
+    for i in range(MAX_QUEUED):
+        full.submit(f"user-{i}", _never_run)
+    monkeypatch.setattr(routes, "scheduler", full)
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_current_user_id] = lambda: "user-x"
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-x"}
+    return TestClient(app), full
+
+
+def test_saturated_counts_incoming_jobs():
+    scheduler = IngestionScheduler(workers=1, max_queued=2)
+    assert not scheduler.saturated(2)
+    assert scheduler.saturated(3)
+    scheduler.submit("a", _never_run)
+    assert scheduler.saturated(2)
+    assert not scheduler.saturated(1)
+
+
+def test_scrape_url_answers_503_when_queue_full(client):
+    client, full = client
+    response = client.post("/api/materials/scrape-url", json={"url": "https://example.com/article"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(routes._RETRY_AFTER_S)
+    assert full.depth() == MAX_QUEUED
+
+
+def test_batch_rejected_whole_when_items_do_not_fit(client, monkeypatch):
+    client, full = client
+    monkeypatch.setattr(full, "max_queued", MAX_QUEUED + 1)
+    response = client.post("/api/materials/batch",
+                           data={"urls": ["https://example.com/a", "https://example.com/b"]})
+    assert response.status_code == 503
+    assert full.depth() == MAX_QUEUED
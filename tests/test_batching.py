@@ -0,0 +1,53 @@
+"""
+Length buckets and the adaptive batching window (src/rag/batch_workers.py).
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.rag.batch_workers import AdaptiveBatcher, length_buckets
+
+
+def test_buckets_stay_within_the_token_budget():
+    lengths = [120, 8, 9, 128, 10, 64, 7, 100]
+    buckets = length_buckets(lengths, token_budget=256)
+    assert sorted(i for b in buckets for i in b) == list(range(len(lengths)))
+    for bucket in buckets:
+        assert max(lengths[i] for i in bucket) * len(bucket) <= 256
+    # Short texts are grouped together instead of padding up to the long ones
+    assert sorted(buckets[0]) == [1, 2, 4, 6]
+
+
+def test_text_longer_than_the_budget_gets_its_own_bucket():
+    assert length_buckets([500, 5], token_budget=100) == [[1], [0]]
+    assert length_buckets([], token_budget=100) == []
+
+
+def _queue(pending: int, gap_s):
+    return SimpleNamespace(pending_texts=lambda: pending, arrival_gap_s=gap_s)
+
+
+@pytest.fixture
+def batcher():
+    return AdaptiveBatcher(max_texts=256, max_window_s=0.05)
+
+
+def test_no_wait_when_a_full_batch_is_queued(batcher):
+    assert batcher.window(_queue(300, 0.001), collected_texts=0) == 0.0
+    assert batcher.window(_queue(200, 0.001), collected_texts=56) == 0.0
+
+
+def test_no_wait_for_sparse_arrivals(batcher):
+    assert batcher.window(_queue(1, None), 0) == 0.0
+    assert batcher.window(_queue(1, 1.0), 0) == 0.0
+
+
+def test_window_follows_arrivals_capped_by_inference_time(batcher):
+    assert batcher.window(_queue(1, 0.02), 0) == pytest.approx(0.02)
+    batcher.observe_batch([], started_at=0.0, infer_s=0.04)
+    assert batcher.window(_queue(1, 0.02), 0) == pytest.approx(0.01)
+    assert batcher.stats()["inference_ewma_s"] == pytest.approx(0.04)
@@ -0,0 +1,63 @@
+"""
+Byte-sized bulk writer (src/store.py BulkWriter), against the in-memory tables.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import pytest
+
+from src import store
+from src.store import BulkWriter
+
+TABLE = "bulk_test_rows"
+
+
+@pytest.fixture(autouse=True)
+def _empty_table():
+    store._in_memory.pop(TABLE, None)
+    yield
+    store._in_memory.pop(TABLE, None)
+
+
+def _rows(n: int) -> list[dict]:
+    return [{"id": f"r{i}", "n": i, "text": "x" * 40} for i in range(n)]
+
+
+def test_split_cuts_batches_by_bytes():
+    writer = BulkWriter(TABLE, 2, 16 * 1024, table_factory=store._FakeTable)
+    writer.target_bytes = 200
+    batches = writer._split(_rows(10))
+    assert len(batches) > 1
+    assert [r["n"] for batch, _ in batches for r in batch] == list(range(10))
+    for batch, size in batches:
+        # A batch only overshoots the target when it holds a single record
+        assert size <= writer.target_bytes or len(batch) == 1
+
+
+def test_insert_returns_rows_in_input_order():
+    writer = BulkWriter(TABLE, 4, 16 * 1024, table_factory=store._FakeTable)
+    writer.target_bytes = 200
+    rows = writer.insert(_rows(25))
+    assert [r["n"] for r in rows] == list(range(25))
+    assert len(store._in_memory[TABLE]) == 25
+    assert writer.batches > 1
+
+
+def test_retry_with_conflict_key_does_not_duplicate_rows():
+    calls = {"n": 0}
+
+    class _LandsThenTimesOut(store._FakeTable):
+        def execute(self):
+            result = super().execute()
+            calls["n"] += 1
+            if calls["n"] == 1:
+                # The write landed, but the client never saw the response
+                raise TimeoutError("read timed out")
+            return result
+
+    writer = BulkWriter(TABLE, 1, 16 * 1024, table_factory=_LandsThenTimesOut, conflict_key="id")
+    rows = writer.insert(_rows(3))
+    assert [r["n"] for r in rows] == [0, 1, 2]
+    assert len(store._in_memory[TABLE]) == 3
+    assert writer.retries == 1
@@ -0,0 +1,51 @@
+"""
+Content sharing between identical uploads (src/store.py content registry) on the in-memory store.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+from src import store
+
+
+def _material(title: str, status: str = "ready") -> str:
+    material_id = store.create_material(user_id="u1", source_type="pdf", title=title)["id"]
+    store.update_material_progress(material_id, status, 100 if status == "ready" else 0)
+    return material_id
+
+
+def test_find_content_owner_only_returns_ready_owners():
+    processing = _material("processing copy", status="processing")
+    store.add_content_ref(processing, "sha:a", processing)
+    assert store.find_content_owner("sha:a") is None
+
+    ready = _material("ready copy")
+    store.add_content_ref(ready, "sha:a", ready)
+    assert store.find_content_owner("sha:a") == ready
+    assert store.find_content_owner("sha:unknown") is None
+
+
+def test_last_reference_hands_chunks_over_then_deletes():
+    owner = _material("original")
+    store.save_chunks(owner, ["shared text"])
+    store.add_content_ref(owner, "sha:b", owner)
+    copy = _material("copy")
+    store.add_content_ref(copy, "sha:b", owner)
+    assert store.resolve_content_owner(copy) == owner
+
+    # The owner goes first: its chunks move to the remaining reference
+    assert store.release_content_ref(owner) == (False, copy)
+    assert store.resolve_content_owner(copy) == copy
+    assert [c["content"] for c in store.get_chunks(copy)] == ["shared text"]
+
+    # The last reference takes the content with it
+    assert store.release_content_ref(copy) == (True, None)
+
+
+def test_releasing_a_non_owner_keeps_the_content():
+    owner = _material("original 2")
+    store.add_content_ref(owner, "sha:c", owner)
+    copy = _material("copy 2")
+    store.add_content_ref(copy, "sha:c", owner)
+    assert store.release_content_ref(copy) == (False, None)
+    assert store.find_content_owner("sha:c") == owner
@@ -0,0 +1,19 @@
+"""
+Embedding backend selection (src/rag/embedders.py).
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import pytest
+
+from src.config import settings
+from src.rag import embedders
+
+
+def test_missing_onnx_model_fails_instead_of_falling_back(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "embedding_backend", "onnx")
+    monkeypatch.setattr(settings, "onnx_model_dir", str(tmp_path))
+    monkeypatch.setattr(embedders, "TorchEmbeddings", lambda: pytest.fail("fell back to torch"))
+    with pytest.raises(RuntimeError, match="EMBEDDING_BACKEND=onnx"):
+        embedders.build_embedder()
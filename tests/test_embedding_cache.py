@@ -0,0 +1,59 @@
+"""
+On-disk embedding cache (src/rag/embedding_cache.py).
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import numpy as np
+
+from src.rag.embedding_cache import EmbeddingCache
+
+MODEL = "test-model"
+DIM = 8
+ROW_BYTES = DIM * 4
+
+
+def _vectors(n: int, start: int = 0) -> np.ndarray:
+    return np.arange(start * DIM, (start + n) * DIM, dtype=np.float32).reshape(n, DIM)
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20)
+    cache.put_many(MODEL, ["a", "b"], _vectors(2))
+    got = cache.get_many(MODEL, ["a", "missing", "b", "a"])
+    assert got[1] is None
+    np.testing.assert_array_equal(got[0], _vectors(1)[0])
+    np.testing.assert_array_equal(got[2], _vectors(1, 1)[0])
+    np.testing.assert_array_equal(got[3], got[0])
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.stats()["entries"] == 2
+
+
+def test_keys_ignore_whitespace_and_model(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20)
+    cache.put_many(MODEL, ["two  words\n"], _vectors(1))
+    assert cache.get_many(MODEL, ["two words"])[0] is not None
+    assert cache.get_many("other-model", ["two words"])[0] is None
+
+
+def test_eviction_keeps_recent_hits_without_writing_on_read(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_bytes=4 * ROW_BYTES)
+    cache.put_many(MODEL, ["old", "hot"], _vectors(2))
+    cache.put_many(MODEL, ["mid1", "mid2"], _vectors(2, 2))
+    assert cache.get_many(MODEL, ["hot"])[0] is not None
+    assert cache._conn.in_transaction is False   # the hit wasn't written yet
+
+    cache.put_many(MODEL, ["new"], _vectors(1, 4))
+    present = [t for t, v in zip(["old", "hot", "mid1", "mid2", "new"],
+                                 cache.get_many(MODEL, ["old", "hot", "mid1", "mid2", "new"])) if v is not None]
+    assert "hot" in present and "new" in present and "old" not in present
+    assert cache.stats()["size_mb"] * 1024 * 1024 <= 4 * ROW_BYTES
+
+
+def test_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    EmbeddingCache(path, max_bytes=1 << 20).put_many(MODEL, ["a"], _vectors(1))
+    reopened = EmbeddingCache(path, max_bytes=1 << 20)
+    assert reopened.get_many(MODEL, ["a"])[0] is not None
+    assert reopened.stats()["entries"] == 1
@@ -0,0 +1,66 @@
+"""
+FairEmbeddingQueue (src/rag/batch_workers.py): per-user round-robin and the pending-text bound.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from src.rag.batch_workers import EmbeddingJob, FairEmbeddingQueue
+
+
+def _job(user: str, n_texts: int = 1, name: str = "") -> EmbeddingJob:
+    return EmbeddingJob(job_id=name or user, texts=["t"] * n_texts, user_id=user)
+
+
+def test_users_are_served_round_robin():
+    async def main():
+        queue = FairEmbeddingQueue(max_texts=100)
+        for name in ("a1", "a2", "a3"):
+            queue.put_nowait(_job("a", name=name))
+        queue.put_nowait(_job("b", name="b1"))
+        queue.put_nowait(_job("c", name="c1"))
+        return [queue.get_nowait().job_id for _ in range(5)]
+
+    assert asyncio.run(main()) == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_bound_counts_pending_texts():
+    async def main():
+        queue = FairEmbeddingQueue(max_texts=10)
+        queue.put_nowait(_job("a", 6))
+        with pytest.raises(asyncio.QueueFull):
+            queue.put_nowait(_job("b", 5))
+        queue.put_nowait(_job("b", 4))
+        assert queue.stats()["pending_texts"] == 10
+        queue.get_nowait()
+        queue.put_nowait(_job("c", 5))
+        return queue.pending_texts()
+
+    assert asyncio.run(main()) == 9
+
+
+def test_oversized_job_is_admitted_into_an_empty_queue():
+    async def main():
+        queue = FairEmbeddingQueue(max_texts=10)
+        queue.put_nowait(_job("a", 50))
+        return queue.pending_texts()
+
+    assert asyncio.run(main()) == 50
+
+
+def test_put_waits_for_room():
+    async def main():
+        queue = FairEmbeddingQueue(max_texts=4)
+        queue.put_nowait(_job("a", 4))
+        waiting = asyncio.ensure_future(queue.put(_job("b", 2)))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        queue.get_nowait()
+        await asyncio.wait_for(waiting, timeout=1)
+        return queue.get_nowait().user_id
+
+    assert asyncio.run(main()) == "b"
@@ -0,0 +1,123 @@
+"""
+IVF (src/rag/ann_index.py) and BM25 (src/rag/lexical_index.py) indexes, hybrid
+retrieval on MaterialIndex, and the order build_search_indexes builds them in.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from src.config import settings
+from src.materials import pipeline
+from src.rag.ann_index import build_ivf
+from src.rag.lexical_index import build_lexical_index, query_terms
+from src.rag.vector_index import MaterialIndex
+
+DIM = 32
+WORDS = "entropy energy heat cycle engine signal noise channel matrix vector gradient proof".split()
+
+
+def _normalized(rng, n: int) -> np.ndarray:
+    m = rng.standard_normal((n, DIM)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def _index(n: int = 200, seed: int = 0) -> MaterialIndex:
+    rng = np.random.default_rng(seed)
+    words = random.Random(seed)
+    contents = [" ".join(words.choices(WORDS, k=30)) for _ in range(n)]
+    contents[7] += " thermodynamics"
+    return MaterialIndex(
+        chunk_ids=[f"c{i}" for i in range(n)], contents=contents, chunk_indexes=list(range(n)),
+        matrix=_normalized(rng, n), lexical=build_lexical_index(contents),
+    )
+
+
+def test_ivf_recall_on_clustered_vectors():
+    rng = np.random.default_rng(0)
+    centers = _normalized(rng, 20)
+    points = np.repeat(centers, 100, axis=0) + 0.1 * rng.standard_normal((2000, DIM)).astype(np.float32)
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    ivf = build_ivf(points)
+
+    recalls = []
+    for query in points[rng.choice(len(points), 50, replace=False)]:
+        exact = set(np.argsort(-(points @ query))[:10])
+        approx, _ = ivf.search(points, query, 10, nprobe=16)
+        recalls.append(len(exact & set(approx)) / 10)
+    assert np.mean(recalls) >= 0.9
+
+
+def test_bm25_ranks_the_rare_term_first():
+    index = _index()
+    scores, matched = index.lexical.score(query_terms("thermodynamics"))
+    assert int(np.argmax(scores)) == 7
+    assert int((matched > 0).sum()) == 1
+
+
+def test_hybrid_equals_dense_without_lexical_matches():
+    index = _index()
+    vector = _normalized(np.random.default_rng(1), 1)[0]
+    dense = index.search(vector, 5, 0.0)
+    hybrid = index.hybrid_search("quasar nebula", lambda: vector, 5, 0.0, 0.6)
+    assert [r["chunk_id"] for r in hybrid] == [r["chunk_id"] for r in dense]
+    assert [r["similarity"] for r in hybrid] == pytest.approx([r["similarity"] for r in dense])
+
+
+class _Embed:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return np.eye(1, DIM, dtype=np.float32)[0]
+
+
+def test_selective_short_query_skips_the_dense_pass():
+    index, embed = _index(), _Embed()
+    rows = index.hybrid_search("thermodynamics", embed, 5, 0.0, 0.6)
+    assert embed.calls == 0
+    assert rows[0]["chunk_id"] == "c7" and rows[0]["similarity"] is None
+
+
+def test_common_or_long_queries_run_the_dense_pass():
+    index = _index()
+    common, long = _Embed(), _Embed()
+    # Every chunk contains these terms with similar scores: not conclusive
+    index.hybrid_search("entropy energy", common, 5, 0.0, 0.6)
+    index.hybrid_search("thermodynamics of a heat engine cycle", long, 5, 0.0, 0.6)
+    assert common.calls == 1
+    assert long.calls == 1
+
+
+@pytest.fixture
+def built(monkeypatch):
+    order = []
+    monkeypatch.setattr(pipeline, "index_material_text", lambda mid: order.append("bm25"))
+    monkeypatch.setattr(pipeline, "prepare_material_index", lambda mid: order.append("ivf"))
+    monkeypatch.setattr(settings, "ann_min_chunks", 100)
+    return order
+
+
+def test_bm25_is_built_before_the_ivf_index(built):
+    asyncio.run(pipeline.build_search_indexes("m1", 100))
+    assert built == ["bm25", "ivf"]
+
+
+def test_small_materials_get_no_ivf_index(built):
+    asyncio.run(pipeline.build_search_indexes("m1", 99))
+    assert built == ["bm25"]
+
+
+def test_failed_bm25_build_still_builds_the_ivf_index(built, monkeypatch):
+    def fail(mid):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pipeline, "index_material_text", fail)
+    asyncio.run(pipeline.build_search_indexes("m1", 100))
+    assert built == ["ivf"]
@@ -0,0 +1,65 @@
+"""
+JobRegistry (src/rag/batch_workers.py) and the progress endpoint that reads it.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src import store
+from src.dependencies import get_current_user, get_current_user_id
+from src.materials import routes
+from src.materials.pipeline import ingest_job_id
+from src.rag import batch_workers
+from src.rag.batch_workers import JobRegistry, job_registry
+
+
+def test_results_are_handed_out_once():
+    registry = JobRegistry()
+    job_id = registry.create()
+    registry.set_done(job_id, np.ones((2, 3), dtype=np.float32))
+    assert "result" not in registry.get(job_id)
+    entry = registry.pop_result(job_id)
+    assert entry["status"] == "done" and entry["result"].shape == (2, 3)
+    assert registry.get(job_id) is None
+    assert registry.pop_result(job_id)["error"] == "Job expired"
+
+
+def test_progress_counters_and_errors():
+    registry = JobRegistry()
+    job_id = registry.create("ingest:m1", chunks_indexed=0)
+    registry.update_progress(job_id, chunks_indexed=32, percent=50)
+    registry.set_error(job_id, "boom")
+    assert registry.get(job_id) == {
+        "status": "error", "error": "boom", "progress": {"chunks_indexed": 32, "percent": 50},
+    }
+
+
+def test_unread_jobs_are_swept_after_the_ttl(monkeypatch):
+    monkeypatch.setattr(batch_workers, "_SWEEP_INTERVAL_S", 0)
+    registry = JobRegistry(ttl_s=-1)
+    stale = registry.create()
+    fresh = registry.create()
+    assert registry.get(stale) is None
+    assert registry.get(fresh) is not None
+    assert registry.stats()["evicted"] == 1
+
+
+def _client(user_id: str) -> TestClient:
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_current_user_id] = lambda: user_id
+    app.dependency_overrides[get_current_user] = lambda: {"id": user_id}
+    return TestClient(app)
+
+
+def test_progress_is_only_visible_to_the_owner():
+    material_id = store.create_material(user_id="owner", source_type="pdf", title="notes.pdf")["id"]
+    job_registry.create(ingest_job_id(material_id), chunks_produced=64, chunks_indexed=32, percent=50)
+
+    assert _client("someone-else").get(f"/api/materials/{material_id}/progress").status_code == 403
+    body = _client("owner").get(f"/api/materials/{material_id}/progress").json()
+    assert (body["chunks_indexed"], body["indexed_percent"]) == (32, 50)
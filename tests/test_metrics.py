@@ -0,0 +1,24 @@
+"""
+GET /api/metrics requires a signed-in user.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+from fastapi.testclient import TestClient
+
+from src import dependencies
+from src.main import app
+
+
+def test_metrics_rejects_anonymous_requests(monkeypatch):
+    # A configured Supabase client switches off the dev-mode user
+    monkeypatch.setattr(dependencies, "get_supabase", lambda: object())
+    response = TestClient(app).get("/api/metrics")
+    assert response.status_code == 401
+
+
+def test_metrics_reports_cache_and_queue_stats():
+    # Dev mode (no Supabase): requests run as the dev user
+    body = TestClient(app).get("/api/metrics").json()
+    assert "embedding_cache" in body
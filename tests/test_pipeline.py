@@ -0,0 +1,130 @@
+"""
+Ingestion pipeline (src/materials/pipeline.py) with the embedder and store stubbed out.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import numpy as np
+import PyPDF2
+import pytest
+
+from src.materials import pipeline, routes
+from src.materials.pipeline import IngestProgress, run_ingestion
+from src.rag.batch_workers import job_registry
+
+DIM = 4
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Stub every store / embedder call the pipeline makes; returns what got persisted."""
+    saved = {"chunks": [], "statuses": [], "checkpoints": []}
+
+    async def embed(texts, user_id=""):
+        return np.zeros((len(texts), DIM), dtype=np.float32)
+
+    def save_chunks(material_id, chunks, start_index):
+        saved["chunks"].extend(chunks)
+        return [f"c{start_index + i}" for i in range(len(chunks))]
+
+    monkeypatch.setattr(pipeline, "embed_texts_async", embed)
+    monkeypatch.setattr(pipeline, "save_chunks", save_chunks)
+    monkeypatch.setattr(pipeline, "insert_embeddings", lambda *a: None)
+    monkeypatch.setattr(pipeline, "save_checkpoint", lambda mid, cp: saved["checkpoints"].append(dict(cp)))
+    monkeypatch.setattr(pipeline, "update_material_status", lambda mid, s: saved["statuses"].append(s))
+    monkeypatch.setattr(pipeline, "update_material_progress", lambda mid, s, p: saved["statuses"].append(s))
+    monkeypatch.setattr(pipeline, "index_material_text", lambda mid: None)
+    monkeypatch.setattr(pipeline, "prepare_material_index", lambda mid: None)
+    return saved
+
+
+def _counting_source(n: int, pulled: list):
+    def source(progress):
+        for i in range(n):
+            pulled[0] = i + 1
+            yield f"chunk {i}"
+    return source
+
+
+def test_persists_every_chunk_in_order(stored):
+    progress = asyncio.run(run_ingestion("m1", _counting_source(100, [0])))
+    assert stored["chunks"] == [f"chunk {i}" for i in range(100)]
+    assert progress.chunks_indexed == 100 and progress.extraction_done
+    assert stored["checkpoints"][-1] == {"chunks_persisted": 100, "extraction_done": True}
+    assert stored["statuses"][-1] == "ready"
+
+
+def test_skip_chunks_resumes_after_persisted_prefix(stored):
+    progress = asyncio.run(run_ingestion("m1", _counting_source(100, [0]), skip_chunks=40))
+    assert stored["chunks"] == [f"chunk {i}" for i in range(40, 100)]
+    assert progress.chunks_indexed == 100
+
+
+def test_slow_embedding_holds_back_the_producer(stored, monkeypatch):
+    release = asyncio.Event()
+    pulled = [0]
+
+    async def blocked_embed(texts, user_id=""):
+        await release.wait()
+        return np.zeros((len(texts), DIM), dtype=np.float32)
+
+    monkeypatch.setattr(pipeline, "embed_texts_async", blocked_embed)
+
+    async def run():
+        task = asyncio.ensure_future(run_ingestion("m1", _counting_source(100_000, pulled)))
+        await asyncio.sleep(1.0)
+        in_flight = pulled[0]
+        release.set()
+        await task
+        return in_flight
+
+    in_flight = asyncio.run(run())
+    # Two bounded queues, one batch in the embed stage and one being filled
+    assert in_flight <= (2 * pipeline._QUEUE_MAXSIZE + 3) * pipeline._BATCH_CHUNKS
+    assert len(stored["chunks"]) == 100_000
+
+
+def test_embedding_failure_stops_the_producer_and_raises(stored, monkeypatch):
+    pulled = [0]
+
+    async def failing_embed(texts, user_id=""):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(pipeline, "embed_texts_async", failing_embed)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        asyncio.run(run_ingestion("m2", _counting_source(100_000, pulled)))
+    assert pulled[0] < 100_000
+    assert stored["chunks"] == []
+    assert "ready" not in stored["statuses"]
+    assert job_registry.get(pipeline.ingest_job_id("m2"))["status"] == "error"
+
+
+def test_source_failure_raises(stored):
+    def broken(progress):
+        yield "first"
+        raise ValueError("corrupt page")
+
+    with pytest.raises(ValueError, match="corrupt page"):
+        asyncio.run(run_ingestion("m3", broken))
+    assert "ready" not in stored["statuses"]
+
+
+def test_pdf_source_parses_the_document_once(stored, tmp_path, monkeypatch):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(100, 100)
+    path = tmp_path / "doc.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+
+    opened = []
+    real_reader = PyPDF2.PdfReader
+    monkeypatch.setattr(PyPDF2, "PdfReader", lambda *a, **k: opened.append(1) or real_reader(*a, **k))
+
+    progress = IngestProgress(material_id="m4")
+    list(routes._pdf_chunk_source(str(path))(progress))
+    assert len(opened) == 1
+    assert progress.source_fraction == 1.0
@@ -0,0 +1,87 @@
+"""
+Resuming an interrupted ingestion (routes._resume_ingestion) against the in-memory store.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from src import store
+from src.materials import routes
+
+PAGE = "The mitochondria is the powerhouse of the cell. " * 50
+
+
+@pytest.fixture
+def resume(monkeypatch):
+    """Stub the embedder, the fetch and the pipeline; returns the recorded calls."""
+    calls = {"embedded": [], "skip_chunks": None}
+
+    async def embed(texts, user_id=""):
+        calls["embedded"].extend(texts)
+        return [[0.0]] * len(texts)
+
+    async def run_ingestion(material_id, source, skip_chunks=0, user_id=""):
+        calls["skip_chunks"] = skip_chunks
+
+    async def fetch(url):
+        return calls.get("page", PAGE)
+
+    async def build(material_id, n_chunks):
+        pass
+
+    monkeypatch.setattr(routes, "embed_texts_async", embed)
+    monkeypatch.setattr(routes, "insert_embeddings", lambda *a: None)
+    monkeypatch.setattr(routes, "run_ingestion", run_ingestion)
+    monkeypatch.setattr(routes, "fetch_page_text", fetch)
+    monkeypatch.setattr(routes, "build_search_indexes", build)
+    return calls
+
+
+def _interrupted_url_material(persisted: int, stored_indexes: list[int]) -> str:
+    material = store.create_material(user_id="u1", source_type="url", title="cells", url="https://example.com/cells")
+    material_id = material["id"]
+    for i in stored_indexes:
+        [chunk_id] = store.save_chunks(material_id, [f"chunk {i}"], start_index=i)
+        if i < persisted:
+            store._table_supabase("material_embeddings").insert(
+                {"chunk_id": chunk_id, "material_id": material_id, "embedding": "[0]"}
+            ).execute()
+    store.save_checkpoint(material_id, {
+        "source_type": "url", "source": "https://example.com/cells", "content_hash": "url:x",
+        "text_hash": routes._text_hash(PAGE), "chunks_persisted": persisted, "extraction_done": False,
+    })
+    return material_id
+
+
+def _chunk_indexes(material_id: str) -> list[int]:
+    return sorted(c["chunk_index"] for c in store.get_chunks(material_id))
+
+
+def test_resume_drops_rows_past_the_checkpoint(resume):
+    # Chunks 0-9 were checkpointed; 12 and 13 landed from a later batch, 10 and 11 didn't
+    material_id = _interrupted_url_material(10, list(range(10)) + [12, 13])
+    asyncio.run(routes._resume_ingestion(material_id, "u1"))
+    assert resume["skip_chunks"] == 10
+    assert _chunk_indexes(material_id) == list(range(10))
+    assert resume["embedded"] == []
+
+
+def test_resume_restarts_when_the_page_changed(resume):
+    material_id = _interrupted_url_material(10, list(range(10)))
+    resume["page"] = PAGE + " Updated."
+    asyncio.run(routes._resume_ingestion(material_id, "u1"))
+    assert resume["skip_chunks"] == 0
+    assert _chunk_indexes(material_id) == []
+
+
+def test_resume_embeds_chunks_saved_without_embeddings(resume):
+    material_id = store.create_material(user_id="u1", source_type="url", title="no checkpoint")["id"]
+    store.save_chunks(material_id, ["a", "b"])
+    asyncio.run(routes._resume_ingestion(material_id, "u1"))
+    assert resume["embedded"] == ["a", "b"]
+    assert resume["skip_chunks"] is None
+    assert store.get_material(material_id)["status"] == "ready"
@@ -0,0 +1,69 @@
+"""
+Ingestion scheduler (src/materials/scheduler.py): ordering, aging and outcome counting.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+
+from src.config import settings
+from src.materials.scheduler import IngestionScheduler
+
+MB = 1024 * 1024
+
+
+def _run(submissions: list[tuple[str, int]]) -> list[str]:
+    """Queue (user, size) jobs before one worker starts; returns the order they ran in."""
+    ran: list[str] = []
+
+    async def job(name: str):
+        ran.append(name)
+
+    async def main():
+        scheduler = IngestionScheduler(workers=1, max_queued=100)
+        for i, (user, size) in enumerate(submissions):
+            scheduler.submit(user, job, f"{user}{i}", size_bytes=size)
+        scheduler.start()
+        while len(ran) < len(submissions):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    return ran
+
+
+def test_small_files_first_then_users_round_robin(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_max_wait_s", 3600)
+    ran = _run([("a", 10 * MB), ("a", MB // 2), ("a", MB // 2), ("b", MB // 2), ("b", 2 * MB)])
+    assert ran == ["a1", "b3", "a2", "b4", "a0"]
+
+
+def test_a_job_past_the_maximum_wait_goes_first(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_max_wait_s", 0)
+    ran = _run([("a", 10 * MB), ("b", MB // 2), ("b", MB // 2)])
+    assert ran[0] == "a0"
+
+
+def test_failures_are_counted_from_return_values_and_exceptions():
+    async def main():
+        scheduler = IngestionScheduler(workers=1, max_queued=10)
+
+        async def succeeded():
+            return True
+
+        async def handled_failure():
+            return False
+
+        async def crashed():
+            raise RuntimeError("boom")
+
+        for run in (succeeded, handled_failure, crashed):
+            scheduler.submit("u", run)
+        scheduler.start()
+        while scheduler.stats()["completed"] < 3:
+            await asyncio.sleep(0.01)
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+    assert stats["failed"] == 2
+    assert stats["queued"] == 0
@@ -0,0 +1,42 @@
+"""
+CPU budget split (src/thread_budget.py).
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import pytest
+
+from src import thread_budget
+from src.config import settings
+
+
+@pytest.fixture
+def layout(monkeypatch):
+    def make(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        thread_budget.get_layout.cache_clear()
+        return thread_budget.get_layout()
+
+    monkeypatch.setattr(settings, "parse_threads", 0)
+    yield make
+    thread_budget.get_layout.cache_clear()
+
+
+def test_in_process_inference_shares_its_thread_with_queries(layout):
+    split = layout(cpu_budget=8, embedding_workers=1)
+    assert (split.inference_threads, split.parse_threads, split.inference_shares) == (6, 2, 1)
+    assert "oversubscribed" not in split.describe()
+
+
+def test_pool_mode_reserves_a_share_for_the_query_lane(layout):
+    split = layout(cpu_budget=8, embedding_workers=2)
+    assert split.inference_threads == 2
+    assert split.inference_threads * split.inference_shares + split.parse_threads <= 8
+    assert "oversubscribed" not in split.describe()
+
+
+def test_small_hosts_still_get_a_pdf_pool(layout):
+    assert layout(cpu_budget=4, pdf_workers=3).pdf_processes == 3
+    assert layout(cpu_budget=2, pdf_workers=8).pdf_processes == 2
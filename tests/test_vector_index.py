@@ -0,0 +1,105 @@
+"""
+In-process index caches (src/rag/vector_index.py) with the loaders stubbed out.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from src.config import settings
+from src.rag import vector_index
+from src.rag.vector_index import MaterialIndex, UserIndex, UserIndexCache, VectorIndexCache
+
+
+def _material_index(rows: int = 2) -> MaterialIndex:
+    return MaterialIndex(
+        chunk_ids=[f"c{i}" for i in range(rows)], contents=["text"] * rows,
+        chunk_indexes=list(range(rows)), matrix=np.eye(rows, 4, dtype=np.float32),
+    )
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def load(owner_id, build_ann=False):
+        calls.append(owner_id)
+        return _material_index()
+
+    monkeypatch.setattr(vector_index, "load_material_index", load)
+    return calls
+
+
+def test_material_cache_hits_until_invalidated(loads):
+    cache = VectorIndexCache(max_bytes=1 << 20)
+    first = cache.get("m1")
+    assert cache.get("m1") is first
+    cache.invalidate("m1")
+    assert cache.get("m1") is not first
+    assert loads == ["m1", "m1"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_material_cache_entries_expire(loads, monkeypatch):
+    cache = VectorIndexCache(max_bytes=1 << 20)
+    monkeypatch.setattr(settings, "vector_index_ttl_s", -1)
+    cache.get("m1")
+    cache.get("m1")
+    assert loads == ["m1", "m1"]
+    assert cache.stats()["expirations"] == 1
+
+
+def test_material_cache_evicts_least_recently_used(loads):
+    size = _material_index().nbytes
+    cache = VectorIndexCache(max_bytes=2 * size)
+    cache.get("m1")
+    cache.get("m2")
+    cache.get("m1")
+    cache.get("m3")
+    assert loads == ["m1", "m2", "m3"]
+    cache.get("m1")
+    cache.get("m2")
+    assert loads == ["m1", "m2", "m3", "m2"]
+
+
+def _user_index(owner_ids: frozenset) -> UserIndex:
+    owners = sorted(owner_ids)
+    return UserIndex(
+        owner_ids=frozenset(owner_ids), row_owners=owners, chunk_ids=[f"{o}-c0" for o in owners],
+        contents=["text"] * len(owners), chunk_indexes=[0] * len(owners),
+        matrix=np.eye(len(owners), 4, dtype=np.float32) if owners else np.empty((0, 0), dtype=np.float32),
+    )
+
+
+@pytest.fixture
+def user_loads(monkeypatch):
+    calls = []
+
+    def load(owner_ids):
+        calls.append(set(owner_ids))
+        return _user_index(owner_ids)
+
+    monkeypatch.setattr(vector_index, "load_user_index", load)
+    return calls
+
+
+def test_user_cache_reloads_only_changed_owners(user_loads):
+    cache = UserIndexCache(max_bytes=1 << 20)
+    cache.get("u1", frozenset({"a", "b"}))
+    cache.invalidate_owner("b")
+    index = cache.get("u1", frozenset({"a", "b", "c"}))
+    assert user_loads == [{"a", "b"}, {"b", "c"}]
+    assert sorted(index.row_owners) == ["a", "b", "c"]
+    assert cache.get("u1", frozenset({"a", "b", "c"})) is index
+
+
+def test_user_cache_entries_expire(user_loads, monkeypatch):
+    cache = UserIndexCache(max_bytes=1 << 20)
+    monkeypatch.setattr(settings, "vector_index_ttl_s", -1)
+    cache.get("u1", frozenset({"a", "b"}))
+    cache.get("u1", frozenset({"a", "b"}))
+    assert user_loads == [{"a", "b"}, {"a", "b"}]
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["loads"] == 2
@@ -0,0 +1,24 @@
+"""
+pgvector text literals (src/rag/rag.py vector_literal).
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import json
+
+import numpy as np
+
+from src.rag.rag import vector_literal
+
+
+def test_round_trips_to_the_same_float32_vector():
+    rng = np.random.default_rng(0)
+    vector = rng.standard_normal(384).astype(np.float32)
+    parsed = np.asarray(json.loads(vector_literal(vector)), dtype=np.float32)
+    np.testing.assert_allclose(parsed, vector, rtol=1e-6)
+
+
+def test_accepts_lists_and_formats_compactly():
+    assert vector_literal([0.5, -0.25, 0.0]) == "[0.5,-0.25,0]"
+    assert vector_literal(np.float32([1e-8])) == "[1e-08]"
@@ -0,0 +1,115 @@
+"""
+Fast URL path (src/materials/web.py) against a local HTTP server fixture.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.config import settings
+from src.materials import text_utils, web
+
+ARTICLE_TEXT = "Photosynthesis converts light energy into chemical energy. " * 20
+SLOW_S = 1.0
+
+PAGES = {
+    "/article": f"""<!doctype html><html><head><title>t</title>
+        <script>var tracking = "script text";</script><style>body {{ color: red }}</style></head>
+        <body><nav>Home | About | Login</nav><header>Site header</header>
+        <article><h1>Plants</h1><p>{ARTICLE_TEXT}</p></article>
+        <footer>Copyright footer</footer></body></html>""",
+    "/short": "<html><body><p>Enable JavaScript to view this page.</p></body></html>",
+    "/big": "<html><body><p>" + "start " + "x" * 200_000 + " end-marker</p></body></html>",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(SLOW_S)
+        if self.path == "/pdf":
+            body, content_type = b"%PDF-1.4", "application/pdf"
+        else:
+            body, content_type = PAGES.get(self.path, PAGES["/article"]).encode("utf-8"), "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _fetch(fn, url: str, timeout: float = 5.0) -> str:
+    async def run():
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            return await fn(url, client)
+    return asyncio.run(run())
+
+
+def test_extracts_main_text(base_url):
+    text = _fetch(web.fetch_main_text, f"{base_url}/article")
+    assert "Photosynthesis converts light energy" in text
+    assert text.startswith("Plants")
+    for boilerplate in ("script text", "color: red", "Home | About", "Site header", "Copyright footer"):
+        assert boilerplate not in text
+
+
+def test_rejects_non_html(base_url):
+    with pytest.raises(ValueError):
+        _fetch(web.fetch_main_text, f"{base_url}/pdf")
+
+
+def test_caps_response_size(base_url, monkeypatch):
+    monkeypatch.setattr(settings, "scrape_max_bytes", 10_000)
+    text = _fetch(web.fetch_main_text, f"{base_url}/big")
+    assert text.startswith("start")
+    assert len(text) < 10_000
+    assert "end-marker" not in text
+
+
+def test_times_out(base_url):
+    with pytest.raises(httpx.TimeoutException):
+        _fetch(web.fetch_main_text, f"{base_url}/slow", timeout=SLOW_S / 5)
+
+
+def test_falls_back_when_text_is_too_short(base_url, monkeypatch):
+    fallback_urls = []
+
+    def fake_unstructured(url):
+        fallback_urls.append(url)
+        return "text from the unstructured loader"
+
+    monkeypatch.setattr(text_utils, "scrap_website", fake_unstructured)
+    text = _fetch(web.fetch_page_text, f"{base_url}/short")
+    assert text == "text from the unstructured loader"
+    assert fallback_urls == [f"{base_url}/short"]
+
+
+def test_no_fallback_for_long_pages(base_url, monkeypatch):
+    monkeypatch.setattr(text_utils, "scrap_website", lambda url: pytest.fail("fell back"))
+    assert "Photosynthesis" in _fetch(web.fetch_page_text, f"{base_url}/article")
+
+
+def test_falls_back_on_timeout(base_url, monkeypatch):
+    monkeypatch.setattr(text_utils, "scrap_website", lambda url: "fallback")
+    assert _fetch(web.fetch_page_text, f"{base_url}/slow", timeout=SLOW_S / 5) == "fallback"